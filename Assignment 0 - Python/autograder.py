@@ -4,12 +4,16 @@ import threading, _thread
 import time
 import json
 import argparse
-import os
+import os, sys
 from typing import Any, Callable, Dict, List, Tuple, Union
 
 from globals import *
 from utils import *
 
+# The modules shared by the autograders of all the assignments are in the "grading" directory next to the assignments
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "grading"))
+from test_workers import run_tests_in_parallel, supports_parallel_tests
+
 root = "testcases"
 
 solution_path = ""
@@ -79,6 +83,23 @@ def approximate_comparator(output, expected):
         message = f"Expected {expected} but got {output}"
     return Result(success, grade, message)
 
+# Loads the function and the comparator and evaluates the arguments of a test case
+def prepare_test(problem: 'Problem', test_case: Dict[str, Any]) -> Tuple[Callable, Arguments, Callable, Arguments]:
+    fn = problem.default_fn
+    if "function" in test_case:
+        try: fn = load_function(test_case["function"])
+        except: pass
+    input_args = test_case.get("input_args", [])
+    input_kwargs = test_case.get("input_kwargs", {})
+    fn_args = Arguments(
+        [eval(arg) for arg in input_args], {key:eval(value) for key, value in input_kwargs.items()})
+    cmp = problem.default_cmp
+    if "comparator" in test_case: cmp = load_function(test_case["comparator"], use_local=True)
+    cmp_args = Arguments(
+        [eval(arg) for arg in test_case.get("comparison_args", [])],
+        {key:eval(value) for key, value in test_case.get("comparison_kwargs", {}).items()})
+    return fn, fn_args, cmp, cmp_args
+
 class Problem:
     def __init__(self, **kwargs) -> None:
         self.name = kwargs.get("name", "Unnamed Problem")
@@ -94,32 +115,33 @@ class Problem:
         self.grade = 0
         self.maximum_grade = 0
     
-    def run(self):
+    # Runs the test cases one after another (or in "jobs" worker processes if jobs > 1)
+    def run(self, jobs: int = 1):
         print(f"Problem: {self.name}")
         test_cases = get_test_cases(os.path.join(root, self.testcases_path))
         self.grade = 0
         self.maximum_grade = 0
+        timeouts = [test_case.get("timeout", self.default_timeout) for test_case in test_cases]
+        parallel_results = None
+        if jobs > 1:
+            parallel_results = run_tests_in_parallel(
+                lambda index: run_test(*prepare_test(self, test_cases[index]), timeouts[index]),
+                lambda message: Result(False, 0, message), timeouts, jobs)
         for test_index, test_case in enumerate(test_cases):
             description = test_case.get("description", f"Test Case {test_index+1}")
             timeout = test_case.get("timeout", self.default_timeout)
             print(f"{test_index+1}: {description} :: time-limit = {timeout}sec")
-            fn = self.default_fn
-            if "function" in test_case:
-                try: fn = load_function(test_case["function"])
-                except: pass
             input_args = test_case.get("input_args", [])
             input_kwargs = test_case.get("input_kwargs", {})
-            fn_args = Arguments(
-                [eval(arg) for arg in input_args], {key:eval(value) for key, value in input_kwargs.items()})
-            cmp = self.default_cmp
-            if "comparator" in test_case: cmp = load_function(test_case["comparator"], use_local=True)
-            cmp_args = Arguments(
-                [eval(arg) for arg in test_case.get("comparison_args", [])],
-                {key:eval(value) for key, value in test_case.get("comparison_kwargs", {}).items()})
             weight = test_case.get("weight", 1)
             maximum_grade = self.weight * weight * test_case.get("maximum_grade", 1)
             self.maximum_grade += maximum_grade
-            result = run_test(fn, fn_args, cmp, cmp_args, timeout)
+            if parallel_results is None:
+                result = run_test(*prepare_test(self, test_case), timeouts[test_index])
+            else:
+                # The output printed by the test case in the worker is printed where the test case would have printed it
+                output, result = next(parallel_results)
+                print(output, end="")
             if result is None:
                 print("Function is not implemented yet")
                 continue
@@ -160,8 +182,12 @@ def main(args: argparse.Namespace):
                 problems = [problem for index, problem in enumerate(problems) if index in selected]
         except:
             pass
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if jobs > 1 and not supports_parallel_tests():
+        print("The test cases cannot run in worker processes on this platform, so they run one after another\n")
+        jobs = 1
     for problem in problems:
-        problem.run()
+        problem.run(jobs)
         print()
         total_grade += problem.grade
         maximum_grade += problem.maximum_grade
@@ -172,5 +198,6 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser("Autograder")
     parser.add_argument("--question", "-q", default="all")
     parser.add_argument("--solution", "-s", default="")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="the number of test cases to run in parallel worker processes (0 for the number of CPUs)")
     args = parser.parse_args()
     main(args)
\ No newline at end of file
@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import Callable, Dict, Generic, List
-from problem import HeuristicFunction, Problem, S, A, Solution
+from typing import Callable, Dict, Generic, List, Optional
+from functools import partial
+from problem import HeuristicFunction, Problem, ReverseHeuristicFunction, S, A, Solution
+from search_tree import SearchTree
+from search_stats import SearchStats
+from dstar_lite import DStarLite
+import inspect, time
 
 # This is an abstract class for all goal based agents
 class GoalBasedAgent(ABC, Generic[S, A]):
@@ -12,6 +17,33 @@ class GoalBasedAgent(ABC, Generic[S, A]):
     def act(self, problem: Problem[S, A], observation: S) -> A:
         pass
 
+    # Tells the agent that the actions (or the action costs) of the states selected by the function changed
+    # (for example, a cell of the dungeon was blocked). By default, the agent ignores the changes
+    def notify_changes(self, is_changed: Callable[[S], bool]) -> None:
+        pass
+
+# Returns True if the function accepts a keyword argument with the given name
+# The search agents use it to pass the optional arguments (tree, stats and deadline) only to the search functions that accept them,
+# so search functions with the original signature (problem, initial_state[, heuristic]) still work
+def _accepts_argument(fn: Callable, name: str) -> bool:
+    try:
+        parameters = inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+    return name in parameters or any(parameter.kind == parameter.VAR_KEYWORD for parameter in parameters.values())
+
+# Stores the action to do in each state along the solution into the policy
+# If the search filled the tree, the states are read from it. Otherwise, they are generated by applying the actions from the given state
+def _store_solution(policy: Dict[S, A], problem: Problem[S, A], state: S, solution: Solution, tree: Optional[SearchTree]) -> None:
+    if tree is not None and tree.goal is not None:
+        for current, action in tree.trajectory(tree.goal):
+            policy[current] = action
+        return
+    current = state
+    for action in solution:
+        policy[current] = action
+        current = problem.get_successor(current, action)
+
 # The human agent requests the action from the user (human)
 class HumanAgent(GoalBasedAgent[S, A]):
     def __init__(self, user_input_fn: Callable[[Problem[S, A], S], A]) -> None:
@@ -22,48 +54,99 @@ class HumanAgent(GoalBasedAgent[S, A]):
         return self.user_input_fn(problem, state)
 
 # This agent applies an uninformed search algorithm to find the solution to goal for the given state
+# If a stats object is given, every search done by the agent adds its stats to it
 class UninformedSearchAgent(GoalBasedAgent[S, A]):
-    def __init__(self, search_fn: Callable[[Problem[S, A], S], Solution]) -> None:
+    def __init__(self, search_fn: Callable[[Problem[S, A], S], Solution], stats: Optional[SearchStats] = None) -> None:
         super().__init__()
-        self.search_fn = search_fn
+        self.search_fn = search_fn if stats is None or not _accepts_argument(search_fn, "stats") else partial(search_fn, stats=stats)
+        self.uses_tree = _accepts_argument(search_fn, "tree")
+        self.stats = stats
         # The policy will store the action to do for each state so as not to search again after each observation
         self.policy: Dict[S, A] = {}
     
     def act(self, problem: Problem[S, A], state: S) -> A:
         # This state is not stored in the policy, we need to search for a solution 
         if state not in self.policy:
-            solution = self.search_fn(problem, state)
+            # The search fills the search tree (if it accepts one) so that we can read the states along the solution path from it
+            tree = SearchTree(state) if self.uses_tree else None
+            start = time.perf_counter()
+            if tree is None:
+                solution = self.search_fn(problem, state)
+            else:
+                solution = self.search_fn(problem, state, tree=tree)
+            if self.stats is not None: self.stats.elapsed += time.perf_counter() - start
             # if no solution was found, we return None
             if solution is None:
                 self.policy[state] = None
                 return None
             # Otherwise, we go through the solution path and store the action to do in each state into the policy
-            current = state
-            for action in solution:
-                self.policy[current] = action
-                current = problem.get_successor(current, action)
+            _store_solution(self.policy, problem, state, solution, tree)
         return self.policy.get(state)
 
+    # The stored policy may lead into the changed states, so it is dropped and the next observation is searched from scratch
+    def notify_changes(self, is_changed: Callable[[S], bool]) -> None:
+        self.policy.clear()
+
 # This agent applies an informed search algorithm to find the solution to goal for the given state
+# If a stats object is given, every search done by the agent adds its stats to it
+# If a time limit (in seconds) is given, every search receives a deadline which is "time_limit" seconds after the search starts
+# (so the search function must accept a deadline, such as AnytimeRepairingAStarSearch)
 class InformedSearchAgent(GoalBasedAgent[S, A]):
-    def __init__(self, search_fn: Callable[[Problem[S, A], S, HeuristicFunction], Solution], heuristic: HeuristicFunction) -> None:
+    def __init__(self, search_fn: Callable[[Problem[S, A], S, HeuristicFunction], Solution], heuristic: HeuristicFunction,
+                 stats: Optional[SearchStats] = None, time_limit: Optional[float] = None) -> None:
         super().__init__()
-        self.search_fn = search_fn
+        self.search_fn = search_fn if stats is None or not _accepts_argument(search_fn, "stats") else partial(search_fn, stats=stats)
+        self.uses_tree = _accepts_argument(search_fn, "tree")
         self.heuristic = heuristic
+        self.stats = stats
+        self.time_limit = time_limit
+        if time_limit is not None and not _accepts_argument(search_fn, "deadline"):
+            raise ValueError("The search function does not accept a deadline, so it cannot be used with a time limit")
         # The policy will store the action to do for each state so as not to search again after each observation
         self.policy: Dict[S, A] = {}
     
     def act(self, problem: Problem[S, A], state: S) -> A:
         # This state is not stored in the policy, we need to search for a solution 
         if state not in self.policy:
-            solution = self.search_fn(problem, state, self.heuristic)
+            # The search fills the search tree (if it accepts one) so that we can read the states along the solution path from it
+            tree = SearchTree(state) if self.uses_tree else None
+            options = {} if tree is None else {"tree": tree}
+            start = time.perf_counter()
+            if self.time_limit is not None: options["deadline"] = start + self.time_limit
+            solution = self.search_fn(problem, state, self.heuristic, **options)
+            if self.stats is not None: self.stats.elapsed += time.perf_counter() - start
             # if no solution was found, we return None
             if solution is None:
                 self.policy[state] = None
                 return None
             # Otherwise, we go through the solution path and store the action to do in each state into the policy
-            current = state
-            for action in solution:
-                self.policy[current] = action
-                current = problem.get_successor(current, action)
-        return self.policy.get(state)
\ No newline at end of file
+            _store_solution(self.policy, problem, state, solution, tree)
+        return self.policy.get(state)
+
+    # The stored policy may lead into the changed states, so it is dropped and the next observation is searched from scratch
+    def notify_changes(self, is_changed: Callable[[S], bool]) -> None:
+        self.policy.clear()
+
+# This agent plans with D* Lite (see dstar_lite.py) and keeps its planner between the calls
+# When the agent is in a state that was not planned, or the actions of some states change,
+# the planner only repairs the part of its search that is affected instead of searching again from scratch
+# The problem must implement the optional "get_goal_states" and "get_predecessors" hooks
+# If a stats object is given, every repair done by the agent adds its stats to it
+class IncrementalSearchAgent(GoalBasedAgent[S, A]):
+    def __init__(self, reverse_heuristic: Optional[ReverseHeuristicFunction] = None, stats: Optional[SearchStats] = None) -> None:
+        super().__init__()
+        self.reverse_heuristic = reverse_heuristic
+        self.stats = stats
+        # The planner of the current problem (it is created on the first call)
+        self.planner: Optional[DStarLite[S, A]] = None
+
+    def act(self, problem: Problem[S, A], state: S) -> A:
+        start = time.perf_counter()
+        if self.planner is None or self.planner.original_problem is not problem:
+            self.planner = DStarLite(problem, state, self.reverse_heuristic, self.stats)
+        action = self.planner.next_action(state)
+        if self.stats is not None: self.stats.elapsed += time.perf_counter() - start
+        return action
+
+    def notify_changes(self, is_changed: Callable[[S], bool]) -> None:
+        if self.planner is not None: self.planner.update_states(is_changed)
@@ -0,0 +1,163 @@
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, Iterable, Iterator, Optional
+import argparse, contextlib, json, multiprocessing, os, sys, time, traceback
+
+from heuristic_cache import CACHE_POLICIES, DEFAULT_CAPACITY, CachedHeuristic
+from solver import HEURISTICS, PROBLEM_TYPES, SEARCH_ALGORITHMS, format_path, get_search_function, load_problem, run_search
+
+# This file contains a command that solves many levels offline with one search algorithm
+# The levels are streamed from directories or from a file containing a list of paths,
+# and they are solved by a pool of worker processes (every level is solved in its own process).
+# For each level, one JSON line is written with the path, its cost, the number of expanded nodes,
+# the peak frontier size, the elapsed time and the rest of the search stats (and the stats of the heuristic cache if the heuristic is cached).
+# The heuristic cache statistics help choosing the cache capacity for each level family.
+# If a level takes longer than the per-level timeout, its process is stopped and the batch continues with the other levels.
+#
+# Example:
+#   python batch_solve.py dungeons parks -a astar -j 4 -t 60 -o results.jsonl
+
+# The extensions of the level files that are collected from directories
+LEVEL_EXTENSIONS = (".txt", ".json", ".edges")
+
+# Yields the level files in a directory (sorted by name)
+# The figure files that accompany the graphs (ending with "_fig.txt") are not levels so they are skipped
+def _directory_levels(directory: str) -> Iterator[str]:
+    for root, directories, files in os.walk(directory):
+        directories.sort()
+        for name in sorted(files):
+            if name.endswith(LEVEL_EXTENSIONS) and not name.endswith("_fig.txt"):
+                yield os.path.join(root, name)
+
+# Yields the level paths from the given sources
+# A source can be a directory, a level file, or a list file (prefixed with '@') that contains one path per line ('@-' reads the list from stdin)
+def iterate_levels(sources: Iterable[str]) -> Iterator[str]:
+    for source in sources:
+        if source.startswith('@'):
+            # stdin is not closed after reading the list, but the list files are
+            with (contextlib.nullcontext(sys.stdin) if source == "@-" else open(source[1:], 'r')) as lines:
+                for line in lines:
+                    line = line.strip()
+                    if line: yield line
+        elif os.path.isdir(source):
+            yield from _directory_levels(source)
+        else:
+            yield source
+
+# This function runs in the worker process. It solves one level and sends the record back through the connection
+def _solve_level_worker(connection: Connection, level: str, problem_type: Optional[str], algorithm: str, heuristic: Optional[str],
+                        cache_capacity: int, cache_policy: str):
+    record: Dict[str, Any] = {"level": level}
+    try:
+        problem_type, problem = load_problem(level, problem_type)
+        record["problem"] = problem_type
+        search_fn = get_search_function(algorithm, problem_type, heuristic, cache_capacity, cache_policy)
+        outcome = run_search(problem, search_fn)
+        record.update({
+            "status": "no solution" if outcome.path is None else "solved",
+            "path": format_path(outcome.path, problem),
+            "cost": outcome.cost,
+            "expanded": outcome.stats.expanded,
+            "peak_frontier": outcome.stats.peak_frontier,
+            "elapsed": outcome.stats.elapsed,
+            "stats": outcome.stats.to_dict(),
+        })
+        # The heuristic is bound to the informed search functions as a keyword argument
+        cached_heuristic = getattr(search_fn, "keywords", {}).get("heuristic")
+        if isinstance(cached_heuristic, CachedHeuristic):
+            record["heuristic_cache"] = cached_heuristic.cache_of(problem).to_dict()
+    except Exception:
+        record.update({"status": "error", "error": traceback.format_exc()})
+    connection.send(record)
+    connection.close()
+
+# Solves the levels using a pool of 'jobs' worker processes and yields the record of every level as soon as it is done
+# (so the records are in the order of completion, and each record contains the path of its level)
+# If a level is not solved within 'timeout' seconds, its process is stopped and its record has the status "timeout"
+def solve_levels(levels: Iterable[str], algorithm: str, heuristic: Optional[str] = None, problem_type: Optional[str] = None,
+                 jobs: int = 1, timeout: Optional[float] = None,
+                 cache_capacity: int = DEFAULT_CAPACITY, cache_policy: str = "lru") -> Iterator[Dict[str, Any]]:
+    levels = iter(levels)
+    jobs = max(1, jobs)
+    # The running levels: the parent end of the connection of each worker alongside its level, process and start time
+    running: Dict[Connection, tuple] = {}
+    exhausted = False
+    while True:
+        # Keep the pool full while there are more levels
+        while not exhausted and len(running) < jobs:
+            level = next(levels, None)
+            if level is None:
+                exhausted = True
+                break
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            worker_args = (sender, level, problem_type, algorithm, heuristic, cache_capacity, cache_policy)
+            process = multiprocessing.Process(target=_solve_level_worker, args=worker_args, daemon=True)
+            process.start()
+            sender.close() # The parent only reads from the connection
+            running[receiver] = (level, process, time.perf_counter())
+        if not running: break
+        # Wait until a level is done or until the earliest timeout
+        wait_time = None
+        if timeout is not None:
+            wait_time = max(0, min(started for _, _, started in running.values()) + timeout - time.perf_counter())
+        for connection in wait(list(running.keys()), wait_time):
+            level, process, started = running.pop(connection)
+            try:
+                record = connection.recv()
+            except EOFError:
+                # The process died without sending a record
+                record = {"level": level, "status": "error", "error": f"The worker process exited with code {process.exitcode}"}
+            process.join()
+            connection.close()
+            yield record
+        if timeout is not None:
+            now = time.perf_counter()
+            for connection, (level, process, started) in list(running.items()):
+                if now - started < timeout: continue
+                # This level took too long, so we stop its process (the other levels are not affected)
+                del running[connection]
+                process.terminate()
+                process.join()
+                connection.close()
+                yield {"level": level, "status": "timeout", "elapsed": now - started}
+
+def main(args: argparse.Namespace):
+    counts: Dict[str, int] = {}
+    start = time.time()
+    with contextlib.ExitStack() as stack:
+        output = sys.stdout if args.output is None else stack.enter_context(open(args.output, 'w'))
+        for record in solve_levels(iterate_levels(args.levels), args.algorithm, args.heuristic, args.problem, args.jobs, args.timeout,
+                                   args.cache_capacity, args.cache_policy):
+            record["algorithm"] = args.algorithm
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+    summary = ', '.join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"Done in {time.time() - start:.3f} seconds ({summary or 'no levels'})", file=sys.stderr)
+
+if __name__ == "__main__":
+    # Read the arguments from the command line
+    parser = argparse.ArgumentParser(description="Solve many levels in parallel and write the results as JSON lines")
+    parser.add_argument("levels", nargs="+",
+                        help="the levels to solve: directories, level files or list files prefixed with '@' (use '@-' to read the list from stdin)")
+    parser.add_argument("--algorithm", "-a", default="astar", choices=list(SEARCH_ALGORITHMS),
+                        help="the search algorithm")
+    parser.add_argument("--heuristic", "-hf", default=None, choices=sorted({name for names in HEURISTICS.values() for name in names}),
+                        help="the heuristic used by the informed algorithms (the best heuristic of each problem type if not given)")
+    parser.add_argument("--problem", "-p", default=None, choices=PROBLEM_TYPES,
+                        help="the type of the levels (detected from each file if not given)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="the number of worker processes")
+    parser.add_argument("--timeout", "-t", type=float, default=None,
+                        help="the time limit in seconds for each level")
+    parser.add_argument("--cache-capacity", "-cc", type=int, default=DEFAULT_CAPACITY,
+                        help="the maximum number of heuristic values cached for each level")
+    parser.add_argument("--cache-policy", "-cp", default="lru", choices=list(CACHE_POLICIES),
+                        help="the eviction policy of the heuristic cache")
+    parser.add_argument("--output", "-o", default=None,
+                        help="the file where the JSON lines are written (stdout if not given)")
+
+    args = parser.parse_args()
+    try:
+        main(args)
+    except KeyboardInterrupt:
+        print("Goodbye!!")
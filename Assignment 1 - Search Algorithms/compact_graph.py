@@ -0,0 +1,391 @@
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple
+import json, math, re
+
+from problem import Problem
+from helpers.utils import CacheContainer
+
+# This file contains a compact version of the graph routing problem for large graphs (such as road networks)
+#
+# GraphRoutingProblem keeps every node as a GraphNode dataclass and the adjacency as a dictionary of lists,
+# and it reads the whole json file at once, which needs a few kilobytes per edge.
+# CompactGraph stores the graph in the compressed sparse row (CSR) format using flat arrays instead:
+# - the nodes are numbered from 0 to n-1 and their positions are stored in two arrays of floats
+# - the neighbors of node i are targets[offsets[i]:offsets[i+1]] and the costs of these edges are in the same range of costs
+# which takes about 12 bytes per edge (plus the names of the nodes).
+# The neighbors of every node are sorted by name (like GraphRoutingProblem), so both problems are searched in the same order.
+#
+# The graphs are read while streaming the file, so the file is never held in memory at once. Two formats are supported:
+# 1. The json format of GraphRoutingProblem (see graphs/graph1.json)
+# 2. An edge list format (with the extension ".edges") where every line is one of:
+#       v <name> <x> <y>            a node and its position
+#       a <from> <to> [cost]        a directed edge (its cost is the distance between the nodes if it is not given)
+#       s <name>                    the start node
+#       g <name>                    the goal node
+#    Empty lines and lines that start with '#' or 'c' are comments
+#
+# CompactGraphRoutingProblem is the graph routing problem on a CompactGraph where the states and the actions are the node ids.
+
+# The extension of the edge list files
+EDGE_LIST_EXTENSION = ".edges"
+
+# CompactGraph is a directed graph stored in the compressed sparse row format
+# It is a CacheContainer so that the data computed from the graph alone (such as the landmarks) can be shared by all the problems on it
+class CompactGraph(CacheContainer):
+    names: List[str]        # The name of every node
+    xs: array               # The x coordinate of every node
+    ys: array               # The y coordinate of every node
+    offsets: array          # The edges of node i are in the range [offsets[i], offsets[i+1])
+    targets: array          # The target node of every edge
+    costs: array            # The cost of every edge
+
+    # distance_is_admissible can be given if it is already known (see the property below), otherwise it is checked when it is first requested
+    def __init__(self, names: List[str], xs: array, ys: array, offsets: array, targets: array, costs: array,
+                 distance_is_admissible: Optional[bool] = None) -> None:
+        self.names = names
+        self.xs = xs
+        self.ys = ys
+        self.offsets = offsets
+        self.targets = targets
+        self.costs = costs
+        self._distance_is_admissible = distance_is_admissible
+        self._index: Optional[Dict[str, int]] = None
+        self._reverse: Optional['CompactGraph'] = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    # Returns the id of the node with the given name
+    def node_id(self, name: str) -> int:
+        if self._index is None:
+            self._index = {name: node for node, name in enumerate(self.names)}
+        return self._index[name]
+
+    # Returns the neighbors of a node
+    def neighbors(self, node: int) -> array:
+        return self.targets[self.offsets[node]:self.offsets[node+1]]
+
+    # Returns the cost of the edge between two nodes (or None if there is no such edge)
+    def edge_cost(self, node: int, neighbor: int) -> Optional[float]:
+        targets = self.targets
+        for edge in range(self.offsets[node], self.offsets[node+1]):
+            if targets[edge] == neighbor: return self.costs[edge]
+        return None
+
+    # Returns the straight line distance between two nodes
+    def distance(self, node: int, other: int) -> float:
+        return math.hypot(self.xs[node] - self.xs[other], self.ys[node] - self.ys[other])
+
+    # True if the cost of every edge is at least the straight line distance between its nodes
+    # Only then is the straight line distance a lower bound on the cost of every path, so it can be used by the heuristics.
+    # This holds for the json graphs (the costs are the distances), but the costs given in an edge list file can be anything
+    @property
+    def distance_is_admissible(self) -> bool:
+        if self._distance_is_admissible is None:
+            xs, ys, offsets, targets, costs = self.xs, self.ys, self.offsets, self.targets, self.costs
+            self._distance_is_admissible = all(
+                _is_admissible_cost(costs[edge], math.hypot(xs[node] - xs[targets[edge]], ys[node] - ys[targets[edge]]))
+                for node in range(len(self)) for edge in range(offsets[node], offsets[node+1])
+            )
+        return self._distance_is_admissible
+
+    # Returns the graph with all the edges reversed (it is built once when it is first requested)
+    def reverse(self) -> 'CompactGraph':
+        if self._reverse is None:
+            sources = array('i', bytes(4 * self.edge_count))
+            offsets = self.offsets
+            for node in range(len(self)):
+                for edge in range(offsets[node], offsets[node+1]):
+                    sources[edge] = node
+            reverse_offsets, order = _group_edges(len(self), self.targets)
+            self._reverse = CompactGraph(self.names, self.xs, self.ys, reverse_offsets,
+                                         array('i', (sources[edge] for edge in order)),
+                                         array('d', (self.costs[edge] for edge in order)), self._distance_is_admissible)
+            self._reverse._reverse = self
+        return self._reverse
+
+    # Reads a graph (with its start and goal nodes) from a json file or an edge list file
+    @staticmethod
+    def from_file(path: str) -> Tuple['CompactGraph', Optional[str], Optional[str]]:
+        builder = _GraphBuilder()
+        with open(path, 'r') as f:
+            if path.endswith(EDGE_LIST_EXTENSION):
+                start, goal = _read_edge_list(f, builder)
+            else:
+                start, goal = _read_json_graph(f, builder)
+        return builder.build(), start, goal
+
+    # Builds the compact version of the graph of a GraphRoutingProblem
+    # The node ids follow the order of the adjacency dictionary and the edge costs are computed by the problem
+    @staticmethod
+    def from_routing_problem(problem: Problem) -> 'CompactGraph':
+        builder = _GraphBuilder()
+        for node in problem.adjacency:
+            builder.add_node(node.name, node.position.x, node.position.y)
+        for node, adjacent in problem.adjacency.items():
+            for neighbor in adjacent:
+                builder.add_edge(node.name, neighbor.name, problem.get_cost(node, neighbor))
+        return builder.build()
+
+# Returns True if an edge cost is at least the straight line distance between its nodes
+# (with a small tolerance for the rounding of the costs that were computed from the positions)
+def _is_admissible_cost(cost: float, distance: float) -> bool:
+    return cost >= distance * (1 - 1e-9)
+
+# Sorts the edges by their source (using a counting sort) and returns the CSR offsets and the order of the edges
+def _group_edges(node_count: int, sources: array) -> Tuple[array, array]:
+    offsets = array('q', bytes(8 * (node_count + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for node in range(node_count):
+        offsets[node + 1] += offsets[node]
+    order = array('q', bytes(8 * len(sources)))
+    next_slot = array('q', offsets)
+    for edge, source in enumerate(sources):
+        order[next_slot[source]] = edge
+        next_slot[source] += 1
+    return offsets, order
+
+# Collects the nodes and the edges while a file is read, then builds the compact graph
+class _GraphBuilder:
+    def __init__(self) -> None:
+        self.index: Dict[str, int] = {} # The id of every node name (a node gets an id when its name is first seen)
+        self.names: List[str] = []
+        self.xs = array('d')
+        self.ys = array('d')
+        self.defined = bytearray()      # Whether every node was defined (edges to undefined nodes are dropped)
+        self.sources = array('i')
+        self.targets = array('i')
+        self.costs = array('d')         # The given cost of every edge (NaN if it should be computed from the positions)
+
+    def _node(self, name: str) -> int:
+        node = self.index.get(name)
+        if node is None:
+            node = self.index[name] = len(self.names)
+            self.names.append(name)
+            self.xs.append(0)
+            self.ys.append(0)
+            self.defined.append(0)
+        return node
+
+    def add_node(self, name: str, x: float, y: float) -> None:
+        node = self._node(name)
+        self.xs[node], self.ys[node] = x, y
+        self.defined[node] = 1
+
+    def add_edge(self, source: str, target: str, cost: float = math.nan) -> None:
+        self.sources.append(self._node(source))
+        self.targets.append(self._node(target))
+        self.costs.append(cost)
+
+    def build(self) -> CompactGraph:
+        names, xs, ys, sources, targets, costs = self.names, self.xs, self.ys, self.sources, self.targets, self.costs
+        if not all(self.defined):
+            # Remove the nodes that were only seen as edge targets, alongside the edges that refer to them
+            new_ids = array('i', [-1]) * len(names)
+            kept = [node for node in range(len(names)) if self.defined[node]]
+            for new_id, node in enumerate(kept):
+                new_ids[node] = new_id
+            edges = [edge for edge in range(len(sources)) if new_ids[sources[edge]] >= 0 and new_ids[targets[edge]] >= 0]
+            names = [names[node] for node in kept]
+            xs, ys = array('d', (xs[node] for node in kept)), array('d', (ys[node] for node in kept))
+            sources = array('i', (new_ids[sources[edge]] for edge in edges))
+            targets = array('i', (new_ids[targets[edge]] for edge in edges))
+            costs = array('d', (costs[edge] for edge in edges))
+        self.sources = self.targets = self.costs = None # Release the edge lists early since the graph is being built from them
+        offsets, order = _group_edges(len(names), sources)
+        del sources
+        sorted_targets, sorted_costs = array('i', bytes(4 * len(order))), array('d', bytes(8 * len(order)))
+        # The costs are checked against the distances while they are stored (see CompactGraph.distance_is_admissible)
+        distance_is_admissible = True
+        for node in range(len(names)):
+            start, end = offsets[node], offsets[node+1]
+            edges = order[start:end]
+            # The neighbors of every node are sorted by name
+            if end - start > 1: edges = sorted(edges, key=lambda edge: names[targets[edge]])
+            for slot, edge in enumerate(edges, start):
+                target = sorted_targets[slot] = targets[edge]
+                cost, distance = costs[edge], math.hypot(xs[node] - xs[target], ys[node] - ys[target])
+                if math.isnan(cost):
+                    cost = distance
+                elif distance_is_admissible and not _is_admissible_cost(cost, distance):
+                    distance_is_admissible = False
+                sorted_costs[slot] = cost
+        return CompactGraph(names, xs, ys, offsets, sorted_targets, sorted_costs, distance_is_admissible)
+
+# Reads an edge list file and returns the names of the start and goal nodes
+def _read_edge_list(f: TextIO, builder: _GraphBuilder) -> Tuple[Optional[str], Optional[str]]:
+    start = goal = None
+    for line_number, line in enumerate(f, 1):
+        fields = line.split()
+        if not fields or fields[0][0] in "#c": continue
+        kind = fields[0]
+        if kind == 'v' and len(fields) == 4:
+            builder.add_node(fields[1], float(fields[2]), float(fields[3]))
+        elif kind == 'a' and len(fields) in (3, 4):
+            builder.add_edge(fields[1], fields[2], float(fields[3]) if len(fields) == 4 else math.nan)
+        elif kind == 's' and len(fields) == 2:
+            start = fields[1]
+        elif kind == 'g' and len(fields) == 2:
+            goal = fields[1]
+        else:
+            raise ValueError(f"Invalid line {line_number} in the edge list: {line.strip()}")
+    return start, goal
+
+# A regular expression that finds the next non-whitespace character
+_NON_WHITESPACE = re.compile(r"\S")
+
+# Reads a json document piece by piece from a file
+# Only the values that are requested are decoded at once (such as one node of the graph), so the document is never held in memory
+class _JSONStream:
+    def __init__(self, f: TextIO, chunk_size: int = 1 << 20) -> None:
+        self.file = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    # Reads the next chunk of the file into the buffer (and drops the part of the buffer that was already consumed)
+    def _read(self) -> None:
+        chunk = self.file.read(self.chunk_size)
+        if not chunk: self.eof = True
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    # Skips the whitespace and returns the next character (or an empty string at the end of the file)
+    def peek(self) -> str:
+        while True:
+            match = _NON_WHITESPACE.search(self.buffer, self.position)
+            if match is not None:
+                self.position = match.start()
+                return self.buffer[self.position]
+            self.position = len(self.buffer)
+            if self.eof: return ""
+            self._read()
+
+    # Consumes the next character which must be one of the given characters
+    def expect(self, characters: str) -> str:
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f"Invalid json: expected one of '{characters}' but found '{character}'")
+        self.position += 1
+        return character
+
+    # Decodes the next json value
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # A value that ends with the buffer may continue in the next chunk (such as a number)
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof: raise
+            self._read()
+
+# Reads a json graph (in the format of GraphRoutingProblem) and returns the names of the start and goal nodes
+def _read_json_graph(f: TextIO, builder: _GraphBuilder) -> Tuple[Optional[str], Optional[str]]:
+    stream = _JSONStream(f)
+    fields: Dict[str, Any] = {}
+    stream.expect('{')
+    if stream.peek() == '}': return None, None
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == "graph":
+            # The graph is read one node at a time
+            stream.expect('{')
+            if stream.peek() == '}':
+                stream.expect('}')
+            else:
+                while True:
+                    name = stream.value()
+                    stream.expect(':')
+                    item = stream.value()
+                    builder.add_node(name, *item.get("position", [0, 0]))
+                    for adjacent in item.get("adjacent", []):
+                        builder.add_edge(name, adjacent)
+                    if stream.expect(',}') == '}': break
+        else:
+            fields[key] = stream.value()
+        if stream.expect(',}') == '}': break
+    return fields.get("start"), fields.get("goal")
+
+# This is the implementation of the graph routing problem on a compact graph
+# The states and the actions are the node ids (use "format_action" or the names of the graph to get the node names)
+class CompactGraphRoutingProblem(Problem[int, int]):
+    def __init__(self, graph: CompactGraph, start: int, goal: int) -> None:
+        super().__init__()
+        self.graph = graph
+        self.start = start
+        self.goal = goal
+        # The costs of the edges of the last node whose edge cost was requested, keyed by the target node (see get_cost)
+        self._cost_source: Optional[int] = None
+        self._edge_costs: Dict[int, float] = {}
+
+    def get_initial_state(self) -> int:
+        return self.start
+
+    # Unlike GraphRoutingProblem, the goal tests are not recorded since a large graph would fill the memory with the records
+    def is_goal(self, state: int) -> bool:
+        return state == self.goal
+
+    # The actions for this problem are the neighboring nodes we can reach from the current node
+    def get_actions(self, state: int) -> Iterable[int]:
+        graph = self.graph
+        return graph.targets[graph.offsets[state]:graph.offsets[state+1]]
+
+    # The next state and the action are the exact same thing for this problem
+    def get_successor(self, state: int, action: int) -> int:
+        return action
+
+    # The cost of an action is the cost of the edge between the current node and the next node
+    # The searches request the costs of all the actions of a node one after another, so the edge costs of the last node are kept
+    # in a dictionary. It is filled with one pass over the edges of the node, so expanding a node costs O(degree) instead of O(degree^2)
+    def get_cost(self, state: int, action: int) -> float:
+        if state != self._cost_source:
+            graph = self.graph
+            edge_costs = {}
+            for edge in range(graph.offsets[state], graph.offsets[state+1]):
+                # If there are parallel edges, the first one is used (like CompactGraph.edge_cost)
+                edge_costs.setdefault(graph.targets[edge], graph.costs[edge])
+            self._cost_source, self._edge_costs = state, edge_costs
+        cost = self._edge_costs.get(action)
+        if cost is None:
+            raise ValueError(f"There is no edge from {self.graph.names[state]} to {self.graph.names[action]}")
+        return cost
+
+    # The goal node is known in advance, so the problem can be searched backward from it
+    def get_goal_states(self) -> Iterable[int]:
+        return [self.goal]
+
+    # The predecessors of a node are the neighbors of the node in the reversed graph, and the action is the node itself
+    def get_predecessors(self, state: int) -> Iterable[Tuple[int, int]]:
+        return [(predecessor, state) for predecessor in self.graph.reverse().neighbors(state)]
+
+    # Returns the name of the node of an action
+    def format_action(self, action: int) -> str:
+        return self.graph.names[action]
+
+    # Read a compact graph routing problem from a json file or an edge list file
+    @staticmethod
+    def from_file(path: str) -> 'CompactGraphRoutingProblem':
+        graph, start, goal = CompactGraph.from_file(path)
+        return CompactGraphRoutingProblem(graph, graph.node_id(start), graph.node_id(goal))
+
+# The straight line distance heuristic (it is zero if some edge is cheaper than its distance, see CompactGraph.distance_is_admissible)
+def compact_graph_heuristic(problem: CompactGraphRoutingProblem, state: int) -> float:
+    graph = problem.graph
+    return graph.distance(state, problem.goal) if graph.distance_is_admissible else 0
+
+# This is the reverse heuristic used by the backward half of the bidirectional A* search
+def compact_graph_reverse_heuristic(problem: CompactGraphRoutingProblem, state: int, source: int) -> float:
+    graph = problem.graph
+    return graph.distance(source, state) if graph.distance_is_admissible else 0
@@ -0,0 +1,142 @@
+from typing import Callable, Dict, Generic, Optional, Tuple
+import math
+
+from frontier import PriorityFrontier
+from problem import Problem, ReverseHeuristicFunction, S, A
+from search_stats import SearchStats
+
+# This file contains an incremental planner based on D* Lite (Koenig and Likhachev)
+#
+# The regular search agents search from the observed state to the goal, so when the agent leaves its planned path
+# (or the level changes), they have to search again from scratch. D* Lite searches backward from the goal states instead:
+# - g[s] is the cost from s to the goal computed by the last expansion of s
+# - rhs[s] is the one step lookahead of g[s]: the minimum over the actions of s of the action cost plus the g of the successor
+# A state is consistent when g[s] == rhs[s], and only the inconsistent states are kept in the frontier.
+# The search stops as soon as the agent's state is consistent and no state in the frontier can lower its cost,
+# so the g values of the states around the path stay valid between the calls:
+# - when the agent moves (even to a state off the path), the next action is read from the g values of its successors,
+#   and a new search is only needed if the agent reached a state that was never reached by the backward search
+# - when the actions of some states change, only those states are updated, and the search repairs the part of the tree that depends on them
+#
+# The priority of a state is the pair (min(g, rhs) + h(start, s) + key_modifier, min(g, rhs)), where h is a reverse heuristic
+# (a lower bound on the cost from the agent's state to s). Since the agent's state changes, the priorities in the frontier are
+# computed from older states. Instead of computing all of them again, the key modifier is increased by the heuristic between the old
+# and the new state, which keeps the old priorities below the new ones (when the reverse heuristic is consistent).
+# The problem must implement the optional "get_goal_states" and "get_predecessors" hooks (see problem.py).
+
+# The priority of a state in the frontier
+Key = Tuple[float, float]
+
+class DStarLite(Generic[S, A]):
+    def __init__(self, problem: Problem[S, A], start: S, reverse_heuristic: Optional[ReverseHeuristicFunction] = None,
+                 stats: Optional[SearchStats] = None) -> None:
+        goals = problem.get_goal_states()
+        goals = None if goals is None else list(goals)
+        if not goals or problem.get_predecessors(goals[0]) is None:
+            raise ValueError("D* Lite needs a problem that implements get_goal_states and get_predecessors")
+        # The heuristic receives the original problem, and the other calls go through the instrumented problem (if stats are given)
+        self.original_problem = problem
+        self.stats = stats
+        self.goals = set(goals)
+        self.reverse_heuristic = reverse_heuristic or (lambda *_: 0)
+        self.start = start
+        self.key_modifier = 0
+        self.g: Dict[S, float] = {}
+        self.rhs: Dict[S, float] = {}
+        # The number of states expanded (popped from the frontier) by all the searches
+        self.expanded = 0
+        frontier = PriorityFrontier()
+        if stats is not None:
+            problem, _ = stats.instrument(problem)
+            frontier = stats.track_frontier(frontier)
+        self.problem = problem
+        self.frontier = frontier
+        for goal in goals:
+            self.rhs[goal] = 0
+            frontier.push(goal, self._key(goal))
+
+    # Returns a lower bound on the cost from the agent's state to the given state
+    def _heuristic(self, state: S) -> float:
+        return self.reverse_heuristic(self.original_problem, state, self.start)
+
+    def _key(self, state: S) -> Key:
+        cost = min(self.g.get(state, math.inf), self.rhs.get(state, math.inf))
+        return (cost + self._heuristic(state) + self.key_modifier, cost)
+
+    # Returns the cheapest action of a state (the action cost plus the g value of the successor) alongside its cost
+    def _best_action(self, state: S) -> Tuple[float, Optional[A]]:
+        problem, g = self.problem, self.g
+        best_cost, best_action = math.inf, None
+        for action in problem.get_actions(state):
+            cost = problem.get_cost(state, action) + g.get(problem.get_successor(state, action), math.inf)
+            if cost < best_cost:
+                best_cost, best_action = cost, action
+        return best_cost, best_action
+
+    # Adds the state to the frontier if it is inconsistent (or removes it if it became consistent)
+    def _update_frontier(self, state: S) -> None:
+        if self.g.get(state, math.inf) != self.rhs.get(state, math.inf):
+            self.frontier.push(state, self._key(state))
+        else:
+            self.frontier.remove(state)
+
+    # Computes the lookahead of a state again from its actions and updates its place in the frontier
+    def _update_state(self, state: S) -> None:
+        if state not in self.goals:
+            self.rhs[state] = self._best_action(state)[0]
+        self._update_frontier(state)
+
+    # Expands the inconsistent states until the cost of the agent's state is known
+    def _compute(self) -> None:
+        problem, frontier, g, rhs, start = self.problem, self.frontier, self.g, self.rhs, self.start
+        while len(frontier):
+            top_key = frontier.peek_priority()
+            if top_key >= self._key(start) and g.get(start, math.inf) == rhs.get(start, math.inf):
+                break
+            state = frontier.pop()
+            self.expanded += 1
+            new_key = self._key(state)
+            if top_key < new_key:
+                # The priority was computed for an older agent's state, so the state is pushed again with its current priority
+                frontier.push(state, new_key)
+            elif g.get(state, math.inf) > rhs[state]:
+                # The cost of the state decreased, so it may decrease the lookahead of its predecessors
+                cost = g[state] = rhs[state]
+                for parent, action in problem.get_predecessors(state):
+                    if parent in self.goals: continue
+                    parent_cost = problem.get_cost(parent, action) + cost
+                    if parent_cost < rhs.get(parent, math.inf):
+                        rhs[parent] = parent_cost
+                        self._update_frontier(parent)
+            else:
+                # The cost of the state increased, so the lookahead of the state and of its predecessors that depended on it is computed again
+                old_cost = g.get(state, math.inf)
+                g[state] = math.inf
+                self._update_state(state)
+                for parent, action in problem.get_predecessors(state):
+                    if parent not in self.goals and rhs.get(parent, math.inf) == problem.get_cost(parent, action) + old_cost:
+                        self._update_state(parent)
+        if self.stats is not None: self.stats.update_peaks(explored_size=len(g))
+
+    # Returns the action of an optimal path from the given state to the goal (or None if the goal cannot be reached)
+    def next_action(self, state: S) -> Optional[A]:
+        if state != self.start:
+            # The old priorities are kept as lower bounds of the new ones (see the comment at the top of the file)
+            self.key_modifier += self.reverse_heuristic(self.original_problem, state, self.start)
+            self.start = state
+        self._compute()
+        if state in self.goals or self.g.get(state, math.inf) == math.inf:
+            return None
+        return self._best_action(state)[1]
+
+    # Tells the planner that the actions (or the action costs) of the states selected by the function changed
+    # Only the states reached by the previous searches are checked, since the others will be generated from the current problem
+    # The predecessors of every changed state are updated as well, since the actions into a changed state may have changed too:
+    # for example, a cell that is opened again is a new predecessor of its neighbors, and it may have never been reached before
+    def update_states(self, is_changed: Callable[[S], bool]) -> None:
+        updated = set()
+        for state in [state for state in self.rhs if is_changed(state)]:
+            for changed in [state] + [parent for parent, _ in self.problem.get_predecessors(state)]:
+                if changed in updated: continue
+                updated.add(changed)
+                self._update_state(changed)
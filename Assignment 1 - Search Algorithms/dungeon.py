@@ -1,8 +1,8 @@
 from dataclasses import dataclass
-from typing import FrozenSet, Iterable
+from typing import Dict, FrozenSet, Iterable, List, Tuple
 from enum import Enum
 
-from mathutils import Direction, Point
+from mathutils import Direction, GridTopology, Point
 from problem import Problem
 from helpers.utils import track_call_count
 
@@ -24,9 +24,8 @@ class DungeonTile(str, Enum):
 # we only need the default equality which compares objects by pointers.
 # The layout contains the problem details that are unchangeable across states such as:
 #   The walkable area (locations without walls) and the exit location
-@dataclass(eq=False, frozen=True)
+@dataclass(eq=False, frozen=True, slots=True)
 class DungeonLayout:
-    __slots__ = ("width", "height", "walkable", "exit")
     width: int
     height: int
     walkable: FrozenSet[Point]
@@ -37,9 +36,8 @@ class DungeonLayout:
 # Now it can be added to sets and used as keys in dictionaries
 # This will contain a reference to the dungeon layout and it will contain environment details that change across states such as:
 #   The player location and the locations of the remaining coins 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DungeonState:
-    __slots__ = ("layout", "player", "remaining_coins")
     layout: DungeonLayout
     player: Point
     remaining_coins: FrozenSet[Point]
@@ -68,8 +66,9 @@ AllDungeonActions = [
 
 # This is the implementation of the dungeon problem
 class DungeonProblem(Problem[DungeonState, Direction]):
-    # The problem will contain the dungeon layout and the inital state
+    # The problem will contain the dungeon layout, its topology (the numbered walkable cells) and the inital state
     layout: DungeonLayout
+    topology: GridTopology
     initial_state: DungeonState
 
     def get_initial_state(self) -> DungeonState:
@@ -81,20 +80,19 @@ class DungeonProblem(Problem[DungeonState, Direction]):
         return len(state.remaining_coins) == 0 and state.player == self.layout.exit
 
     def get_actions(self, state: DungeonState) -> Iterable[Direction]:
-        actions = []
-        for direction in Direction:
-            position = state.player + direction.to_vector()
-            # Disallow walking into walls
-            if position not in self.layout.walkable: continue
-            actions.append(direction)
-        return actions
+        topology = self.topology
+        cell = topology.cell_index[state.player]
+        # Disallow walking into walls
+        return [direction for direction, neighbors in zip(Direction, topology.neighbors) if neighbors[cell] >= 0]
 
     def get_successor(self, state: DungeonState, action: Direction) -> DungeonState:
-        player = state.player + action.to_vector()
-        remaining_coins = state.remaining_coins
-        if player not in self.layout.walkable:
+        topology = self.topology
+        neighbor = topology.neighbors[action][topology.cell_index[state.player]]
+        if neighbor < 0:
             # If we try to walk into a wall, the state does not change
             return state
+        player = topology.cells[neighbor]
+        remaining_coins = state.remaining_coins
         if player in remaining_coins:
             # If we walk over a coin, we take it
             remaining_coins -= {player}
@@ -104,6 +102,40 @@ class DungeonProblem(Problem[DungeonState, Direction]):
         # All actions have the same cost
         return 1
 
+    # The goal is known in advance (the player is on the exit and all the coins are collected), so the problem can be searched backward
+    def get_goal_states(self) -> Iterable[DungeonState]:
+        return [DungeonState(self.layout, self.layout.exit, frozenset())]
+
+    # The predecessors of a state are the neighboring cells from which the player walked into the player's cell
+    # If there is a coin in the player's cell, it was either collected by the last move or before it,
+    # so the predecessors are generated both with and without the coin
+    def get_predecessors(self, state: DungeonState) -> Iterable[Tuple[DungeonState, Direction]]:
+        topology, player, remaining_coins = self.topology, state.player, state.remaining_coins
+        # The player cannot stand on a coin that was not collected
+        if player in remaining_coins: return []
+        previous_coins = [remaining_coins]
+        if player in self.initial_state.remaining_coins:
+            previous_coins.append(remaining_coins | {player})
+        cell, predecessors = topology.cell_index[player], []
+        for direction, neighbors in zip(Direction, topology.neighbors):
+            previous = topology.neighbors[direction.rotate(2)][cell]
+            if previous < 0 or neighbors[previous] != cell: continue
+            previous_player = topology.cells[previous]
+            for coins in previous_coins:
+                if previous_player not in coins:
+                    predecessors.append((DungeonState(state.layout, previous_player, coins), direction))
+        return predecessors
+
+    # Blocks a walkable cell of the layout (or opens it again), for example to model a door that closes while the agent plays
+    # Only the cells that are walkable in the layout can be blocked, so the layout (and the heuristics computed from it)
+    # never underestimate the walls: blocking a cell can only make the paths longer
+    # It returns the cells whose moves changed (the cell and its walkable neighbors)
+    def set_blocked(self, cell: Point, blocked: bool = True) -> List[Point]:
+        topology = self.topology
+        if cell not in topology:
+            raise ValueError(f"The cell {cell} is not walkable in the dungeon layout")
+        return [topology.cells[changed] for changed in topology.set_blocked(topology.cell_index[cell], blocked)]
+
     # Read a dungeon problem from text containing a grid of tiles
     @staticmethod
     def from_text(text: str) -> 'DungeonProblem':
@@ -124,6 +156,7 @@ class DungeonProblem(Problem[DungeonState, Direction]):
                         exit = Point(x, y)
         problem = DungeonProblem()
         problem.layout = DungeonLayout(width, height, frozenset(walkable), exit)
+        problem.topology = GridTopology(walkable)
         problem.initial_state = DungeonState(problem.layout, player, frozenset(coins))
         return problem
 
@@ -131,4 +164,109 @@ class DungeonProblem(Problem[DungeonState, Direction]):
     @staticmethod
     def from_file(path: str) -> 'DungeonProblem':
         with open(path, 'r') as f:
-            return DungeonProblem.from_text(f.read())
\ No newline at end of file
+            return DungeonProblem.from_text(f.read())
+
+    # Returns a version of this problem where the states are packed into integers (see PackedDungeonProblem)
+    # It is created once and stored in the problem cache
+    def packed(self) -> 'PackedDungeonProblem':
+        cache = self.cache()
+        packed = cache.get("packed")
+        if packed is None:
+            packed = cache["packed"] = PackedDungeonProblem(self)
+        return packed
+
+# This is an opt-in version of the dungeon problem where every state is packed into a single integer:
+#   The lowest bits hold the index of the player's cell (the walkable cells are numbered row by row)
+#   The remaining bits hold a mask of the remaining coins (bit 'i' is set if the coin 'i' was not collected yet)
+# Integers are hashed and compared much faster than DungeonState and take much less memory in the explored set
+# The actions are the same directions, and they are returned in the same order as DungeonProblem
+# Use "pack" and "unpack" to convert between the packed states and the DungeonState objects (for display and tests)
+class PackedDungeonProblem(Problem[int, Direction]):
+    def __init__(self, problem: DungeonProblem) -> None:
+        super().__init__()
+        self.problem = problem
+        self.layout = layout = problem.layout
+        # The walkable cells are numbered row by row by the problem topology
+        topology = problem.topology
+        self.cells: List[Point] = topology.cells
+        self.cell_index: Dict[Point, int] = topology.cell_index
+        self.cell_bits = max(1, (len(self.cells) - 1).bit_length())
+        self.cell_mask = (1 << self.cell_bits) - 1
+        # For each direction, the index of the neighboring cell in that direction (or -1 if it is a wall)
+        self.neighbors: List[List[int]] = topology.neighbors
+        # Number the coins of the initial state, and store the bit of the coin (if any) in every cell
+        self.coins: List[Point] = sorted(problem.initial_state.remaining_coins, key=lambda point: (point.y, point.x))
+        self.coin_bits: List[int] = [0] * len(self.cells)
+        for bit, coin in enumerate(self.coins):
+            self.coin_bits[self.cell_index[coin]] = 1 << bit
+        self.exit_cell = self.cell_index[layout.exit]
+
+    # Packs a dungeon state into an integer
+    def pack(self, state: DungeonState) -> int:
+        coins_mask = 0
+        for bit, coin in enumerate(self.coins):
+            if coin in state.remaining_coins: coins_mask |= 1 << bit
+        return (coins_mask << self.cell_bits) | self.cell_index[state.player]
+
+    # Unpacks an integer into a dungeon state
+    def unpack(self, state: int) -> DungeonState:
+        coins_mask = state >> self.cell_bits
+        remaining_coins = frozenset(coin for bit, coin in enumerate(self.coins) if coins_mask & (1 << bit))
+        return DungeonState(self.layout, self.cells[state & self.cell_mask], remaining_coins)
+
+    def get_initial_state(self) -> int:
+        return self.pack(self.problem.initial_state)
+
+    # We use @track_call_count to track the number of times this function was called to count the number of explored nodes
+    @track_call_count
+    def is_goal(self, state: int) -> bool:
+        # The goal is the exit cell with an empty coin mask
+        return state == self.exit_cell
+
+    def get_actions(self, state: int) -> Iterable[Direction]:
+        cell = state & self.cell_mask
+        return [direction for direction, neighbors in zip(Direction, self.neighbors) if neighbors[cell] >= 0]
+
+    def get_successor(self, state: int, action: Direction) -> int:
+        neighbor = self.neighbors[action][state & self.cell_mask]
+        if neighbor < 0:
+            # If we try to walk into a wall, the state does not change
+            return state
+        # If we walk over a coin, we take it
+        coins_mask = (state >> self.cell_bits) & ~self.coin_bits[neighbor]
+        return (coins_mask << self.cell_bits) | neighbor
+
+    def get_cost(self, state: int, action: Direction) -> float:
+        # All actions have the same cost
+        return 1
+
+    def get_goal_states(self) -> Iterable[int]:
+        return [self.exit_cell]
+
+    # The same as DungeonProblem.get_predecessors but on the packed states
+    def get_predecessors(self, state: int) -> Iterable[Tuple[int, Direction]]:
+        cell_bits, coin_bits = self.cell_bits, self.coin_bits
+        cell, coins_mask = state & self.cell_mask, state >> cell_bits
+        coin_bit = coin_bits[cell]
+        if coins_mask & coin_bit: return []
+        previous_masks = [coins_mask, coins_mask | coin_bit] if coin_bit else [coins_mask]
+        predecessors = []
+        for direction, neighbors in zip(Direction, self.neighbors):
+            previous = self.neighbors[direction.rotate(2)][cell]
+            if previous < 0 or neighbors[previous] != cell: continue
+            for mask in previous_masks:
+                if not mask & coin_bits[previous]:
+                    predecessors.append(((mask << cell_bits) | previous, direction))
+        return predecessors
+
+# Wraps a heuristic written for DungeonState so that it can be used with the packed dungeon problem
+def packed_heuristic(heuristic):
+    def packed(problem: PackedDungeonProblem, state: int) -> float:
+        return heuristic(problem.problem, problem.unpack(state))
+    return packed
+
+# Wraps a reverse heuristic written for DungeonState so that it can be used with the packed dungeon problem
+def packed_reverse_heuristic(reverse_heuristic):
+    def packed(problem: PackedDungeonProblem, state: int, source: int) -> float:
+        return reverse_heuristic(problem.problem, problem.unpack(state), problem.unpack(source))
+    return packed
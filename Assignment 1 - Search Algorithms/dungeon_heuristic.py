@@ -8,18 +8,17 @@ def weak_heuristic(problem: DungeonProblem, state: DungeonState):
     return euclidean_distance(state.player, problem.layout.exit)
 
 #TODO: Import any modules and write any functions you want to use
-import math
+from tour_heuristic import tour_cost_bound, tour_heuristic
     
 
 def strong_heuristic(problem: DungeonProblem, state: DungeonState) -> float:
-    # Go to the exit, if there are no more coins are remaining
-    if not state.remaining_coins:
-        return manhattan_distance(state.player, problem.layout.exit)
-    
-    # Initialize the minimum distance to infinity
-    min_distance = math.inf
-    
-    for coin in state.remaining_coins:
-        # Go to the coin, if the coin is close to the exit
-        min_distance = min(min_distance, manhattan_distance(coin, problem.layout.exit) + manhattan_distance(coin, state.player))
-    return min_distance
\ No newline at end of file
+    # The tour heuristic estimates the cost of collecting all the remaining coins then reaching the exit
+    # using the maze distances (see tour_heuristic.py)
+    return tour_heuristic(problem, state)
+
+# This is the reverse heuristic used by the backward searches (a lower bound on the cost of reaching the state from the source state)
+# The player walks from the source to the state and collects the coins that the source has but the state does not have on the way,
+# so the cost is at least the tour bound from the state through these coins to the source (the maze distances are symmetric).
+# The maze distances are computed from the layout, so they stay lower bounds if some cells are blocked later (see DungeonProblem.set_blocked)
+def reverse_heuristic(problem: DungeonProblem, state: DungeonState, source: DungeonState) -> float:
+    return tour_cost_bound(problem, state.player, source.remaining_coins - state.remaining_coins, source.player)
@@ -0,0 +1,117 @@
+from typing import Deque, Dict, Generic, Iterable, Iterator, List, Optional, Set
+from collections import deque
+import heapq, itertools
+
+from problem import S
+
+# This file contains the frontier data structures used by the search algorithms
+
+# A marker which replaces the state of a heap entry that is no longer valid (lazy deletion)
+_REMOVED = object()
+
+# PriorityFrontier is a priority queue of states implemented as an indexed binary heap
+# Every state has a priority and the state with the lowest priority is popped first
+# Ties are broken in a first in first out manner: the state that was pushed (or updated) first is popped first
+# Updating the priority of a state that is already in the frontier is done by lazy deletion:
+#   the old heap entry is marked as removed and a new entry is pushed, so push and pop cost O(log n)
+class PriorityFrontier(Generic[S]):
+    def __init__(self) -> None:
+        # The heap holds entries in the form [priority, insertion order, state]
+        self._heap: List[list] = []
+        # A dictionary (hash table) from each state in the frontier to its valid heap entry
+        self._entries: Dict[S, list] = {}
+        # A counter which gives every pushed entry a unique insertion order to break ties
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, state: S) -> bool:
+        return state in self._entries
+
+    def __iter__(self) -> Iterator[S]:
+        return iter(self._entries)
+
+    # Returns the priority of the given state (or the default if the state is not in the frontier)
+    def priority(self, state: S, default: Optional[float] = None) -> Optional[float]:
+        entry = self._entries.get(state)
+        return default if entry is None else entry[0]
+
+    # Adds the state to the frontier, or updates its priority if it is already in the frontier
+    # An updated state is ordered as if it was pushed now
+    def push(self, state: S, priority: float) -> None:
+        old_entry = self._entries.get(state)
+        if old_entry is not None:
+            old_entry[-1] = _REMOVED
+        entry = [priority, next(self._counter), state]
+        self._entries[state] = entry
+        heapq.heappush(self._heap, entry)
+
+    # Removes the state from the frontier (if it exists)
+    def remove(self, state: S) -> None:
+        entry = self._entries.pop(state, None)
+        if entry is not None:
+            entry[-1] = _REMOVED
+
+    # Removes and returns the state with the lowest priority
+    def pop(self) -> S:
+        state, _ = self.pop_with_priority()
+        return state
+
+    # Removes and returns the state with the lowest priority alongside its priority
+    def pop_with_priority(self):
+        heap = self._heap
+        while heap:
+            priority, _, state = heapq.heappop(heap)
+            if state is not _REMOVED:
+                del self._entries[state]
+                return state, priority
+        raise IndexError("pop from an empty frontier")
+
+    # Returns the lowest priority in the frontier without removing its state
+    def peek_priority(self) -> float:
+        heap = self._heap
+        # Discard the removed entries at the top of the heap
+        while heap and heap[0][-1] is _REMOVED:
+            heapq.heappop(heap)
+        if not heap:
+            raise IndexError("peek from an empty frontier")
+        return heap[0][0]
+
+# QueueFrontier is a first in first out queue of states which also keeps a set of its states
+# so that checking whether a state is in the frontier costs O(1) instead of scanning the whole queue
+# Every state is stored at most once; pushing a state that is already in the frontier does nothing
+class QueueFrontier(Generic[S]):
+    def __init__(self, states: Iterable[S] = ()) -> None:
+        self._queue: Deque[S] = deque()
+        self._states: Set[S] = set()
+        for state in states:
+            self.push(state)
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def __contains__(self, state: S) -> bool:
+        return state in self._states
+
+    def __iter__(self) -> Iterator[S]:
+        return iter(self._queue)
+
+    def push(self, state: S) -> None:
+        if state in self._states: return
+        self._states.add(state)
+        self._queue.append(state)
+
+    # Removes and returns the state that was pushed first
+    def pop(self) -> S:
+        state = self._queue.popleft()
+        self._states.remove(state)
+        return state
+
+# StackFrontier is the last in first out version of QueueFrontier
+class StackFrontier(QueueFrontier[S]):
+    # Removes and returns the state that was pushed last
+    def pop(self) -> S:
+        state = self._queue.pop()
+        self._states.remove(state)
+        return state
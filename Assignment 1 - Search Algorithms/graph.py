@@ -1,4 +1,4 @@
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Tuple
 from dataclasses import dataclass
 import json
 
@@ -46,6 +46,23 @@ class GraphRoutingProblem(Problem[GraphNode, GraphNode]):
     # The cost of an action is the distance between the current node and the next node 
     def get_cost(self, state: GraphNode, action: GraphNode) -> float:
         return euclidean_distance(state.position, action.position)
+
+    # The goal node is known in advance, so the problem can be searched backward from it
+    def get_goal_states(self) -> Iterable[GraphNode]:
+        return [self.goal]
+
+    # The predecessors of a node are the nodes that have it as a neighbor, and the action is the node itself
+    def get_predecessors(self, state: GraphNode) -> Iterable[Tuple[GraphNode, GraphNode]]:
+        cache = self.cache()
+        predecessors = cache.get("predecessors")
+        if predecessors is None:
+            # The reverse adjacency is built once when it is first requested
+            predecessors = {}
+            for node, adjacent in self.adjacency.items():
+                for neighbor in adjacent:
+                    predecessors.setdefault(neighbor, []).append((node, neighbor))
+            cache["predecessors"] = predecessors
+        return predecessors.get(state, [])
     
     # Read a graph routing problem from file
     @staticmethod
@@ -63,4 +80,8 @@ class GraphRoutingProblem(Problem[GraphNode, GraphNode]):
         return GraphRoutingProblem(start, goal, adjacency)
 
 def graphrouting_heuristic(problem: GraphRoutingProblem, state: GraphNode) -> float:
-    return euclidean_distance(state.position, problem.goal.position)
\ No newline at end of file
+    return euclidean_distance(state.position, problem.goal.position)
+
+# This is the reverse heuristic used by the backward half of the bidirectional A* search
+def graphrouting_reverse_heuristic(problem: GraphRoutingProblem, state: GraphNode, source: GraphNode) -> float:
+    return euclidean_distance(source.position, state.position)
\ No newline at end of file
@@ -0,0 +1,200 @@
+from array import array
+from typing import List, Optional, Tuple, Union
+import heapq, math, mmap, os
+
+from compact_graph import CompactGraph, CompactGraphRoutingProblem
+from graph import GraphNode, GraphRoutingProblem
+from helpers.utils import atomic_write, hashed_disk_cache_path
+
+# This file contains the ALT (A*, Landmarks and Triangle inequality) heuristic for the graph routing problems
+#
+# A few nodes are picked as landmarks, and the exact distances from every landmark to every node and from every node
+# to every landmark are computed (by Dijkstra's algorithm on the graph and on the reversed graph).
+# For a landmark L, the triangle inequality gives two lower bounds on the distance from a node s to the goal t:
+#   d(s, t) >= d(L, t) - d(L, s)        and        d(s, t) >= d(s, L) - d(t, L)
+# The ALT heuristic is the maximum of these bounds over all the landmarks and the euclidean distance,
+# so it dominates the euclidean heuristic. Each bound is consistent, so their maximum is consistent as well.
+# The euclidean distance is only a bound if no edge is cheaper than the distance between its nodes, so it is left out of the maximum
+# for the graphs that break this (see CompactGraph.distance_is_admissible). The landmark bounds hold for any non-negative costs.
+# It is much stronger on graphs where the roads detour, since the bounds follow the roads instead of straight lines.
+#
+# The landmarks are picked by the farthest selection: every new landmark is the node that is farthest from the landmarks picked so far.
+# The tables only depend on the graph (not on the start and the goal), so they are written to a file on disk
+# (keyed by a hash of the graph) and the later queries on the same graph map the file into memory instead of computing them again.
+
+# The default number of landmarks
+DEFAULT_LANDMARK_COUNT = 8
+
+# The first bytes of every landmark file, they are used to detect files that were not written by this module
+_FILE_MAGIC = b"GRAPHALT"
+
+# The graph routing problems that are supported by the landmarks (the states are graph nodes or node ids)
+RoutingProblem = Union[GraphRoutingProblem, CompactGraphRoutingProblem]
+
+# Returns the shortest distances from the source node to every node of the graph (infinity for the unreachable nodes)
+def shortest_distances(graph: CompactGraph, source: int) -> array:
+    distances = array('d', [math.inf]) * len(graph)
+    distances[source] = 0
+    offsets, targets, costs = graph.offsets, graph.targets, graph.costs
+    frontier = [(0.0, source)]
+    while frontier:
+        distance, node = heapq.heappop(frontier)
+        if distance > distances[node]: continue
+        for edge in range(offsets[node], offsets[node+1]):
+            neighbor, neighbor_distance = targets[edge], distance + costs[edge]
+            if neighbor_distance < distances[neighbor]:
+                distances[neighbor] = neighbor_distance
+                heapq.heappush(frontier, (neighbor_distance, neighbor))
+    return distances
+
+class LandmarkTables:
+    def __init__(self, landmarks: List[int], from_tables: List[memoryview], to_tables: List[memoryview], buffer=None) -> None:
+        # The node ids of the landmarks
+        self.landmarks = landmarks
+        # For each landmark, an array of doubles which holds the distance from the landmark to every node
+        self.from_tables = from_tables
+        # For each landmark, an array of doubles which holds the distance from every node to the landmark
+        self.to_tables = to_tables
+        # The memory-mapped file that holds the tables (if they were loaded from disk), it is kept open while the tables are used
+        self._buffer = buffer
+
+    # Returns a lower bound on the distance from the source node to the target node
+    def lower_bound(self, source: int, target: int) -> float:
+        bound = 0
+        for from_table, to_table in zip(self.from_tables, self.to_tables):
+            # The differences of two infinite distances are NaN, and they are skipped since NaN is never greater than the bound
+            forward = from_table[target] - from_table[source]
+            if forward > bound: bound = forward
+            backward = to_table[source] - to_table[target]
+            if backward > bound: bound = backward
+        return bound
+
+    # Picks the landmarks of a graph and computes their tables
+    @staticmethod
+    def compute(graph: CompactGraph, count: int = DEFAULT_LANDMARK_COUNT) -> 'LandmarkTables':
+        reverse = graph.reverse()
+        landmarks, from_tables, to_tables = [], [], []
+        # The distance from every node to the nearest landmark (in either direction)
+        nearest = array('d', [math.inf]) * len(graph)
+        # The first landmark is the node that is farthest from the first node (among the nodes that it reaches)
+        reached = shortest_distances(graph, 0) if len(graph) else array('d')
+        candidate = max(range(len(graph)), key=lambda node: reached[node] if reached[node] < math.inf else -1, default=None)
+        while candidate is not None and len(landmarks) < count:
+            from_table, to_table = shortest_distances(graph, candidate), shortest_distances(reverse, candidate)
+            landmarks.append(candidate)
+            from_tables.append(memoryview(from_table))
+            to_tables.append(memoryview(to_table))
+            for node in range(len(graph)):
+                nearest[node] = min(nearest[node], from_table[node], to_table[node])
+            # The next landmark is the node that is farthest from all the landmarks
+            # (the nodes that are not connected to any landmark are the farthest, so every component of the graph gets a landmark)
+            candidate = max(range(len(graph)), key=nearest.__getitem__)
+            if nearest[candidate] <= 0: candidate = None
+        return LandmarkTables(landmarks, from_tables, to_tables)
+
+    # Writes the tables to a file
+    def save(self, path: str) -> None:
+        size = len(self.from_tables[0]) if self.from_tables else 0
+        with atomic_write(path) as f:
+            f.write(_FILE_MAGIC)
+            array('Q', [len(self.landmarks), size]).tofile(f)
+            array('Q', self.landmarks).tofile(f)
+            for table in self.from_tables + self.to_tables:
+                f.write(table)
+
+    # Maps the tables of a graph from a file into memory without copying them
+    # (it returns None if the file does not contain valid tables for the graph)
+    @staticmethod
+    def load(path: str, graph: CompactGraph) -> Optional['LandmarkTables']:
+        try:
+            with open(path, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        magic_size = len(_FILE_MAGIC)
+        if len(buffer) < magic_size + 16 or buffer[:magic_size] != _FILE_MAGIC:
+            buffer.close()
+            return None
+        count, size = memoryview(buffer)[magic_size:magic_size + 16].cast('Q').tolist()
+        header_size = magic_size + 16 + 8 * count
+        if size != len(graph) or len(buffer) != header_size + 2 * 8 * count * size:
+            buffer.close()
+            return None
+        landmarks = memoryview(buffer)[magic_size + 16:header_size].cast('Q').tolist()
+        data = memoryview(buffer)[header_size:].cast('d')
+        tables = [data[index * size:(index + 1) * size] for index in range(2 * count)]
+        return LandmarkTables(landmarks, tables[:count], tables[count:], buffer)
+
+# Returns the compact graph of a routing problem (the compact version of a GraphRoutingProblem is built once and stored in the problem cache)
+def compact_graph_of(problem: RoutingProblem) -> CompactGraph:
+    # The problem may be wrapped (for example, by the search stats), so the compact graph is detected by its attribute instead of the problem type
+    graph = getattr(problem, "graph", None)
+    if isinstance(graph, CompactGraph): return graph
+    cache = problem.cache()
+    graph = cache.get("compact_graph")
+    if graph is None:
+        graph = cache["compact_graph"] = CompactGraph.from_routing_problem(problem)
+    return graph
+
+# Returns the node id of a state of a routing problem
+def node_id(problem: RoutingProblem, state: Union[GraphNode, int]) -> int:
+    if isinstance(state, GraphNode): return compact_graph_of(problem).node_id(state.name)
+    return state
+
+# Returns the data of the graph (the names, the positions and the edges of its nodes)
+# It is the key of the tables in the disk cache
+def graph_data(graph: CompactGraph) -> List[bytes]:
+    return ['\n'.join(graph.names).encode()] + \
+        [data.tobytes() for data in (graph.xs, graph.ys, graph.offsets, graph.targets, graph.costs)]
+
+# Returns the landmark tables of a graph
+# They are computed the first time they are requested (or mapped from the disk cache if they were computed in a previous run),
+# then they are stored in the graph cache, so all the problems on the same graph share them
+def get_graph_landmarks(graph: CompactGraph, count: int = DEFAULT_LANDMARK_COUNT, use_disk_cache: bool = True) -> LandmarkTables:
+    cache = graph.cache()
+    key = ("landmarks", count)
+    tables = cache.get(key)
+    if tables is None:
+        path = hashed_disk_cache_path("graph", f"_{count}.alt", *graph_data(graph)) if use_disk_cache else None
+        if path is not None and os.path.exists(path):
+            tables = LandmarkTables.load(path, graph)
+        if tables is None:
+            tables = LandmarkTables.compute(graph, count)
+            if path is not None: tables.save(path)
+        cache[key] = tables
+    return tables
+
+# Returns the landmark tables of the problem graph
+def get_landmarks(problem: RoutingProblem, count: int = DEFAULT_LANDMARK_COUNT, use_disk_cache: bool = True) -> LandmarkTables:
+    return get_graph_landmarks(compact_graph_of(problem), count, use_disk_cache)
+
+# Returns the goal node id and the distances between the goal and the landmarks alongside the tables
+# (they are computed once per problem since the goal is fixed)
+def _goal_bounds(problem: RoutingProblem) -> Tuple[int, List[Tuple[float, float, memoryview, memoryview]]]:
+    cache = problem.cache()
+    bounds = cache.get("landmark_goal_bounds")
+    if bounds is None:
+        tables, goal = get_landmarks(problem), node_id(problem, problem.goal)
+        bounds = cache["landmark_goal_bounds"] = goal, [
+            (from_table[goal], to_table[goal], from_table, to_table) for from_table, to_table in zip(tables.from_tables, tables.to_tables)
+        ]
+    return bounds
+
+def alt_heuristic(problem: RoutingProblem, state: Union[GraphNode, int]) -> float:
+    node = node_id(problem, state)
+    goal, bounds = _goal_bounds(problem)
+    # The straight line distance is only added to the landmark bounds when it is a lower bound too (see CompactGraph.distance_is_admissible)
+    graph = compact_graph_of(problem)
+    bound = graph.distance(node, goal) if graph.distance_is_admissible else 0
+    for goal_from, goal_to, from_table, to_table in bounds:
+        forward = goal_from - from_table[node]
+        if forward > bound: bound = forward
+        backward = to_table[node] - goal_to
+        if backward > bound: bound = backward
+    return bound
+
+# This is the reverse heuristic used by the backward half of the bidirectional A* search (a lower bound on the distance from the source to the state)
+def alt_reverse_heuristic(problem: RoutingProblem, state: Union[GraphNode, int], source: Union[GraphNode, int]) -> float:
+    source, node = node_id(problem, source), node_id(problem, state)
+    graph, bound = compact_graph_of(problem), get_landmarks(problem).lower_bound(source, node)
+    return max(graph.distance(source, node), bound) if graph.distance_is_admissible else bound
@@ -0,0 +1,157 @@
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from agents import GoalBasedAgent
+from dungeon import DungeonProblem, DungeonState
+from mathutils import Direction, Point
+from problem import HeuristicFunction, Problem
+
+# This file contains a jump point search (JPS) for the dungeon problem, whose moves on the 4-connected grid all cost 1
+#
+# Many shortest paths on a grid are symmetric (they contain the same moves in different orders)
+# Jump point search only follows the canonical one: the path that moves vertically whenever possible
+# Thus, instead of stepping one cell at a time, the search jumps in a straight line until it reaches a cell
+# where the canonical path may turn (a jump point), and only the jump points are added to the frontier
+#
+# The pruning rules for a cell reached by moving in a direction 'd' are:
+# - If 'd' is vertical, the path can continue in 'd' or turn left or right.
+# - If 'd' is horizontal, the path can only continue in 'd', unless a vertical neighbor is forced:
+#   it is walkable but the cell behind it is a wall, so the vertical-first path could not have reached it.
+
+# An action is a direction and the number of steps to jump in that direction
+Jump = Tuple[Direction, int]
+
+_HorizontalDirections = (Direction.RIGHT, Direction.LEFT)
+_VerticalDirections = (Direction.UP, Direction.DOWN)
+
+# Converts a list of jumps into the list of the single steps that they contain
+def expand_jumps(jumps: List[Jump]) -> List[Direction]:
+    return [direction for direction, steps in jumps for _ in range(steps)]
+
+# The state of the jump point dungeon problem is a dungeon state and the direction in which the player reached its cell
+# (None for the initial state and after a coin is collected, since the path may continue in any direction from there)
+JumpDungeonState = Tuple[DungeonState, Optional[Direction]]
+
+# This problem applies the jump point search to the dungeon problem
+# The coins are jump points (a jump stops at the first coin on its way, so it collects at most one coin),
+# and so is the exit once all the coins are collected. Collecting a coin earlier never makes a path longer,
+# so the path cost of an optimal solution equals the length of the shortest solution of the dungeon problem
+# The cells are read from the topology of the dungeon problem, so the blocked cells are treated as walls
+class JumpPointDungeonProblem(Problem[JumpDungeonState, Jump]):
+    def __init__(self, problem: DungeonProblem) -> None:
+        super().__init__()
+        self.problem = problem
+        # The cells at which the jumps stop for each set of remaining coins
+        self.stops: Dict[FrozenSet[Point], FrozenSet[int]] = {}
+
+    def get_initial_state(self) -> JumpDungeonState:
+        return (self.problem.get_initial_state(), None)
+
+    # The goal test of the dungeon problem is used, so the expanded jump points are counted by its call counter
+    def is_goal(self, state: JumpDungeonState) -> bool:
+        return self.problem.is_goal(state[0])
+
+    def get_actions(self, state: JumpDungeonState) -> Iterable[Jump]:
+        dungeon_state, direction = state
+        cell = self.problem.topology.cell_index[dungeon_state.player]
+        stops = self._get_stops(dungeon_state.remaining_coins)
+        if direction is None:
+            directions = list(Direction)
+        elif direction in _VerticalDirections:
+            directions = [direction, *_HorizontalDirections]
+        else:
+            directions = [direction] + [vertical for vertical in _VerticalDirections if self._is_forced(cell, direction, vertical)]
+        actions = []
+        for direction in directions:
+            steps = self._jump(cell, direction, stops)
+            if steps: actions.append((direction, steps))
+        return actions
+
+    def get_successor(self, state: JumpDungeonState, action: Jump) -> JumpDungeonState:
+        dungeon_state, _ = state
+        direction, steps = action
+        topology = self.problem.topology
+        cell = topology.cell_index[dungeon_state.player]
+        for _ in range(steps):
+            cell = topology.neighbors[direction][cell]
+        player = topology.cells[cell]
+        remaining_coins = dungeon_state.remaining_coins
+        if player in remaining_coins:
+            # Only the last cell of a jump can contain a coin
+            return (DungeonState(dungeon_state.layout, player, remaining_coins - {player}), None)
+        return (DungeonState(dungeon_state.layout, player, remaining_coins), direction)
+
+    def get_cost(self, state: JumpDungeonState, action: Jump) -> float:
+        return action[1]
+
+    # Returns the ids of the cells at which the jumps stop: the remaining coins, or the exit if no coins remain
+    def _get_stops(self, remaining_coins: FrozenSet[Point]) -> FrozenSet[int]:
+        stops = self.stops.get(remaining_coins)
+        if stops is None:
+            cell_index = self.problem.topology.cell_index
+            points = remaining_coins or (self.problem.layout.exit,)
+            stops = self.stops[remaining_coins] = frozenset(cell_index[point] for point in points)
+        return stops
+
+    # Checks if the vertical neighbor of a cell reached by moving horizontally is forced
+    def _is_forced(self, cell: int, horizontal: Direction, vertical: Direction) -> bool:
+        neighbors = self.problem.topology.neighbors
+        neighbor = neighbors[vertical][cell]
+        return neighbor >= 0 and neighbors[horizontal.rotate(2)][neighbor] < 0
+
+    # Returns the number of steps from the given cell to the next jump point in the given direction (or 0 if there is none)
+    def _jump(self, cell: int, direction: Direction, stops: FrozenSet[int]) -> int:
+        step = self.problem.topology.neighbors[direction]
+        steps = 0
+        while True:
+            cell = step[cell]
+            if cell < 0: return 0
+            steps += 1
+            if cell in stops: return steps
+            if direction in _VerticalDirections:
+                if any(self._jump(cell, horizontal, stops) for horizontal in _HorizontalDirections): return steps
+            else:
+                if any(self._is_forced(cell, direction, vertical) for vertical in _VerticalDirections): return steps
+
+# Wraps a heuristic written for DungeonState so that it can be used with the jump point dungeon problem
+def jump_point_dungeon_heuristic(heuristic: HeuristicFunction) -> HeuristicFunction:
+    def jump(problem: JumpPointDungeonProblem, state: JumpDungeonState) -> float:
+        return heuristic(problem.problem, state[0])
+    return jump
+
+# This agent lets a search agent plan on the jump point version of the dungeon problem
+# and plays the planned jumps one step at a time
+# The search agent should use a heuristic wrapped by "jump_point_dungeon_heuristic" (if it uses one)
+class JumpPointAgent(GoalBasedAgent[DungeonState, Direction]):
+    def __init__(self, agent: GoalBasedAgent[JumpDungeonState, Jump]) -> None:
+        super().__init__()
+        self.agent = agent
+        # The jump point problem of the last dungeon problem given to the agent
+        self.jump_problem: Optional[JumpPointDungeonProblem] = None
+        # The policy will store the single step to do for each state along the planned jumps
+        self.policy: Dict[DungeonState, Direction] = {}
+
+    def act(self, problem: DungeonProblem, state: DungeonState) -> Direction:
+        if state not in self.policy:
+            if self.jump_problem is None or self.jump_problem.problem is not problem:
+                self.jump_problem = JumpPointDungeonProblem(problem)
+            jump_problem = self.jump_problem
+            jump_state = (state, None)
+            if self.agent.act(jump_problem, jump_state) is None:
+                self.policy[state] = None
+                return None
+            # Go through the jumps stored by the search agent and store every step of them into the policy
+            # (the goal test is not used here so that it does not count as an explored node)
+            while True:
+                jump = self.agent.policy.get(jump_state)
+                if jump is None: break
+                dungeon_state = jump_state[0]
+                for direction in expand_jumps([jump]):
+                    self.policy[dungeon_state] = direction
+                    dungeon_state = problem.get_successor(dungeon_state, direction)
+                jump_state = jump_problem.get_successor(jump_state, jump)
+        return self.policy.get(state)
+
+    # Both the steps and the jumps may lead into the changed states, so the search agent is told about the changes too
+    def notify_changes(self, is_changed: Callable[[DungeonState], bool]) -> None:
+        self.policy.clear()
+        self.agent.notify_changes(lambda jump_state: is_changed(jump_state[0]))
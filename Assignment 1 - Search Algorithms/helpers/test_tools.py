@@ -3,9 +3,9 @@ from agents import HeuristicFunction
 from graph import GraphRoutingProblem, graphrouting_heuristic
 from dungeon import DungeonProblem, Direction
 from problem import A, S, Problem
-from .utils import Result, fetch_recorded_calls, fetch_tracked_call_count, load_function
+from .utils import Result, fetch_recorded_calls, fetch_tracked_call_count, load_function, start_recording_calls
 from .heuristic_checks import InconsistentHeuristicException, test_heuristic_consistency
-from functools import lru_cache
+from heuristic_cache import CachedHeuristic
 import time
 
 def run_parking_trajectory(
@@ -47,7 +47,7 @@ def check_parking_problem(
 def run_uninformed_search_for_graph_routing(
     function_path: str, 
     problem: GraphRoutingProblem) -> Tuple[List[str], List[str]]:
-    fetch_recorded_calls(GraphRoutingProblem.is_goal)
+    start_recording_calls(GraphRoutingProblem.is_goal)
     search_fn = load_function(function_path)
     initial_state = problem.get_initial_state()
     path = search_fn(problem, initial_state)
@@ -57,7 +57,7 @@ def run_uninformed_search_for_graph_routing(
 def run_informed_search_for_graph_routing(
     function_path: str, 
     problem: GraphRoutingProblem) -> Tuple[List[str], List[str]]:
-    fetch_recorded_calls(GraphRoutingProblem.is_goal)
+    start_recording_calls(GraphRoutingProblem.is_goal)
     search_fn = load_function(function_path)
     initial_state = problem.get_initial_state()
     path = search_fn(problem, initial_state, graphrouting_heuristic)
@@ -119,7 +119,7 @@ def test_dungeon_heuristic(
     function_path: str, 
     problem: DungeonProblem) -> Tuple[float, int, str, float]:
     fetch_tracked_call_count(DungeonProblem.is_goal)
-    heuristic = lru_cache(2**16)(load_function("dungeon_heuristic.strong_heuristic"))
+    heuristic = CachedHeuristic(load_function("dungeon_heuristic.strong_heuristic"))
     original_get_successor = DungeonProblem.get_successor
     DungeonProblem.get_successor = test_heuristic_consistency(heuristic)(DungeonProblem.get_successor)
     search_fn = load_function(function_path)
@@ -1,7 +1,8 @@
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, List, Union
 from dataclasses import dataclass
 from collections import deque
-import importlib, os, sys
+from contextlib import contextmanager
+import hashlib, importlib, os, sys
 from importlib import util as ilu
 import traceback
 
@@ -53,19 +54,28 @@ def fetch_tracked_call_count(fn):
     setattr(fn, "calls", 0)
     return calls
 
+# The calls are only recorded between start_recording_calls and fetch_recorded_calls,
+# so the searches that nobody inspects (such as the route server and the batch solver) do not keep every call in memory
 def record_calls(fn):
     def deco(*args, **kwargs):
-        deco.calls.append({
-            "args": args,
-            "kwargs": kwargs
-        })
+        if deco.recording:
+            deco.calls.append({
+                "args": args,
+                "kwargs": kwargs
+            })
         return fn(*args, **kwargs)
     deco.calls = deque()
+    deco.recording = False
     return deco
 
+def start_recording_calls(fn):
+    setattr(fn, "calls", deque())
+    setattr(fn, "recording", True)
+
 def fetch_recorded_calls(fn):
     calls = getattr(fn, "calls", deque())
     setattr(fn, "calls", deque())
+    setattr(fn, "recording", False)
     return calls
 
 def add_call_listener(listener):
@@ -99,6 +109,37 @@ def with_cache(cls):
     cls.cache = _cache_function
     return cls
 
+# The directory in which precomputed data (such as distance tables) is cached on disk between runs
+# It can be changed by setting the environment variable "SEARCH_CACHE_DIR"
+disk_cache_directory = os.environ.get("SEARCH_CACHE_DIR", ".cache")
+
+# Returns the path of a file with the given name inside the disk cache directory (and creates the directory if needed)
+def disk_cache_path(name: str) -> str:
+    os.makedirs(disk_cache_directory, exist_ok=True)
+    return os.path.join(disk_cache_directory, name)
+
+# Returns the path of a file inside the disk cache directory named "{prefix}_{digest}{extension}"
+# where the digest is the sha1 hash of the given parts (the data from which the cached file is computed)
+def hashed_disk_cache_path(prefix: str, extension: str, *parts: Union[str, bytes]) -> str:
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode() if isinstance(part, str) else part)
+    return disk_cache_path(f"{prefix}_{digest.hexdigest()}{extension}")
+
+# Opens a file for writing (in binary mode) that only replaces the file at the given path once it is completely written
+# The data goes to a temporary file which is renamed to the path when the block ends, so other processes never read a partial file
+# If the block raises an exception, the temporary file is removed and the file at the path is left unchanged
+@contextmanager
+def atomic_write(path: str):
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, 'wb') as f:
+            yield f
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path): os.remove(temporary_path)
+        raise
+
 class bcolors:
     BLACK = '\033[30m'
     RED = '\033[31m'
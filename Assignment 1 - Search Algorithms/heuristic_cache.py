@@ -0,0 +1,190 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from problem import HeuristicFunction, Problem, S
+
+# This file contains a bounded cache for the heuristic values which is stored per problem
+#
+# CachedHeuristic wraps a heuristic function. Each problem gets its own cache, stored in the problem cache (see CacheContainer),
+# so the states of different problems never share entries and a cache is dropped alongside its problem.
+# The states are used as the cache keys by default. This works for both state encodings of the dungeon:
+# DungeonState is a frozen dataclass (so it is hashable) and the packed states are integers.
+# Since the packed problem is a different problem object, the two encodings never mix in the same cache.
+#
+# Every cache has a capacity and an eviction policy:
+# - "lru": the least recently used entry is evicted (exact, but every hit moves the entry to the end of an ordered dictionary)
+# - "clock": an approximation of LRU where every hit only sets a reference bit, and the eviction sweeps a hand over the entries
+#            and evicts the first entry whose bit is not set (clearing the bits it passes)
+# The caches count their hits, misses and evictions so that the capacity can be sized for each level family.
+
+# The default maximum number of entries in each cache
+DEFAULT_CAPACITY = 2**16
+
+# A marker for the missing entries (since None could be a valid value)
+_MISSING = object()
+
+# The base class of the bounded caches which counts the hits, misses and evictions
+class HeuristicCache(ABC):
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        if capacity < 1:
+            raise ValueError(f"The cache capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Returns the value of the key (or the default if the key is not in the cache)
+    @abstractmethod
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        pass
+
+    # Returns the value of the key without counting the lookup or marking the entry as used
+    @abstractmethod
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        pass
+
+    # Adds the key to the cache (evicting another key if the cache is full)
+    @abstractmethod
+    def put(self, key: Hashable, value: Any) -> None:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    # The fraction of the lookups that were found in the cache
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "capacity": self.capacity,
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+# A cache with the least recently used eviction policy
+class LRUHeuristicCache(HeuristicCache):
+    policy = "lru"
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        super().__init__(capacity)
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        return self._entries.get(key, default)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+# A cache with the clock (second chance) eviction policy
+# The entries are stored in a fixed number of slots, and each slot has a reference bit which is set whenever its entry is read
+class ClockHeuristicCache(HeuristicCache):
+    policy = "clock"
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        super().__init__(capacity)
+        self._slots: Dict[Hashable, int] = {}   # The slot of every key in the cache
+        self._keys: List[Hashable] = []         # The key in every slot
+        self._values: List[Any] = []            # The value in every slot
+        self._referenced = bytearray(capacity)  # The reference bit of every slot
+        self._hand = 0                          # The next slot to be checked for eviction
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        slot = self._slots.get(key)
+        if slot is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._referenced[slot] = 1
+        return self._values[slot]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        slot = self._slots.get(key)
+        return default if slot is None else self._values[slot]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._values[slot] = value
+            self._referenced[slot] = 1
+            return
+        if len(self._keys) < self.capacity:
+            # The cache is not full yet, so the entry takes a new slot
+            self._slots[key] = len(self._keys)
+            self._keys.append(key)
+            self._values.append(value)
+            return
+        # Move the hand until it finds a slot which was not referenced since the last sweep
+        referenced, hand = self._referenced, self._hand
+        while referenced[hand]:
+            referenced[hand] = 0
+            hand = (hand + 1) % self.capacity
+        del self._slots[self._keys[hand]]
+        self.evictions += 1
+        self._slots[key] = hand
+        self._keys[hand] = key
+        self._values[hand] = value
+        self._hand = (hand + 1) % self.capacity
+
+# The eviction policies that can be selected by name
+CACHE_POLICIES: Dict[str, Callable[[int], HeuristicCache]] = {
+    "lru": LRUHeuristicCache,
+    "clock": ClockHeuristicCache,
+}
+
+# A heuristic function whose values are cached per problem in a bounded cache
+# - key: a function that returns the cache key of a state (by default, the state itself)
+class CachedHeuristic:
+    def __init__(self, heuristic: HeuristicFunction, capacity: int = DEFAULT_CAPACITY, policy: str = "lru",
+                 key: Optional[Callable[[Problem, S], Hashable]] = None) -> None:
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy '{policy}'")
+        self.heuristic = heuristic
+        self.capacity = capacity
+        self.policy = policy
+        self.key = key
+
+    # Returns the cache of the given problem (it is created on the first call)
+    def cache_of(self, problem: Problem) -> HeuristicCache:
+        caches = problem.cache()
+        cache = caches.get(self)
+        if cache is None:
+            cache = caches[self] = CACHE_POLICIES[self.policy](self.capacity)
+        return cache
+
+    def __call__(self, problem: Problem, state: S) -> float:
+        cache = self.cache_of(problem)
+        key = state if self.key is None else self.key(problem, state)
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.heuristic(problem, state)
+            cache.put(key, value)
+        return value
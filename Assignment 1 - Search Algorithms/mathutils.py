@@ -1,15 +1,14 @@
 from dataclasses import dataclass
 from enum import IntEnum
-from typing import Iterator
+from typing import Dict, Iterable, Iterator, List, Set
 import math
 
 # the class Point will hold a 2D coordinate on a discrete grid
 # We use dataclass with frozen=True to automatically implement:
 #   the constructor, the == operator, the hash function and to make the class immutable
 # Now it can be added to sets and used as keys in dictionaries
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Point:
-    __slots__ = ('x', 'y')
     x: int
     y: int
 
@@ -75,4 +74,58 @@ Direction._Vectors = [
     Point( 0, -1),
     Point(-1,  0),
     Point( 0,  1)
-]
\ No newline at end of file
+]
+
+# GridTopology numbers the walkable cells of a grid world once (row by row)
+# so that the hot loops can work on small integers (cell ids) instead of allocating a new Point for every move
+# - cells[i] is the point of the cell 'i' and cell_index[point] is the id of a walkable point (used for input and output)
+# - neighbors[direction][i] is the id of the neighbor of cell 'i' in the given direction (or -1 if it is a wall)
+class GridTopology:
+    cells: List[Point]
+    cell_index: Dict[Point, int]
+    neighbors: List[List[int]]
+
+    def __init__(self, walkable: Iterable[Point]) -> None:
+        self.cells = sorted(walkable, key=lambda point: (point.y, point.x))
+        self.cell_index = {cell: index for index, cell in enumerate(self.cells)}
+        self.neighbors = [
+            [self.cell_index.get(cell + direction.to_vector(), -1) for cell in self.cells]
+            for direction in Direction
+        ]
+        # The ids of the cells that were blocked after the topology was built (see set_blocked)
+        self.blocked: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __contains__(self, point: Point) -> bool:
+        return point in self.cell_index
+
+    # Returns the id of a walkable point
+    def cell(self, point: Point) -> int:
+        return self.cell_index[point]
+
+    # Returns the point of a cell id
+    def point(self, cell: int) -> Point:
+        return self.cells[cell]
+
+    # Returns the id of the neighbor of a cell in the given direction (or -1 if it is a wall)
+    def neighbor(self, cell: int, direction: Direction) -> int:
+        return self.neighbors[direction][cell]
+
+    # Blocks a cell (or opens it again): a blocked cell keeps its id, but it is disconnected from all its neighbors
+    # It returns the ids of the cells whose neighbors changed (the cell and its walkable neighbors)
+    def set_blocked(self, cell: int, blocked: bool) -> List[int]:
+        if blocked:
+            self.blocked.add(cell)
+        else:
+            self.blocked.discard(cell)
+        point, changed = self.cells[cell], [cell]
+        for direction in Direction:
+            neighbor = self.cell_index.get(point + direction.to_vector(), -1)
+            if neighbor < 0: continue
+            connected = cell not in self.blocked and neighbor not in self.blocked
+            self.neighbors[direction][cell] = neighbor if connected else -1
+            self.neighbors[direction.rotate(2)][neighbor] = cell if connected else -1
+            changed.append(neighbor)
+        return changed
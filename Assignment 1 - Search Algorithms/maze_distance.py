@@ -0,0 +1,110 @@
+from array import array
+from collections import deque
+from typing import Dict, List, Optional
+import os
+
+from dungeon import DungeonLayout, DungeonProblem
+from mathutils import Direction, Point
+from helpers.utils import atomic_write, hashed_disk_cache_path
+
+# This file contains a table of the shortest path distances between every pair of walkable cells in a dungeon layout
+# Unlike the manhattan distance, the maze distance takes the walls into account
+# The table is computed once per layout (by running a breadth first search from every cell),
+# then it is stored in the problem cache and in a file on disk so that later runs on the same layout can load it
+
+# The value stored in the table for pairs of cells that are not connected
+UNREACHABLE = 0xFFFF
+
+# The first bytes of every table file, they are used to detect files that were not written by this module
+_FILE_MAGIC = b"MAZE1\0"
+
+class MazeDistances:
+    def __init__(self, cells: List[Point], table: array) -> None:
+        # The walkable cells (numbered row by row) and the index of each of them
+        self.cells = cells
+        self.cell_index: Dict[Point, int] = {cell: index for index, cell in enumerate(cells)}
+        # A flat matrix of unsigned 16-bit integers where the distance from cell 'i' to cell 'j' is at [i * len(cells) + j]
+        self.table = table
+
+    # Returns the maze distance between two walkable cells (infinity if they are not connected)
+    def distance(self, p1: Point, p2: Point) -> float:
+        index = self.cell_index
+        distance = self.table[index[p1] * len(self.cells) + index[p2]]
+        return float('inf') if distance == UNREACHABLE else distance
+
+    # Computes the table for a layout by running a breadth first search from every walkable cell
+    @staticmethod
+    def compute(layout: DungeonLayout) -> 'MazeDistances':
+        cells = _layout_cells(layout)
+        size = len(cells)
+        if size >= UNREACHABLE:
+            raise ValueError(f"The layout has {size} walkable cells, which do not fit in a 16-bit distance table")
+        cell_index = {cell: index for index, cell in enumerate(cells)}
+        neighbors = [
+            [cell_index[neighbor] for neighbor in (cell + direction.to_vector() for direction in Direction) if neighbor in cell_index]
+            for cell in cells
+        ]
+        table = array('H', [UNREACHABLE]) * (size * size)
+        for source in range(size):
+            offset = source * size
+            table[offset + source] = 0
+            queue = deque([source])
+            while queue:
+                cell = queue.popleft()
+                distance = table[offset + cell] + 1
+                for neighbor in neighbors[cell]:
+                    if table[offset + neighbor] == UNREACHABLE:
+                        table[offset + neighbor] = distance
+                        queue.append(neighbor)
+        return MazeDistances(cells, table)
+
+    # Writes the table to a file
+    def save(self, path: str) -> None:
+        with atomic_write(path) as f:
+            f.write(_FILE_MAGIC)
+            array('I', [len(self.cells)]).tofile(f)
+            self.table.tofile(f)
+
+    # Reads the table of a layout from a file (it returns None if the file does not contain a valid table for the layout)
+    @staticmethod
+    def load(path: str, layout: DungeonLayout) -> Optional['MazeDistances']:
+        cells = _layout_cells(layout)
+        size = len(cells)
+        try:
+            with open(path, 'rb') as f:
+                if f.read(len(_FILE_MAGIC)) != _FILE_MAGIC: return None
+                header = array('I')
+                header.fromfile(f, 1)
+                if header[0] != size: return None
+                table = array('H')
+                table.fromfile(f, size * size)
+        except (OSError, EOFError):
+            return None
+        return MazeDistances(cells, table)
+
+# Returns the walkable cells of a layout numbered row by row
+def _layout_cells(layout: DungeonLayout) -> List[Point]:
+    return sorted(layout.walkable, key=lambda point: (point.y, point.x))
+
+# Returns the walls of a layout as text (the exit does not affect the distances so it is not included)
+# It is the key of the table in the disk cache
+def layout_walls(layout: DungeonLayout) -> str:
+    return '\n'.join(
+        ''.join('.' if Point(x, y) in layout.walkable else '#' for x in range(layout.width))
+        for y in range(layout.height))
+
+# Returns the maze distances of the problem's layout
+# The table is built the first time it is requested (or loaded from the disk cache if it was built in a previous run),
+# then it is stored in the problem cache
+def get_maze_distances(problem: DungeonProblem, use_disk_cache: bool = True) -> MazeDistances:
+    cache = problem.cache()
+    distances = cache.get("maze_distances")
+    if distances is None:
+        path = hashed_disk_cache_path("maze", ".bin", layout_walls(problem.layout)) if use_disk_cache else None
+        if path is not None and os.path.exists(path):
+            distances = MazeDistances.load(path, problem.layout)
+        if distances is None:
+            distances = MazeDistances.compute(problem.layout)
+            if path is not None: distances.save(path)
+        cache["maze_distances"] = distances
+    return distances
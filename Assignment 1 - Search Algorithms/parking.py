@@ -1,63 +1,90 @@
 from typing import Any, Dict, Set, Tuple, List
 from problem import Problem
-from mathutils import Direction, Point
+from mathutils import Direction, GridTopology, Point
 from helpers import utils
 
 #TODO: (Optional) Instead of Any, you can define a type for the parking state
-ParkingState = Tuple[Point]
+# The parking state is an immutable tuple where state[i] is the index of the cell that contains car 'i'
+# The cells are the passages numbered row by row (see ParkingProblem.topology), so the state is hashable and compact
+ParkingState = Tuple[int, ...]
 # An action of the parking problem is a tuple containing an index 'i' and a direction 'd' where car 'i' should move in the direction 'd'.
 ParkingAction = Tuple[int, Direction]
 
 # This is the implementation of the parking problem
+# The level is compiled once in from_text into flat tables indexed by cell number, so that generating the successors
+# of a state does not create any points: a move is a table lookup and a blocking check is a single bit test
+# on the occupancy bitset of the state (bit 'c' is set if cell 'c' contains a car)
 class ParkingProblem(Problem[ParkingState, ParkingAction]):
     passages: Set[Point]    # A set of points which indicate where a car can be (in other words, every position except walls).
-    cars: Tuple[Point]      # A tuple of points where state[i] is the position of car 'i'. 
+    cars: Tuple[Point]      # A tuple of points where cars[i] is the initial position of car 'i'.
     slots: Dict[Point, int] # A dictionary which indicate the index of the parking slot (if it is 'i' then it is the lot of car 'i') for every position.
                             # if a position does not contain a parking slot, it will not be in this dictionary.
     width: int              # The width of the parking lot.
     height: int             # The height of the parking lot.
+    topology: GridTopology  # The passages numbered row by row (the state stores the ids of these cells).
+    cells: List[Point]      # The point of every cell id (the same list as topology.cells).
+    cell_index: Dict[Point, int]                    # The id of every passage (the same dictionary as topology.cell_index).
+    neighbors: List[List[int]]                      # For every direction, the neighbor of every cell in that direction (or -1 if it is a wall).
+    moves: List[List[Tuple[Direction, int, int]]]   # For every cell, the (direction, neighbor cell, neighbor bit) of each neighboring passage.
+    slot_owner: List[int]   # For every cell, the index of the car that owns its parking slot (or -1 if it is not a slot).
+    actions: List[Dict[Direction, ParkingAction]]   # The action objects of every car (they are created once and shared by all the states).
 
     # This function should return the initial state
     def get_initial_state(self) -> ParkingState:
         # Initial state is the position where all cars are parking initially
-        return self.cars
+        return self.pack(self.cars)
     
     # This function should return True if the given state is a goal. Otherwise, it should return False.
     def is_goal(self, state: ParkingState) -> bool:
-        for i in range(len(state)):
-            if state[i] in self.slots and i == self.slots[state[i]]:
-                return True
-        return False
+        # Every car must be in its own parking slot (the owner of the slot at the cell of every car is looked up,
+        # as the original version did, instead of comparing the state with a goal state built from the slots)
+        slot_owner = self.slot_owner
+        for i, cell in enumerate(state):
+            if slot_owner[cell] != i:
+                return False
+        return True
     
     # This function returns a list of all the possible actions that can be applied to the given state
     def get_actions(self, state: ParkingState) -> List[ParkingAction]:
+        moves, actions = self.moves, self.actions
+        occupied = 0
+        for cell in state:
+            occupied |= 1 << cell
         parking_actions = []
-        for i in range(len(state)):
-            # Loop over each possible direction to check if the car can go in that direction
-            # and there is no car in that direction, then append it in the parking actions
-            for dir in range(4):
-                if state[i].__add__(Direction(dir).to_vector()) in self.passages and \
-                    state[i].__add__(Direction(dir).to_vector()) not in state:
-                    parking_actions.append([i, Direction(dir)])
+        for i, cell in enumerate(state):
+            # A car can move to any neighboring passage that does not contain another car
+            car_actions = actions[i]
+            for direction, _, bit in moves[cell]:
+                if not occupied & bit:
+                    parking_actions.append(car_actions[direction])
         return parking_actions
     
     # This function returns a new state which is the result of applying the given action to the given state
     def get_successor(self, state: ParkingState, action: ParkingAction) -> ParkingState:
-        new_state = list(state) 
-        new_state[action[0]] = new_state[action[0]].__add__(action[1].to_vector())
-        return new_state
+        car, direction = action
+        neighbor = self.neighbors[direction][state[car]]
+        return state[:car] + (neighbor,) + state[car+1:]
     
     # This function returns the cost of applying the given action to the given state
     def get_cost(self, state: ParkingState, action: ParkingAction) -> float:
-        # The point after applying the given action to the state
-        resultant_point = state[action[0]].__add__(action[1].to_vector())
+        car, direction = action
+        # The owner of the slot at the cell after applying the given action to the state
+        owner = self.slot_owner[self.neighbors[direction][state[car]]]
         
         # If the car is standing in the parking slot of another car after executing the action 
         # then return 101 (1 for the move and 100 for angering the owner of the other car)
-        if resultant_point in self.slots and action[0] != self.slots[resultant_point]:
+        if owner >= 0 and owner != car:
             return 101.0
         # Return the actual cost if the car is not standing in the parking slot of other car
         return 1.0
+
+    # Converts the positions of the cars into a state
+    def pack(self, positions: Tuple[Point]) -> ParkingState:
+        return tuple(self.cell_index[position] for position in positions)
+
+    # Converts a state into the positions of the cars
+    def unpack(self, state: ParkingState) -> Tuple[Point]:
+        return tuple(self.cells[cell] for cell in state)
     
      # Read a parking problem from text containing a grid of tiles
     @staticmethod
@@ -82,8 +109,23 @@ class ParkingProblem(Problem[ParkingState, ParkingAction]):
         problem.slots = {position:index for index, position in slots.items()}
         problem.width = width
         problem.height = height
+        problem.compile()
         return problem
 
+    # Builds the tables used to generate the successors (it is called once after the level is read)
+    def compile(self) -> None:
+        self.topology = GridTopology(self.passages)
+        self.cells = self.topology.cells
+        self.cell_index = self.topology.cell_index
+        self.neighbors = self.topology.neighbors
+        self.moves = [
+            [(direction, self.neighbors[direction][cell], 1 << self.neighbors[direction][cell])
+                for direction in Direction if self.neighbors[direction][cell] >= 0]
+            for cell in range(len(self.cells))
+        ]
+        self.slot_owner = [self.slots.get(cell, -1) for cell in self.cells]
+        self.actions = [{direction: (i, direction) for direction in Direction} for i in range(len(self.cars))]
+
     # Read a parking problem from file containing a grid of tiles
     @staticmethod
     def from_file(path: str) -> 'ParkingProblem':
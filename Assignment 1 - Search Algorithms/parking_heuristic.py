@@ -0,0 +1,121 @@
+from array import array
+from typing import List, Optional
+import heapq, mmap, os
+
+from parking import ParkingProblem, ParkingState
+from mathutils import Point
+from helpers.utils import atomic_write, hashed_disk_cache_path
+
+# This file contains a pattern database heuristic for the parking problem
+#
+# The pattern of car 'i' is the problem where car 'i' is the only car in the parking lot.
+# For every cell, the database stores the exact cost for car 'i' to go from that cell to its own slot
+# (each move costs 1, or 101 if it enters the slot of another car). It is computed by a backward
+# uniform cost search from the car's slot over the passages.
+# Every action moves a single car, so the costs of the different cars can be added:
+# the sum over all the cars is an admissible heuristic for the full problem.
+#
+# The databases only depend on the passages and the slots, so they are written to a file on disk
+# (keyed by a hash of the level) and later runs map the file into memory instead of computing them again.
+
+# The value stored in the database for the cells from which a car cannot reach its slot
+UNREACHABLE = 0xFFFFFFFF
+
+# The first bytes of every database file, they are used to detect files that were not written by this module
+_FILE_MAGIC = b"PARKPDB1"
+
+class ParkingPatternDatabase:
+    def __init__(self, cells: List[Point], tables: List[memoryview], buffer=None) -> None:
+        # The passage cells of the problem (numbered row by row like ParkingProblem.cells)
+        self.cells = cells
+        # For each car, an array of unsigned 32-bit integers which holds the cost from every cell to the car's slot
+        self.tables = tables
+        # The memory-mapped file that holds the tables (if they were loaded from disk), it is kept open while the tables are used
+        self._buffer = buffer
+
+    # Returns the cost for the car to reach its slot from the given cell if it was alone (infinity if it cannot)
+    def cost(self, car: int, cell: int) -> float:
+        cost = self.tables[car][cell]
+        return float('inf') if cost == UNREACHABLE else cost
+
+    # Computes the databases of all the cars of a parking problem
+    @staticmethod
+    def compute(problem: ParkingProblem) -> 'ParkingPatternDatabase':
+        cells, owners = problem.cells, problem.slot_owner
+        slot_cells = {car: problem.cell_index[position] for position, car in problem.slots.items()}
+        tables = []
+        for car in range(len(problem.cars)):
+            table = array('I', [UNREACHABLE]) * len(cells)
+            if car in slot_cells:
+                # Backward uniform cost search: the cost of a cell is the cost of the move into the next cell plus the cost of that cell
+                table[slot_cells[car]] = 0
+                frontier = [(0, slot_cells[car])]
+                while frontier:
+                    cost, cell = heapq.heappop(frontier)
+                    if cost > table[cell]: continue
+                    move_cost = 101 if owners[cell] not in (-1, car) else 1
+                    for _, neighbor, _ in problem.moves[cell]:
+                        if cost + move_cost < table[neighbor]:
+                            table[neighbor] = cost + move_cost
+                            heapq.heappush(frontier, (cost + move_cost, neighbor))
+            tables.append(memoryview(table))
+        return ParkingPatternDatabase(cells, tables)
+
+    # Writes the databases to a file
+    def save(self, path: str) -> None:
+        with atomic_write(path) as f:
+            f.write(_FILE_MAGIC)
+            array('I', [len(self.tables), len(self.cells)]).tofile(f)
+            for table in self.tables:
+                f.write(table)
+
+    # Maps the databases of a parking problem from a file into memory without copying them
+    # (it returns None if the file does not contain valid databases for the problem)
+    @staticmethod
+    def load(path: str, problem: ParkingProblem) -> Optional['ParkingPatternDatabase']:
+        cells = problem.cells
+        try:
+            with open(path, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        header_size = len(_FILE_MAGIC) + 8
+        cars, size = len(problem.cars), len(cells)
+        if len(buffer) != header_size + 4 * cars * size \
+            or buffer[:len(_FILE_MAGIC)] != _FILE_MAGIC \
+            or memoryview(buffer)[len(_FILE_MAGIC):header_size].cast('I').tolist() != [cars, size]:
+            buffer.close()
+            return None
+        data = memoryview(buffer)[header_size:].cast('I')
+        tables = [data[car * size:(car + 1) * size] for car in range(cars)]
+        return ParkingPatternDatabase(cells, tables, buffer)
+
+# Returns the passages and the slots of a parking problem as text (the positions of the cars do not affect the databases)
+# It is the key of the databases in the disk cache
+def level_layout(problem: ParkingProblem) -> str:
+    def tile(point: Point) -> str:
+        if point not in problem.passages: return '#'
+        return str(problem.slots[point]) if point in problem.slots else '.'
+    rows = '\n'.join(''.join(tile(Point(x, y)) for x in range(problem.width)) for y in range(problem.height))
+    return rows + f"\n{len(problem.cars)}"
+
+# Returns the pattern databases of the problem
+# They are computed the first time they are requested (or mapped from the disk cache if they were computed in a previous run),
+# then they are stored in the problem cache
+def get_pattern_database(problem: ParkingProblem, use_disk_cache: bool = True) -> ParkingPatternDatabase:
+    cache = problem.cache()
+    database = cache.get("pattern_database")
+    if database is None:
+        path = hashed_disk_cache_path("parking", ".pdb", level_layout(problem)) if use_disk_cache else None
+        if path is not None and os.path.exists(path):
+            database = ParkingPatternDatabase.load(path, problem)
+        if database is None:
+            database = ParkingPatternDatabase.compute(problem)
+            if path is not None: database.save(path)
+        cache["pattern_database"] = database
+    return database
+
+# The additive pattern database heuristic: the sum of the costs of all the cars to reach their slots if each was alone
+def parking_heuristic(problem: ParkingProblem, state: ParkingState) -> float:
+    database = get_pattern_database(problem)
+    return sum(database.cost(car, cell) for car, cell in enumerate(state))
@@ -1,10 +1,14 @@
-from typing import List
-from dungeon import DungeonProblem, Direction, DungeonState, DungeonTile
-from agents import HumanAgent, UninformedSearchAgent, InformedSearchAgent
+from typing import Dict, List, Optional
+from dungeon import DungeonProblem, Direction, DungeonState, DungeonTile, PackedDungeonProblem, packed_heuristic, packed_reverse_heuristic
+from agents import HumanAgent, UninformedSearchAgent, InformedSearchAgent, IncrementalSearchAgent
+from mathutils import Point
+from search_stats import SearchStats
 from helpers.utils import fetch_tracked_call_count
 from helpers.heuristic_checks import test_heuristic_consistency
-from functools import lru_cache
-import argparse, time
+from heuristic_cache import CACHE_POLICIES, CachedHeuristic
+from policy_store import PersistentPolicy, policy_path
+from grid_search import JumpPointAgent, JumpPointDungeonProblem, jump_point_dungeon_heuristic
+import argparse, json, time
 
 def colored_dungeon(level: str):
     from helpers.utils import bcolors
@@ -28,8 +32,35 @@ def get_heuristic(name: str):
     print(f"Requested Heuristic '{name}' is invalid")
     exit(-1)
 
+# Return the heuristic selected by the user prepared for a search agent
+def create_search_heuristic(args: argparse.Namespace):
+    heuristic = get_heuristic(args.heuristic)
+    # The heuristics are written for DungeonState, so they are wrapped to unpack the packed states
+    if args.packed: heuristic = packed_heuristic(heuristic)
+    # The same goes for the states of the jump point dungeon problem
+    if args.jump_points: heuristic = jump_point_dungeon_heuristic(heuristic)
+    # We cache the heuristic calls (per problem) to speed up the search process if the heuristic is not fast
+    heuristic = CachedHeuristic(heuristic, args.cache_capacity, args.cache_policy)
+    # If desired by the user, we track every transition and check for the heuristic consistency for each transition
+    if args.checks:
+        problem_class = PackedDungeonProblem if args.packed else JumpPointDungeonProblem if args.jump_points else DungeonProblem
+        problem_class.get_successor = test_heuristic_consistency(heuristic)(problem_class.get_successor)
+    return heuristic
+
 # Create an agent based on the user selections
-def create_agent(args: argparse.Namespace):
+# If stats is given, the search agents add the stats of their searches to it
+def create_agent(args: argparse.Namespace, stats: Optional[SearchStats] = None):
+    agent = create_base_agent(args, stats)
+    # If desired by the user, the search agent plans with jump point search and the agent plays the jumps step by step
+    if args.jump_points:
+        if not isinstance(agent, (UninformedSearchAgent, InformedSearchAgent)) or args.packed:
+            print("Jump point search is only supported by the search agents on the unpacked problem")
+            exit(-1)
+        agent = JumpPointAgent(agent)
+    return agent
+
+# Create the agent selected by the user (without jump point search)
+def create_base_agent(args: argparse.Namespace, stats: Optional[SearchStats] = None):
     agent_type: str = args.agent
     if agent_type == "human":
         # This function reads the action from the user (human)
@@ -50,32 +81,51 @@ def create_agent(args: argparse.Namespace):
         return HumanAgent(dungeon_user_action)
     if agent_type == "bfs":
         from search import BreadthFirstSearch
-        return UninformedSearchAgent(BreadthFirstSearch)
+        return UninformedSearchAgent(BreadthFirstSearch, stats)
     if agent_type == "dfs":
         from search import DepthFirstSearch
-        return UninformedSearchAgent(DepthFirstSearch)
+        return UninformedSearchAgent(DepthFirstSearch, stats)
     if agent_type == "ucs":
         from search import UniformCostSearch
-        return UninformedSearchAgent(UniformCostSearch)
+        return UninformedSearchAgent(UniformCostSearch, stats)
     if agent_type == "astar":
         from search import AStarSearch
-        # We cache the heuristic calls to speed up the search process if the heuristic is not fast
-        heuristic = lru_cache(2**16)(get_heuristic(args.heuristic))
-        # If desired by the user, we track every transition and check for the heuristic consistency for each transition
-        if args.checks:
-            DungeonProblem.get_successor = test_heuristic_consistency(heuristic)(DungeonProblem.get_successor)
-        return InformedSearchAgent(AStarSearch, heuristic)
+        return InformedSearchAgent(AStarSearch, create_search_heuristic(args), stats)
+    if agent_type in ("idastar", "smastar"):
+        from search import IterativeDeepeningAStarSearch, SMAStarSearch
+        search_fn = IterativeDeepeningAStarSearch if agent_type == "idastar" else SMAStarSearch
+        return InformedSearchAgent(search_fn, create_search_heuristic(args), stats)
+    if agent_type == "arastar":
+        from search import AnytimeRepairingAStarSearch
+        from functools import partial
+        # The improved solutions are printed as they are found
+        report = lambda _, cost, bound: print(f"Found a solution with cost {cost} (at most {bound:.3f} times the optimal cost)")
+        search_fn = partial(AnytimeRepairingAStarSearch, on_solution=report)
+        return InformedSearchAgent(search_fn, create_search_heuristic(args), stats, args.time_limit)
     if agent_type == "gbfs":
         from search import BestFirstSearch
-        # We cache the heuristic calls to speed up the search process if the heuristic is not fast
-        heuristic = lru_cache(2**16)(get_heuristic(args.heuristic))
-        # If desired by the user, we track every transition and check for the heuristic consistency for each transition
-        if args.checks:
-            DungeonProblem.get_successor = test_heuristic_consistency(heuristic)(DungeonProblem.get_successor)
-        return InformedSearchAgent(BestFirstSearch, heuristic)
+        return InformedSearchAgent(BestFirstSearch, create_search_heuristic(args), stats)
+    if agent_type == "dstar":
+        from dungeon_heuristic import reverse_heuristic
+        # The reverse heuristic is written for DungeonState, so it is wrapped to unpack the packed states
+        if args.packed: reverse_heuristic = packed_reverse_heuristic(reverse_heuristic)
+        return IncrementalSearchAgent(reverse_heuristic, stats)
     print(f"Requested Agent '{agent_type}' is invalid")
     exit(-1)
 
+# Reads the cells toggled by the user in the form "STEP:X,Y" and groups them by step
+def parse_toggled_cells(toggles: List[str]) -> Dict[int, List[Point]]:
+    toggled: Dict[int, List[Point]] = {}
+    for toggle in toggles:
+        try:
+            step, position = toggle.split(':')
+            x, y = position.split(',')
+            toggled.setdefault(int(step), []).append(Point(int(x), int(y)))
+        except ValueError:
+            print(f"Invalid toggled cell '{toggle}', expected STEP:X,Y")
+            exit(-1)
+    return toggled
+
 def main(args: argparse.Namespace):
     state_printer = lambda state: print(state)
     if args.ansicolors: state_printer = lambda state: print(colored_dungeon(str(state)))
@@ -84,20 +134,41 @@ def main(args: argparse.Namespace):
     state = problem.get_initial_state() # Get the initial state
     print("Initial State:")
     state_printer(state)
-    agent = create_agent(args)
+    stats = SearchStats() if args.stats else None # If desired by the user, the search stats are collected
+    agent = create_agent(args, stats)
+    # If desired by the user, the agent searches the packed version of the problem
+    search_problem = problem.packed() if args.packed else problem
+    observe = search_problem.pack if args.packed else (lambda state: state)
+    # If desired by the user, the policy of the search agent is stored on disk so that later runs on the same level replay it
+    # (the states are stored as packed states, so the packed and unpacked runs share the same policy)
+    policy: Optional[PersistentPolicy] = None
+    if args.policy_cache and isinstance(agent, (UninformedSearchAgent, InformedSearchAgent, JumpPointAgent)):
+        with open(args.level, 'r') as f:
+            level = f.read()
+        search_agent = agent.agent if isinstance(agent, JumpPointAgent) else agent
+        heuristic = None if isinstance(search_agent, UninformedSearchAgent) else args.heuristic
+        if args.agent == "arastar": heuristic = f"{heuristic} {args.time_limit}" # The solution of ARA* depends on its time limit
+        # The jump point search may find a different (but equally short) solution, so its policy is stored separately
+        algorithm = f"{args.agent} jump" if args.jump_points else args.agent
+        encode_state = (lambda state: state) if args.packed else problem.packed().pack
+        policy = agent.policy = PersistentPolicy(policy_path(level, algorithm, heuristic), encode_state, int, Direction)
+        print(f"Loaded {policy.stored} stored actions from the policy cache")
+    toggled_cells = parse_toggled_cells(args.toggle_cell) # The cells that are blocked (or opened again) after some steps
     step = 0 # This will store the current step
     total_explored_nodes = 0 # This will store the number of traversed nodes during search
     unsolvable = False # This will store whether the problem is unsolvable or not
     while not problem.is_goal(state):
-        fetch_tracked_call_count(DungeonProblem.is_goal) # Clear the call counter
-        action = agent.act(problem, state) # Request an action from the agent
+        fetch_tracked_call_count(type(search_problem).is_goal) # Clear the call counter
+        expanded_before = agent.planner.expanded if isinstance(agent, IncrementalSearchAgent) and agent.planner else 0
+        action = agent.act(search_problem, observe(state)) # Request an action from the agent
         # If no solution was found, break
         if action is None:
             print("Agent cannot find a solution, exiting...")
             unsolvable = True
             break
-        # Get the number of traversed nodes
-        total_explored_nodes += fetch_tracked_call_count(DungeonProblem.is_goal)
+        # Get the number of traversed nodes (the incremental agent does not test the goal, so its expanded nodes are counted instead)
+        total_explored_nodes += fetch_tracked_call_count(type(search_problem).is_goal)
+        if isinstance(agent, IncrementalSearchAgent): total_explored_nodes += agent.planner.expanded - expanded_before
         # Apply the action to the state
         state = problem.get_successor(state, action)
         step += 1
@@ -105,16 +176,43 @@ def main(args: argparse.Namespace):
         print("Step:", step)
         print("Action:", str(action))
         state_printer(state)
+        # Block (or open again) the cells that the user toggled after this step, and tell the agent which states changed
+        for cell in toggled_cells.get(step, []):
+            if cell not in problem.topology or cell == state.player:
+                print(f"Cannot block the cell {cell} since it is a wall or the player is on it")
+                continue
+            blocked = problem.topology.cell_index.get(cell) not in problem.topology.blocked
+            changed = set(problem.set_blocked(cell, blocked))
+            print(f"The cell {cell} is {'blocked' if blocked else 'opened'}")
+            if args.packed:
+                changed_ids = {search_problem.cell_index[point] for point in changed}
+                agent.notify_changes(lambda packed_state: (packed_state & search_problem.cell_mask) in changed_ids)
+            else:
+                agent.notify_changes(lambda dungeon_state: dungeon_state.player in changed)
+    # The jump point agent plans with another search agent on the jump point problem, so the heuristic is checked there
+    planner, planned_problem, planned_state = agent, search_problem, observe(state)
+    if isinstance(agent, JumpPointAgent) and agent.jump_problem is not None:
+        planner, planned_problem, planned_state = agent.agent, agent.jump_problem, (state, None)
     if not unsolvable: 
         # If desired by the user, we check that the heuristic is zero at the goal state
-        if args.checks and isinstance(agent, InformedSearchAgent):
-            goal_heuristic = agent.heuristic(problem, state)
+        if args.checks and isinstance(planner, InformedSearchAgent):
+            goal_heuristic = planner.heuristic(planned_problem, planned_state)
             if goal_heuristic != 0:
                 print(f"ERROR: Expected heuristic at goal to be 0, got {goal_heuristic}")
         print("YOU WON!!")
+    # Store the new actions of the policy for the later runs
+    if policy is not None:
+        print(f"Replayed {policy.hits} stored actions from the policy cache")
+        policy.flush()
+        policy.close()
     # This was a search agent, display the number of traversed nodes
     if not isinstance(agent, HumanAgent):
         print(f"Search explored {total_explored_nodes} nodes")
+    # If desired by the user, print the search stats as json
+    if stats is not None:
+        print(f"Search stats: {stats.to_json()}")
+        if isinstance(planner, InformedSearchAgent):
+            print(f"Heuristic cache: {json.dumps(planner.heuristic.cache_of(planned_problem).to_dict())}")
     # Finally print the elapsed time for the whole process
     print(f"Elapsed time: {time.time() - start} seconds")
 
@@ -124,13 +222,29 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Play Dungeon as Human or AI")
     parser.add_argument("level", help="path to the dungeon to play")
     parser.add_argument("--agent", "-a", default="human",
-                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'gbfs'],
+                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'gbfs', 'idastar', 'smastar', 'arastar', 'dstar'],
                         help="the agent that will play the game")
     parser.add_argument("--heuristic", '-hf', default="zero",
                         choices=["zero", "weak", "strong"],
-                        help="choose the heuristic to use with A* or Greedy Best First Search")
+                        help="choose the heuristic to use with A* (or its memory-bounded versions) or Greedy Best First Search")
+    parser.add_argument("--time-limit", "-t", type=float, default=None,
+                        help="the time limit in seconds for the anytime search agent (arastar) to improve its solution")
+    parser.add_argument("--cache-capacity", "-cc", type=int, default=2**16,
+                        help="the maximum number of heuristic values cached for the search agents")
+    parser.add_argument("--cache-policy", "-cp", default="lru", choices=list(CACHE_POLICIES),
+                        help="the eviction policy of the heuristic cache")
+    parser.add_argument("--toggle-cell", "-tc", nargs="*", default=[], metavar="STEP:X,Y",
+                        help="block the cell (X, Y) after the given step (or open it again if it is blocked)")
+    parser.add_argument("--policy-cache", "-pc", action='store_true', default=False,
+                        help="Store the policy of the search agent on disk and replay it in the later runs on the same level")
     parser.add_argument("--checks", "-c", action='store_true', default=False,
                         help="Enable consistency checks for the heuristic")
+    parser.add_argument("--packed", "-p", action='store_true', default=False,
+                        help="Let the search agents use the packed integer states of the dungeon")
+    parser.add_argument("--jump-points", "-jp", action='store_true', default=False,
+                        help="Let the search agents plan with jump point search, which only expands the cells where the shortest paths may turn")
+    parser.add_argument("--stats", "-st", action='store_true', default=False,
+                        help="Print the stats of the search agent (such as the expanded nodes and the peak frontier size) as json")
     parser.add_argument("--ansicolors", "-ac", action="store_true",
                         help="Print the dungeon on the console with ANSI colors (only works on some terminals)")
 
@@ -1,11 +1,25 @@
 import time
-from graph import GraphRoutingProblem, GraphNode, graphrouting_heuristic
+from typing import Optional
+from graph import GraphRoutingProblem, GraphNode, graphrouting_heuristic, graphrouting_reverse_heuristic
 from agents import HumanAgent, UninformedSearchAgent, InformedSearchAgent
-from helpers.utils import fetch_recorded_calls
+from search_stats import SearchStats
+from helpers.utils import fetch_recorded_calls, start_recording_calls
 import argparse, os, json
 
 # Create an agent based on the user selections
-def create_agent(args: argparse.Namespace):
+# Return the heuristic and the reverse heuristic selected by the user
+def get_heuristics(name: str):
+    if name == "euclidean":
+        return graphrouting_heuristic, graphrouting_reverse_heuristic
+    if name == "alt":
+        from graph_landmarks import alt_heuristic, alt_reverse_heuristic
+        return alt_heuristic, alt_reverse_heuristic
+    print(f"Requested Heuristic '{name}' is invalid")
+    exit(-1)
+
+# If stats is given, the search agents add the stats of their searches to it
+def create_agent(args: argparse.Namespace, stats: Optional[SearchStats] = None):
+    heuristic, reverse_heuristic = get_heuristics(args.heuristic)
     agent_type: str = args.agent
     if agent_type == "human":
         # This function reads the action from the user (human)
@@ -28,19 +42,30 @@ def create_agent(args: argparse.Namespace):
         return HumanAgent(graph_user_action)
     if agent_type == "bfs":
         from search import BreadthFirstSearch
-        return UninformedSearchAgent(BreadthFirstSearch)
+        return UninformedSearchAgent(BreadthFirstSearch, stats)
     if agent_type == "dfs":
         from search import DepthFirstSearch
-        return UninformedSearchAgent(DepthFirstSearch)
+        return UninformedSearchAgent(DepthFirstSearch, stats)
     if agent_type == "ucs":
         from search import UniformCostSearch
-        return UninformedSearchAgent(UniformCostSearch)
+        return UninformedSearchAgent(UniformCostSearch, stats)
     if agent_type == "astar":
         from search import AStarSearch
-        return InformedSearchAgent(AStarSearch, graphrouting_heuristic)
+        return InformedSearchAgent(AStarSearch, heuristic, stats)
     if agent_type == "gbfs":
         from search import BestFirstSearch
-        return InformedSearchAgent(BestFirstSearch, graphrouting_heuristic)
+        return InformedSearchAgent(BestFirstSearch, heuristic, stats)
+    if agent_type == "bibfs":
+        from search import BidirectionalBFS
+        return UninformedSearchAgent(BidirectionalBFS, stats)
+    if agent_type == "biucs":
+        from search import BidirectionalUniformCostSearch
+        return UninformedSearchAgent(BidirectionalUniformCostSearch, stats)
+    if agent_type == "biastar":
+        from search import BidirectionalAStarSearch
+        from functools import partial
+        search_fn = partial(BidirectionalAStarSearch, reverse_heuristic=reverse_heuristic)
+        return InformedSearchAgent(search_fn, heuristic, stats)
     print(f"Requested Agent '{agent_type}' is invalid")
     exit(-1)
 
@@ -60,13 +85,14 @@ def main(args: argparse.Namespace):
     if figure:
         print(figure)
     print("Current Node:", state)
-    agent = create_agent(args)
+    stats = SearchStats() if args.stats else None # If desired by the user, the search stats are collected
+    agent = create_agent(args, stats)
     step = 0 # This will store the current step
     path_cost = 0 # This will store the total path cost
     traversed_nodes = [] # This will store all the traversed nodes in order of traversal
     unsolvable = False # This will store whether the problem is unsolvable or not
     while not problem.is_goal(state):
-        fetch_recorded_calls(GraphRoutingProblem.is_goal) # Clear the recorded calls
+        start_recording_calls(GraphRoutingProblem.is_goal) # Clear the recorded calls and record the next ones
         action = agent.act(problem, state) # Request an action from the agent
         # Retrieve the traversed nodes
         traversed_nodes += [call["args"][1].name for call in list(fetch_recorded_calls(GraphRoutingProblem.is_goal))]
@@ -92,6 +118,9 @@ def main(args: argparse.Namespace):
     # This was a search agent, display the traversed nodes
     if not isinstance(agent, HumanAgent):
         print(f"Traversal Order: {'->'.join(traversed_nodes)}")
+    # If desired by the user, print the search stats as json
+    if stats is not None:
+        print(f"Search stats: {stats.to_json()}")
     # Finally print the elapsed time for the whole process
     print(f"Elapsed time: {time.time() - start} seconds")
 
@@ -100,8 +129,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Play Graph as Human or AI")
     parser.add_argument("graph", help="path to the graph to play")
     parser.add_argument("--agent", "-a", default="human",
-                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'gbfs'],
+                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'gbfs', 'bibfs', 'biucs', 'biastar'],
                         help="the agent that will play the game")
+    parser.add_argument("--heuristic", "-hf", default="euclidean", choices=["euclidean", "alt"],
+                        help="choose the heuristic to use with A*, Greedy Best First Search or Bidirectional A* (alt uses landmarks)")
+    parser.add_argument("--stats", "-st", action='store_true', default=False,
+                        help="Print the stats of the search agent (such as the expanded nodes and the peak frontier size) as json")
 
     args = parser.parse_args()
     try:
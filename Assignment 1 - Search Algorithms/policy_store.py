@@ -0,0 +1,155 @@
+from array import array
+from typing import Callable, Dict, Generic, Optional
+import mmap
+
+from problem import S, A
+from helpers.utils import atomic_write, hashed_disk_cache_path
+
+# This file contains a policy (the action to do in each state) that is stored on disk between runs
+#
+# The search agents store the actions along every solution path in their policy, so the states that were already planned
+# are never searched again. PersistentPolicy can replace the agent's dictionary: it reads the actions stored by the previous
+# runs on the same level (with the same algorithm and heuristic) and writes the new ones when it is flushed.
+# So a later run on the same level replays the stored actions without searching.
+#
+# The file is named after a hash of the level text, the algorithm and the heuristic, so editing the level file
+# (or selecting another algorithm or heuristic) makes the agent use another file, and the stale file is never read.
+# The states are encoded into non-negative integers (for the dungeon, the packed states) and the actions into small integers.
+#
+# The file format is:
+#   the magic bytes, then the number of entries and the size of every key in bytes (two unsigned 64-bit integers),
+#   then the keys (big-endian, in increasing order), then one byte per entry for its action (NO_ACTION if there is no solution)
+# The file is mapped into memory and searched with a binary search, so a run only reads the pages of the states it visits.
+
+# The first bytes of every policy file, they are used to detect files that were not written by this module
+_FILE_MAGIC = b"POLICY1\0"
+_HEADER_SIZE = len(_FILE_MAGIC) + 16
+
+# The stored byte of the states that have no solution
+NO_ACTION = 0xFF
+
+# Returns the path of the policy file for the given level text, algorithm and heuristic
+def policy_path(level: str, algorithm: str, heuristic: Optional[str] = None) -> str:
+    return hashed_disk_cache_path("policy", ".bin", level, f"\n{algorithm}\n{heuristic}")
+
+# A policy whose new actions are kept in memory and whose stored actions are read from a memory-mapped file
+# - encode_state: converts a state into a non-negative integer (it must be the same for all the runs on the level)
+# - encode_action and decode_action: convert an action into an integer in [0, 255) and back
+class PersistentPolicy(Generic[S, A]):
+    def __init__(self, path: str, encode_state: Callable[[S], int],
+                 encode_action: Callable[[A], int] = int, decode_action: Callable[[int], A] = lambda action: action) -> None:
+        self.path = path
+        self.encode_state = encode_state
+        self.encode_action = encode_action
+        self.decode_action = decode_action
+        # The actions added in this run (keyed by the encoded states)
+        self._entries: Dict[int, Optional[A]] = {}
+        # The number of actions read from the file
+        self.hits = 0
+        # The stored policy is ignored after the policy is cleared (since the level changed, see GoalBasedAgent.notify_changes)
+        self._stale = False
+        self._buffer: Optional[mmap.mmap] = None
+        self._count, self._key_size = 0, 0
+        self._open()
+
+    # Maps the file into memory (if it exists and it is valid)
+    def _open(self) -> None:
+        try:
+            with open(self.path, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+        if len(buffer) < _HEADER_SIZE or buffer[:len(_FILE_MAGIC)] != _FILE_MAGIC:
+            buffer.close()
+            return
+        count, key_size = memoryview(buffer)[len(_FILE_MAGIC):_HEADER_SIZE].cast('Q').tolist()
+        if len(buffer) != _HEADER_SIZE + count * (key_size + 1):
+            buffer.close()
+            return
+        self._buffer, self._count, self._key_size = buffer, count, key_size
+
+    # The number of stored actions in the file
+    @property
+    def stored(self) -> int:
+        return 0 if self._stale else self._count
+
+    # Returns the index of the encoded state in the file (or -1 if it is not stored)
+    def _find(self, key: int) -> int:
+        if self._buffer is None or self._stale: return -1
+        key_size, buffer = self._key_size, self._buffer
+        if key.bit_length() > 8 * key_size: return -1
+        target = key.to_bytes(key_size, 'big')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset = _HEADER_SIZE + middle * key_size
+            stored = buffer[offset:offset + key_size]
+            if stored < target:
+                low = middle + 1
+            elif stored > target:
+                high = middle
+            else:
+                return middle
+        return -1
+
+    # Returns the stored action at the given index of the file
+    def _stored_action(self, index: int) -> Optional[A]:
+        action = self._buffer[_HEADER_SIZE + self._count * self._key_size + index]
+        return None if action == NO_ACTION else self.decode_action(action)
+
+    def __contains__(self, state: S) -> bool:
+        key = self.encode_state(state)
+        return key in self._entries or self._find(key) >= 0
+
+    def __getitem__(self, state: S) -> Optional[A]:
+        key = self.encode_state(state)
+        if key in self._entries: return self._entries[key]
+        index = self._find(key)
+        if index < 0: raise KeyError(state)
+        self.hits += 1
+        return self._stored_action(index)
+
+    def get(self, state: S, default: Optional[A] = None) -> Optional[A]:
+        try:
+            return self[state]
+        except KeyError:
+            return default
+
+    def __setitem__(self, state: S, action: Optional[A]) -> None:
+        self._entries[self.encode_state(state)] = action
+
+    def __len__(self) -> int:
+        return len(self._entries) + self.stored
+
+    # Drops all the actions (including the stored ones, which are not written again by flush)
+    def clear(self) -> None:
+        self._entries.clear()
+        self._stale = True
+
+    # Writes the stored actions and the new ones to the file (if there are new actions)
+    def flush(self) -> None:
+        if self._stale or not self._entries: return
+        merged: Dict[int, int] = {}
+        if self._buffer is not None:
+            key_size = self._key_size
+            for index in range(self._count):
+                offset = _HEADER_SIZE + index * key_size
+                merged[int.from_bytes(self._buffer[offset:offset + key_size], 'big')] = self._buffer[_HEADER_SIZE + self._count * key_size + index]
+        for key, action in self._entries.items():
+            merged[key] = NO_ACTION if action is None else self.encode_action(action)
+        keys = sorted(merged)
+        key_size = max(1, (keys[-1].bit_length() + 7) // 8)
+        with atomic_write(self.path) as f:
+            f.write(_FILE_MAGIC)
+            array('Q', [len(keys), key_size]).tofile(f)
+            f.write(b''.join(key.to_bytes(key_size, 'big') for key in keys))
+            f.write(bytes(merged[key] for key in keys))
+            # The stored file is unmapped before it is replaced
+            self.close()
+        self._entries.clear()
+        self._open()
+
+    def close(self) -> None:
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer, self._count, self._key_size = None, 0, 0
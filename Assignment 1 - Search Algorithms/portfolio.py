@@ -0,0 +1,152 @@
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, List, Optional
+import argparse, multiprocessing, time, traceback
+
+from problem import Problem
+from solver import HEURISTICS, PROBLEM_TYPES, SEARCH_ALGORITHMS, format_path, get_search_function, load_problem, run_search
+
+# This file contains a portfolio runner which starts several search algorithms on the same problem in parallel processes
+# For a new level, we usually don't know which algorithm will finish first, so we run them all and:
+# - in the "first" mode, we return the first solution that is found and cancel the other algorithms
+# - in the "best" mode, we wait for all the algorithms (or until the time budget ends) and return the cheapest solution
+# Every algorithm is reported with its status, the number of explored nodes and its wall time
+
+# The statuses of an algorithm in the portfolio
+SOLVED      = "solved"      # The algorithm found a solution
+NO_SOLUTION = "no solution" # The algorithm finished without finding a solution
+CANCELLED   = "cancelled"   # The algorithm was stopped since another algorithm already found a solution
+TIMEOUT     = "timeout"     # The algorithm was stopped since the time budget ended
+ERROR       = "error"       # The algorithm raised an exception (or its process died)
+
+@dataclass
+class AlgorithmReport:
+    algorithm: str
+    status: str
+    path: Optional[List[Any]] = None    # The actions of the solution (if it was solved)
+    cost: Optional[float] = None        # The cost of the solution (if it was solved)
+    expanded: Optional[int] = None      # The number of expanded nodes (if the algorithm finished)
+    stats: Optional[Dict[str, Any]] = None # The search stats (if the algorithm finished)
+    wall_time: float = 0                # The time from starting the algorithm until it finished or was stopped
+    error: Optional[str] = None         # The traceback of the error (if any)
+
+@dataclass
+class PortfolioResult:
+    best: Optional[AlgorithmReport]     # The report of the selected solution (or None if no algorithm found a solution)
+    reports: List[AlgorithmReport] = field(default_factory=list) # The reports of all the algorithms in the order they were requested
+
+# This function runs in the worker process. It runs one algorithm and sends its report back through the connection
+def _portfolio_worker(connection: Connection, problem: Problem, problem_type: str, algorithm: str, heuristic: Optional[str]):
+    try:
+        search_fn = get_search_function(algorithm, problem_type, heuristic)
+        outcome = run_search(problem, search_fn)
+        status = NO_SOLUTION if outcome.path is None else SOLVED
+        report = AlgorithmReport(algorithm, status, outcome.path, outcome.cost, outcome.stats.expanded, outcome.stats.to_dict())
+    except Exception:
+        report = AlgorithmReport(algorithm, ERROR, error=traceback.format_exc())
+    connection.send(report)
+    connection.close()
+
+# Runs the given algorithms on the problem in parallel processes
+# - mode: "first" to return the first solution or "best" to return the cheapest solution found within the time budget
+# - time_limit: the time budget in seconds (None for no limit). When it ends, the running algorithms are stopped
+# - workers: the maximum number of algorithms running at the same time (by default, all of them)
+# The problem object is inherited by the worker processes, so it must be picklable where processes are spawned instead of forked
+def run_portfolio(problem: Problem, problem_type: str, algorithms: List[str], heuristic: Optional[str] = None,
+                  mode: str = "first", time_limit: Optional[float] = None, workers: Optional[int] = None) -> PortfolioResult:
+    if mode not in ("first", "best"):
+        raise ValueError(f"Unknown portfolio mode '{mode}'")
+    workers = max(1, len(algorithms) if workers is None else workers)
+    start = time.perf_counter()
+    deadline = None if time_limit is None else start + time_limit
+    reports: Dict[str, AlgorithmReport] = {}
+    pending = list(algorithms)
+    # The running algorithms: the parent end of the connection of each worker alongside its process and start time
+    running: Dict[Connection, tuple] = {}
+
+    def launch(algorithm: str):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_portfolio_worker, args=(sender, problem, problem_type, algorithm, heuristic), daemon=True)
+        process.start()
+        sender.close() # The parent only reads from the connection
+        running[receiver] = (algorithm, process, time.perf_counter())
+
+    def stop(connection: Connection, status: str):
+        algorithm, process, started = running.pop(connection)
+        process.terminate()
+        process.join()
+        connection.close()
+        reports[algorithm] = AlgorithmReport(algorithm, status, wall_time=time.perf_counter() - started)
+
+    winner: Optional[AlgorithmReport] = None
+    while pending or running:
+        while pending and len(running) < workers:
+            launch(pending.pop(0))
+        timeout = None if deadline is None else max(0, deadline - time.perf_counter())
+        ready = wait(list(running.keys()), timeout)
+        if not ready:
+            # The time budget ended, so we stop all the remaining algorithms
+            for connection in list(running.keys()):
+                stop(connection, TIMEOUT)
+            for algorithm in pending:
+                reports[algorithm] = AlgorithmReport(algorithm, TIMEOUT)
+            pending.clear()
+            break
+        for connection in ready:
+            algorithm, process, started = running.pop(connection)
+            try:
+                report: AlgorithmReport = connection.recv()
+            except EOFError:
+                # The process died without sending a report
+                report = AlgorithmReport(algorithm, ERROR, error=f"The worker process exited with code {process.exitcode}")
+            report.wall_time = time.perf_counter() - started
+            process.join()
+            connection.close()
+            reports[algorithm] = report
+            if report.status == SOLVED and (winner is None or report.cost < winner.cost):
+                winner = report
+        if winner is not None and mode == "first":
+            # We already have a solution, so we cancel the losers
+            for connection in list(running.keys()):
+                stop(connection, CANCELLED)
+            for algorithm in pending:
+                reports[algorithm] = AlgorithmReport(algorithm, CANCELLED)
+            pending.clear()
+    return PortfolioResult(winner, [reports[algorithm] for algorithm in algorithms])
+
+def main(args: argparse.Namespace):
+    problem_type, problem = load_problem(args.level, args.problem)
+    result = run_portfolio(problem, problem_type, args.algorithms, args.heuristic, args.mode, args.time_limit, args.workers)
+    for report in result.reports:
+        expanded = "-" if report.expanded is None else report.expanded
+        cost = "-" if report.cost is None else report.cost
+        print(f"{report.algorithm:>8}: {report.status:<12} cost: {cost:<8} expanded: {expanded:<10} wall time: {report.wall_time:.3f} seconds")
+        if report.error: print(report.error)
+    if result.best is None:
+        print("No algorithm found a solution")
+    else:
+        print(f"Selected {result.best.algorithm} (cost: {result.best.cost})")
+        print("Path:", ' '.join(str(action) for action in format_path(result.best.path, problem)))
+
+if __name__ == "__main__":
+    # Read the arguments from the command line
+    parser = argparse.ArgumentParser(description="Run a portfolio of search algorithms on a level in parallel")
+    parser.add_argument("level", help="path to the level (a dungeon, a parking lot or a graph)")
+    parser.add_argument("--problem", "-p", default=None, choices=PROBLEM_TYPES,
+                        help="the type of the level (detected from the file if not given)")
+    parser.add_argument("--algorithms", "-a", nargs="+", default=["bfs", "ucs", "astar", "gbfs"], choices=list(SEARCH_ALGORITHMS),
+                        help="the algorithms in the portfolio")
+    parser.add_argument("--heuristic", "-hf", default=None, choices=sorted({name for names in HEURISTICS.values() for name in names}),
+                        help="the heuristic used by the informed algorithms (the best heuristic of the problem type if not given)")
+    parser.add_argument("--mode", "-m", default="first", choices=["first", "best"],
+                        help="return the first solution or the best solution found within the time limit")
+    parser.add_argument("--time-limit", "-t", type=float, default=None,
+                        help="the time budget in seconds")
+    parser.add_argument("--workers", "-j", type=int, default=None,
+                        help="the maximum number of algorithms running at the same time")
+
+    args = parser.parse_args()
+    try:
+        main(args)
+    except KeyboardInterrupt:
+        print("Goodbye!!")
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Callable, Generic, Iterable, List, TypeVar, Union
+from typing import Callable, Generic, Iterable, List, Optional, Tuple, TypeVar, Union
 from helpers.utils import CacheContainer, with_cache
 
 # S and A are used for generic typing where S represents the state type and A represents the action type
@@ -34,8 +34,22 @@ class Problem(ABC, Generic[S, A], CacheContainer):
     def get_cost(self, state: S, action: A) -> float:
         return 1.0
 
+    # (Optional) This function returns the goal states if they are known in advance
+    # It is used by the bidirectional search algorithms; None means that the goal states are unknown
+    def get_goal_states(self) -> Optional[Iterable[S]]:
+        return None
+
+    # (Optional) Given a state, this function returns pairs (predecessor, action)
+    # where applying the action to the predecessor gives the given state
+    # It is used by the bidirectional search algorithms; None means that the problem cannot be searched backward
+    def get_predecessors(self, state: S) -> Optional[Iterable[Tuple[S, A]]]:
+        return None
+
 # These are type aliases for:
 # A solution which is a list of actions (or None if no solution is found)
 Solution = Union[List[A], None]
 # A heuristic function which estimates the path cost to the goal for a given state with a certain problem
-HeuristicFunction = Callable[[Problem[S, A], S],float]
\ No newline at end of file
+HeuristicFunction = Callable[[Problem[S, A], S],float]
+# A reverse heuristic function which estimates the path cost from a source state (the third argument) to a given state (the second argument)
+# It is used by the backward half of the bidirectional search algorithms
+ReverseHeuristicFunction = Callable[[Problem[S, A], S, S],float]
\ No newline at end of file
@@ -0,0 +1,300 @@
+from collections import deque
+from multiprocessing.pool import Pool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse, json, os, socketserver, sys, threading, time
+
+from compact_graph import CompactGraph, CompactGraphRoutingProblem
+from graph_landmarks import compact_graph_of, get_graph_landmarks
+from heuristic_cache import LRUHeuristicCache
+from search_stats import SearchStats
+from search_tree import SearchTree
+from solver import HEURISTICS, get_search_function, load_problem, path_cost
+
+# This file contains a routing service that loads a graph once and answers many shortest path queries on it
+#
+# The graph (a GraphRoutingProblem json file or any file supported by CompactGraph) is converted into a CompactGraph,
+# and every query is solved as a CompactGraphRoutingProblem on the shared graph by a pool of worker processes.
+# The preprocessed data of the graph (the landmark tables of the "alt" heuristic) is computed before the workers start,
+# so the workers share it instead of computing it again.
+#
+# The service keeps two bounded LRU caches:
+# - the results of the recent queries (keyed by the start and the goal)
+# - the shortest path trees of the recent start nodes: every node on an optimal path from the start is reached optimally
+#   by the prefix of the path, so the union of the paths found from a start answers the queries to any node on them
+# Since the cached paths must be optimal, only the optimal search algorithms can be used by the service.
+#
+# The queries are read as lines of the form "<start> <goal>" (the node names) from stdin or from the clients of a local socket,
+# and each answer is written as a json line. The line "stats" writes the latency percentiles and the cache statistics instead.
+#
+# Example:
+#   python route_server.py graphs/graph2.json -hf alt -j 4 < queries.txt
+#   python route_server.py roads.edges --listen 127.0.0.1:5050
+
+# The search algorithms that can be used by the service (they must return the optimal paths)
+SERVICE_ALGORITHMS = ["astar", "ucs", "biastar", "biucs"]
+
+# The number of recent latencies used to compute the percentiles
+LATENCY_WINDOW = 100000
+
+# The graph and the search function of the worker process (they are set by _init_worker)
+_worker_graph: Optional[CompactGraph] = None
+_worker_search: Optional[Callable] = None
+
+def _init_worker(graph: CompactGraph, search_fn: Callable):
+    global _worker_graph, _worker_search
+    _worker_graph, _worker_search = graph, search_fn
+
+# This function runs in the worker process. It solves one query and returns the path (as node ids), its cost and the number of expanded nodes
+def _route_worker(start: int, goal: int) -> Tuple[Optional[List[int]], Optional[float], int]:
+    problem = CompactGraphRoutingProblem(_worker_graph, start, goal)
+    stats = SearchStats()
+    path = _worker_search(problem, start, stats=stats)
+    if path is None: return None, None, stats.expanded
+    return list(path), path_cost(problem, path), stats.expanded
+
+# The optimal paths found from a start node, merged into one tree
+class _ShortestPathTree:
+    def __init__(self, root: int) -> None:
+        self.tree = SearchTree(root)
+        self.costs: Dict[int, float] = {root: 0} # The optimal cost of every node in the tree
+
+    # Adds the nodes of an optimal path from the root to the tree
+    def add(self, graph: CompactGraph, path: List[int]) -> None:
+        state, cost = self.tree.root, 0
+        for node in path:
+            cost += graph.edge_cost(state, node)
+            if node in self.costs:
+                # The node is already reached by another optimal path, which is kept
+                cost = self.costs[node]
+            else:
+                self.tree.add(node, state, node)
+                self.costs[node] = cost
+            state = node
+
+class RoutingService:
+    def __init__(self, graph: CompactGraph, algorithm: str = "astar", heuristic: Optional[str] = None, workers: Optional[int] = None,
+                 result_cache_size: int = 4096, tree_cache_size: int = 256) -> None:
+        if algorithm not in SERVICE_ALGORITHMS:
+            raise ValueError(f"The routing service needs an optimal search algorithm, got '{algorithm}'")
+        self.graph = graph
+        if heuristic == "alt" or (heuristic is None and HEURISTICS["compact_graph"][0] == "alt"):
+            get_graph_landmarks(graph) # Preprocess the graph once, so that the workers inherit the landmarks
+        search_fn = get_search_function(algorithm, "compact_graph", heuristic)
+        self._pool = Pool(workers or os.cpu_count() or 1, initializer=_init_worker, initargs=(graph, search_fn))
+        # The caches of the results (keyed by the start and goal node ids) and of the shortest path trees (keyed by the start node id)
+        # (the bounded caches of heuristic_cache.py can hold any values)
+        self._results = LRUHeuristicCache(result_cache_size)
+        self._trees = LRUHeuristicCache(tree_cache_size)
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._queries = 0
+        # The lock protects the caches and the statistics, since the answers arrive on the threads of the pool
+        self._lock = threading.Lock()
+        # The callbacks of the queries that are being solved (keyed by the start and goal node ids)
+        # A query that is submitted while the same query is being solved waits for its answer instead of being solved again
+        self._in_flight: Dict[Tuple[int, int], List[Callable[[Dict[str, Any]], None]]] = {}
+        self._idle = threading.Condition(self._lock)
+
+    # Looks up the answer of a query in the caches (the lock must be held)
+    def _lookup(self, start: int, goal: int) -> Optional[Dict[str, Any]]:
+        result = self._results.get((start, goal))
+        if result is not None:
+            return dict(result, cached="result")
+        # A tree only counts as a hit if it reaches the goal
+        tree: Optional[_ShortestPathTree] = self._trees.peek(start)
+        if tree is None or goal not in tree.costs:
+            self._trees.misses += 1
+            return None
+        self._trees.get(start)
+        return {"path": tree.tree.path(goal), "cost": tree.costs[goal], "expanded": 0, "cached": "tree"}
+
+    # Stores the answer of a query in the caches (the lock must be held)
+    def _store(self, start: int, goal: int, path: Optional[List[int]], cost: Optional[float], expanded: int) -> None:
+        self._results.put((start, goal), {"path": path, "cost": cost, "expanded": expanded})
+        if path is None: return
+        tree: Optional[_ShortestPathTree] = self._trees.peek(start)
+        if tree is None:
+            tree = _ShortestPathTree(start)
+            self._trees.put(start, tree)
+        tree.add(self.graph, path)
+
+    # Completes the answer of a query: converts the node ids to names and records the latency
+    def _respond(self, received: float, start: str, goal: str, answer: Dict[str, Any]) -> Dict[str, Any]:
+        response = {"start": start, "goal": goal}
+        if "error" in answer:
+            response.update(status="error", error=answer["error"])
+        else:
+            path = answer["path"]
+            response.update(
+                status="no solution" if path is None else "solved",
+                path=None if path is None else [self.graph.names[node] for node in path],
+                cost=answer["cost"],
+                expanded=answer["expanded"],
+                cached=answer.get("cached"),
+            )
+        response["latency"] = time.perf_counter() - received
+        with self._lock:
+            self._latencies.append(response["latency"])
+            self._queries += 1
+        return response
+
+    # Solves a query in the background and calls the callback with its answer
+    # (the callback may be called on another thread, or before this function returns if the answer is cached)
+    def submit(self, start: str, goal: str, callback: Callable[[Dict[str, Any]], None]) -> None:
+        received = time.perf_counter()
+        try:
+            start_id, goal_id = self.graph.node_id(start), self.graph.node_id(goal)
+        except KeyError as error:
+            callback(self._respond(received, start, goal, {"error": f"Unknown node {error}"}))
+            return
+        query = (start_id, goal_id)
+        respond = lambda answer: callback(self._respond(received, start, goal, answer))
+        with self._lock:
+            answer = self._lookup(start_id, goal_id)
+            if answer is None:
+                waiting = self._in_flight.get(query)
+                if waiting is not None:
+                    waiting.append(respond)
+                    return
+                self._in_flight[query] = [respond]
+        if answer is not None:
+            respond(answer)
+            return
+
+        def finish(answer: Dict[str, Any]):
+            with self._lock:
+                waiting = self._in_flight.pop(query)
+                self._idle.notify_all()
+            for respond in waiting:
+                respond(answer)
+
+        def solved(result):
+            path, cost, expanded = result
+            with self._lock:
+                self._store(start_id, goal_id, path, cost, expanded)
+            finish({"path": path, "cost": cost, "expanded": expanded})
+
+        self._pool.apply_async(_route_worker, query, callback=solved, error_callback=lambda error: finish({"error": repr(error)}))
+
+    # Solves a query and waits for its answer
+    def route(self, start: str, goal: str) -> Dict[str, Any]:
+        answers = []
+        done = threading.Event()
+        def receive(answer):
+            answers.append(answer)
+            done.set()
+        self.submit(start, goal, receive)
+        done.wait()
+        return answers[0]
+
+    # Waits until all the submitted queries are answered
+    def wait(self) -> None:
+        with self._idle:
+            while self._in_flight:
+                self._idle.wait()
+
+    # Returns the latency percentiles (in seconds) of the recent queries and the statistics of the caches
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            results, trees = self._results.to_dict(), self._trees.to_dict()
+            queries = self._queries
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies: return None
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+        return {
+            "queries": queries,
+            "latency": {"p50": percentile(0.5), "p90": percentile(0.9), "p99": percentile(0.99),
+                        "max": latencies[-1] if latencies else None},
+            "result_cache": results,
+            "tree_cache": trees,
+        }
+
+    def close(self) -> None:
+        self._pool.close()
+        self._pool.join()
+
+# Returns the json line of the answer to a line of input that is not a query (the line "stats" or an invalid line)
+def _command_answer(service: RoutingService, line: str) -> str:
+    if line.split() == ["stats"]:
+        return json.dumps(service.report())
+    return json.dumps({"status": "error", "error": f"Invalid query '{line.strip()}', expected '<start> <goal>' or 'stats'"})
+
+# Answers the queries from stdin (the answers are written as soon as they are ready, so they may be out of order)
+def serve_stdin(service: RoutingService) -> None:
+    lock = threading.Lock()
+    def write(text: str):
+        with lock:
+            sys.stdout.write(text + '\n')
+            sys.stdout.flush()
+    for line in sys.stdin:
+        fields = line.split()
+        if len(fields) == 2:
+            service.submit(fields[0], fields[1], lambda answer: write(json.dumps(answer)))
+        elif fields:
+            write(_command_answer(service, line))
+    service.wait()
+
+# Answers the queries from the clients of a local socket (a TCP address "host:port" or the path of a unix socket)
+# Every client is served by its own thread, and its queries are answered in order
+def serve_socket(service: RoutingService, address: str) -> None:
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                line = line.decode()
+                fields = line.split()
+                if not fields: continue
+                answer = json.dumps(service.route(fields[0], fields[1])) if len(fields) == 2 else _command_answer(service, line)
+                self.wfile.write((answer + '\n').encode())
+                self.wfile.flush()
+    if ':' in address:
+        host, port = address.rsplit(':', 1)
+        server = socketserver.ThreadingTCPServer((host, int(port)), Handler)
+    else:
+        if os.path.exists(address): os.remove(address)
+        server = socketserver.ThreadingUnixStreamServer(address, Handler)
+    server.daemon_threads = True
+    print(f"Listening on {address}", file=sys.stderr)
+    with server:
+        server.serve_forever()
+
+def main(args: argparse.Namespace):
+    start = time.time()
+    problem_type, problem = load_problem(args.graph, args.problem)
+    if problem_type not in ("graph", "compact_graph"):
+        raise ValueError(f"The routing service needs a graph, got a {problem_type} level")
+    graph = compact_graph_of(problem)
+    service = RoutingService(graph, args.algorithm, args.heuristic, args.workers, args.result_cache_size, args.tree_cache_size)
+    print(f"Loaded {len(graph)} nodes and {graph.edge_count} edges in {time.time() - start:.3f} seconds", file=sys.stderr)
+    try:
+        if args.listen is None:
+            serve_stdin(service)
+        else:
+            serve_socket(service, args.listen)
+    finally:
+        print(json.dumps(service.report()), file=sys.stderr)
+        service.close()
+
+if __name__ == "__main__":
+    # Read the arguments from the command line
+    parser = argparse.ArgumentParser(description="Answer shortest path queries on a graph that is loaded once")
+    parser.add_argument("graph", help="path to the graph (a json graph or an edge list)")
+    parser.add_argument("--problem", "-p", default=None, choices=["graph", "compact_graph"],
+                        help="the type of the graph file (detected from the file if not given)")
+    parser.add_argument("--algorithm", "-a", default="astar", choices=SERVICE_ALGORITHMS,
+                        help="the search algorithm")
+    parser.add_argument("--heuristic", "-hf", default=None, choices=HEURISTICS["compact_graph"],
+                        help="the heuristic used by the informed algorithms")
+    parser.add_argument("--workers", "-j", type=int, default=None,
+                        help="the number of worker processes")
+    parser.add_argument("--result-cache-size", type=int, default=4096,
+                        help="the maximum number of cached query results")
+    parser.add_argument("--tree-cache-size", type=int, default=256,
+                        help="the maximum number of cached shortest path trees (one per start node)")
+    parser.add_argument("--listen", "-l", default=None,
+                        help="serve the clients of a local socket (host:port or the path of a unix socket) instead of stdin")
+
+    args = parser.parse_args()
+    try:
+        main(args)
+    except KeyboardInterrupt:
+        print("Goodbye!!")
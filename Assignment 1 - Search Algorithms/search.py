@@ -1,5 +1,9 @@
-from problem import HeuristicFunction, Problem, S, A, Solution
-from collections import deque
+from problem import HeuristicFunction, Problem, ReverseHeuristicFunction, S, A, Solution
+from frontier import PriorityFrontier, QueueFrontier, StackFrontier
+from search_tree import SearchTree
+from search_stats import SearchStats
+from typing import Callable, Dict, List, Optional, Tuple
+import itertools, math, time
 from helpers import utils
 
 #TODO: Import any modules you want to use
@@ -12,21 +16,36 @@ from helpers import utils
 # 1. A list of actions which represent the path from the initial state to the final state
 # 2. None if there is no solution
 
-def BreadthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
+# All the search functions also take two optional arguments:
+# - tree: a search tree which is filled by the search (to read the states along the solution path after the search)
+# - stats: a SearchStats object which is filled with the counts and the times of the search work (see search_stats.py)
+
+# Wraps the problem, the heuristic, the frontier and the explored set (if given) in their instrumented versions if a stats object is given
+def _instrument(stats: Optional[SearchStats], problem, heuristic, frontier=None, explored_set=None):
+    if stats is None: return problem, heuristic, frontier, explored_set
+    problem, heuristic = stats.instrument(problem, heuristic)
+    if explored_set is not None: explored_set = stats.track_explored(explored_set)
+    if frontier is not None: frontier = stats.track_frontier(frontier, explored_set)
+    return problem, heuristic, frontier, explored_set
+
+def BreadthFirstSearch(problem: Problem[S, A], initial_state: S, tree: Optional[SearchTree] = None,
+                       stats: Optional[SearchStats] = None) -> Solution:
     
-    # A double-end queue which holds the states to be expanded (FIFO queue)
+    # A FIFO queue which holds the states to be expanded with O(1) membership checks
     # It initially contains the initial state 
-    frontier = deque([initial_state])
+    frontier = QueueFrontier([initial_state])
 
     # A set which holds all the previously explored states
     explored_set = set({})
 
-    # A dictionary (hash table) to the store the path from the initial state to the current state
-    actions = dict({initial_state: list([])})
+    # The search tree which stores the parent and the action of every generated state to retrieve the path later
+    # If a tree is given by the caller, it is filled so that it can be used after the search
+    if tree is None: tree = SearchTree(initial_state)
+    problem, _, frontier, explored_set = _instrument(stats, problem, None, frontier, explored_set)
     
     while len(frontier):
         # The node to be expanded (the first node of the frontier)
-        node = frontier.popleft()
+        node = frontier.pop()
         
         # Add the node to be expanded to the explored set
         explored_set.add(node)
@@ -34,7 +53,8 @@ def BreadthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
         # If the curent node's state is goal state then return the sequence of actions to 
         # go from the initial state to the current (goal) state
         if problem.is_goal(node):
-            return actions[node]
+            tree.goal = node
+            return tree.path(node)
         
         
         # Loop over all the possible actions of the current state
@@ -44,27 +64,29 @@ def BreadthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
             # Check if the child node is not in the frontier and also not in the explored set
             # to prevent expansion of the same node more than one time
             if child_node not in frontier and child_node not in explored_set:
-                frontier.append(child_node)
+                frontier.push(child_node)
 
-                # Update the path of the child node so that it contains the actions of the parent
-                # node plus the action between the parent node and the child node
-                child_node_actions = actions[node].copy()
-                child_node_actions.append(action)
-                actions[child_node] = child_node_actions
+                # Store the parent node and the action between the parent node and the child node
+                tree.add(child_node, node, action)
+            elif stats is not None:
+                stats.duplicates += 1
                 
     # Return none if there is no found solution
     return None
 
-def DepthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
-    # A double-end queue which holds the states to be expanded (FIFO queue)
+def DepthFirstSearch(problem: Problem[S, A], initial_state: S, tree: Optional[SearchTree] = None,
+                     stats: Optional[SearchStats] = None) -> Solution:
+    # A LIFO stack which holds the states to be expanded with O(1) membership checks
     # It initially contains the initial state 
-    frontier = deque([initial_state])
+    frontier = StackFrontier([initial_state])
 
     # A set which holds all the previously explored states
     explored_set = set({})
 
-    # A dictionary (hash table) to the store the path from the initial state to the current state
-    actions = dict({initial_state: list([])})
+    # The search tree which stores the parent and the action of every generated state to retrieve the path later
+    # If a tree is given by the caller, it is filled so that it can be used after the search
+    if tree is None: tree = SearchTree(initial_state)
+    problem, _, frontier, explored_set = _instrument(stats, problem, None, frontier, explored_set)
     
     while len(frontier):
         # The node to be expanded (the last node of the frontier)
@@ -76,7 +98,8 @@ def DepthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
         # If the curent node's state is goal state then return the sequence of actions to 
         # go from the initial state to the current (goal) state
         if problem.is_goal(node):
-            return actions[node]
+            tree.goal = node
+            return tree.path(node)
         
         
         # Loop over all the possible actions of the current state
@@ -86,37 +109,35 @@ def DepthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
             # Check if the child node is not in the frontier and also not in the explored set
             # to prevent expansion of the same node more than one time
             if child_node not in frontier and child_node not in explored_set:
-                frontier.append(child_node)
+                frontier.push(child_node)
 
-                # Update the path of the child node so that it contains the actions of the parent
-                # node plus the action between the parent node and the child node
-                child_node_actions = actions[node].copy()
-                child_node_actions.append(action)
-                actions[child_node] = child_node_actions
+                # Store the parent node and the action between the parent node and the child node
+                tree.add(child_node, node, action)
+            elif stats is not None:
+                stats.duplicates += 1
                 
     # Return none if there is no found solution
     return None
     
-def UniformCostSearch(problem: Problem[S, A], initial_state: S) -> Solution:
+def UniformCostSearch(problem: Problem[S, A], initial_state: S, tree: Optional[SearchTree] = None,
+                      stats: Optional[SearchStats] = None) -> Solution:
 
-    # A dictionary (hash table) that holds the states to be expanded (key), and the path cost (value)
-    frontier = dict({initial_state: 0})
+    # A priority queue that holds the states to be expanded with the path cost as their priority
+    frontier = PriorityFrontier()
     
     # A set which holds all the previously explored states
     explored_set = set({})
     
-    # A dictionary (hash table) to the store the path from the initial state to the current state
-    # The key is the state, the value is a list of actions from initial state to current state
-    actions = dict({initial_state: list([])})
+    # The search tree which stores the parent and the action of every generated state to retrieve the path later
+    # If a tree is given by the caller, it is filled so that it can be used after the search
+    if tree is None: tree = SearchTree(initial_state)
+    problem, _, frontier, explored_set = _instrument(stats, problem, None, frontier, explored_set)
+    frontier.push(initial_state, 0)
     
     while len(frontier):
         
-        # The node to be expanded (the one with the lowest path cost)
-        node = list(frontier.keys())[0]
-        node_cost = frontier[node]
-        
-        # Remove the node form the frontier
-        frontier.pop(node)
+        # The node to be expanded (the one with the lowest path cost) is removed from the frontier
+        node, node_cost = frontier.pop_with_priority()
         
         # Add the node to be expanded to the explored set
         explored_set.add(node)
@@ -124,7 +145,8 @@ def UniformCostSearch(problem: Problem[S, A], initial_state: S) -> Solution:
         # If the curent node's state is goal state then return the sequence of actions to 
         # go from the initial state to the current (goal) state
         if problem.is_goal(node):
-            return actions[node]
+            tree.goal = node
+            return tree.path(node)
         
         # Loop over all the possible actions of the current state
         for action in problem.get_actions(node):
@@ -137,41 +159,39 @@ def UniformCostSearch(problem: Problem[S, A], initial_state: S) -> Solution:
             # to prevent expansion of the same node more than one time
             # Or the node exists in the frontier with larger path cost
             if (child_node not in frontier and child_node not in explored_set) \
-            or (child_node in frontier and action_cost < frontier[child_node]):
-                # Add the child node to the frontier
-                frontier[child_node] = action_cost
+            or (child_node in frontier and action_cost < frontier.priority(child_node)):
+                # Add the child node to the frontier (or update its path cost)
+                frontier.push(child_node, action_cost)
                 
-                # Sort the frontier according to the path cost after adding the child node
-                # Reference: https://realpython.com/sort-python-dictionary/
-                frontier = dict(sorted(frontier.items(), key = lambda item: item[1]))
-                
-                # Update the path of the child node so that it contains the actions of the parent
-                # node plus the action between the parent node and the child node
-                child_node_actions = actions[node].copy()
-                child_node_actions.append(action)
-                actions[child_node] = child_node_actions
+                # Store the parent node and the action between the parent node and the child node
+                tree.add(child_node, node, action)
+            elif stats is not None:
+                stats.duplicates += 1
                 
     # Return none if there is no found solution
     return None
 
-def AStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction) -> Solution:
-    # A dictionary (hash table) that holds the states to be expanded (key), and the path cost (value)
-    frontier = dict({initial_state: 0})
+def AStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, tree: Optional[SearchTree] = None,
+                stats: Optional[SearchStats] = None) -> Solution:
+    # A priority queue that holds the states to be expanded with the path cost plus the heuristic as their priority
+    frontier = PriorityFrontier()
+    
+    # A dictionary (hash table) that holds the path cost of every state in the frontier
+    path_costs = dict({initial_state: 0})
     
     # A set which holds all the previously explored states
     explored_set = set({})
     
-    # A dictionary (hash table) to the store the path from the initial state to the current state
-    # The key is the state, the value is a list of actions from initial state to current state
-    actions = dict({initial_state: list([])})
+    # The search tree which stores the parent and the action of every generated state to retrieve the path later
+    # If a tree is given by the caller, it is filled so that it can be used after the search
+    if tree is None: tree = SearchTree(initial_state)
+    problem, heuristic, frontier, explored_set = _instrument(stats, problem, heuristic, frontier, explored_set)
+    frontier.push(initial_state, heuristic(problem, initial_state))
     
     while len(frontier):
-        # The node to be expanded (the one with the lowest path cost)
-        node = list(frontier.keys())[0]
-        node_cost = frontier[node]
-        
-        # Remove the node form the frontier
-        frontier.pop(node)
+        # The node to be expanded (the one with the lowest path cost plus heuristic) is removed from the frontier
+        node = frontier.pop()
+        node_cost = path_costs.pop(node)
         
         # Add the node to be expanded to the explored set
         explored_set.add(node)
@@ -179,7 +199,8 @@ def AStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFu
         # If the curent node's state is goal state then return the sequence of actions to 
         # go from the initial state to the current (goal) state
         if problem.is_goal(node):
-            return actions[node]
+            tree.goal = node
+            return tree.path(node)
         
         # Loop over all the possible actions of the current state
         for action in problem.get_actions(node):
@@ -192,42 +213,38 @@ def AStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFu
             # to prevent expansion of the same node more than one time
             # Or the node exists in the frontier with larger path cost
             if (child_node not in frontier and child_node not in explored_set) \
-            or (child_node in frontier and action_cost < frontier[child_node]):
-                
-                frontier[child_node] = action_cost
+            or (child_node in frontier and action_cost < path_costs[child_node]):
+                # Add the child node to the frontier (or update its priority)
+                # The heuristic is only evaluated once for every push
+                path_costs[child_node] = action_cost
+                frontier.push(child_node, action_cost + heuristic(problem, child_node))
                 
-                # Sort the frontier according to the path cost after adding the child node
-                # Reference: https://realpython.com/sort-python-dictionary/
-                frontier = dict(sorted(frontier.items(), 
-                                       key = lambda k: k[1] + heuristic(problem, k[0])))
-                
-                # Update the path of the child node so that it contains the actions of the parent
-                # node plus the action between the parent node and the child node
-                child_node_actions = actions[node].copy()
-                child_node_actions.append(action)
-                actions[child_node] = child_node_actions
+                # Store the parent node and the action between the parent node and the child node
+                tree.add(child_node, node, action)
+            elif stats is not None:
+                stats.duplicates += 1
                 
     # Return none if there is no found solution
     return None
 
-def BestFirstSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction) -> Solution:
+def BestFirstSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, tree: Optional[SearchTree] = None,
+                    stats: Optional[SearchStats] = None) -> Solution:
     
-    # A dictionary (hash table) that holds the states to be expanded (key), and the path cost (value)
-    frontier = dict({initial_state: 0})
+    # A priority queue that holds the states to be expanded with the heuristic as their priority
+    frontier = PriorityFrontier()
     
     # A set which holds all the previously explored states
     explored_set = set({})
     
-    # A dictionary (hash table) to the store the path from the initial state to the current state
-    # The key is the state, the value is a list of actions from initial state to current state
-    actions = dict({initial_state: list([])})
+    # The search tree which stores the parent and the action of every generated state to retrieve the path later
+    # If a tree is given by the caller, it is filled so that it can be used after the search
+    if tree is None: tree = SearchTree(initial_state)
+    problem, heuristic, frontier, explored_set = _instrument(stats, problem, heuristic, frontier, explored_set)
+    frontier.push(initial_state, 0)
     
     while len(frontier):
-        # The node to be expanded (the one with the lowest path cost)
-        node = list(frontier.keys())[0]
-        
-        # Remove the node form the frontier
-        frontier.pop(node)
+        # The node to be expanded (the one with the lowest heuristic) is removed from the frontier
+        node = frontier.pop()
         
         # Add the node to be expanded to the explored set
         explored_set.add(node)
@@ -235,7 +252,8 @@ def BestFirstSearch(problem: Problem[S, A], initial_state: S, heuristic: Heurist
         # If the curent node's state is goal state then return the sequence of actions to 
         # go from the initial state to the current (goal) state
         if problem.is_goal(node):
-            return actions[node]
+            tree.goal = node
+            return tree.path(node)
 
         # Loop over all the possible actions of the current state
         for action in problem.get_actions(node):
@@ -248,18 +266,495 @@ def BestFirstSearch(problem: Problem[S, A], initial_state: S, heuristic: Heurist
             # to prevent expansion of the same node more than one time
             # Or the node exists in the frontier with larger path cost
             if (child_node not in frontier and child_node not in explored_set) \
-            or (child_node in frontier and action_cost < frontier[child_node]):
-                frontier[child_node] = action_cost
-                
-                # Sort the frontier according to the path cost after adding the child node
-                # Reference: https://realpython.com/sort-python-dictionary/
-                frontier = dict(sorted(frontier.items(), key = lambda k: k[1]))
+            or (child_node in frontier and action_cost < frontier.priority(child_node)):
+                frontier.push(child_node, action_cost)
                 
-                # Update the path of the child node so that it contains the actions of the parent
-                # node plus the action between the parent node and the child node
-                child_node_actions = actions[node].copy()
-                child_node_actions.append(action)
-                actions[child_node] = child_node_actions
+                # Store the parent node and the action between the parent node and the child node
+                tree.add(child_node, node, action)
+            elif stats is not None:
+                stats.duplicates += 1
                 
     # Return none if there is no found solution
-    return None
\ No newline at end of file
+    return None
+
+# The bidirectional search functions search forward from the initial state and backward from the goal states at the same time
+# They require the problem to implement the optional "get_goal_states" and "get_predecessors" hooks
+# If the problem does not implement them, they fall back to the corresponding unidirectional search
+
+# Returns the goal states of the problem if it can be searched backward (otherwise, it returns None)
+def _backward_search_goals(problem: Problem[S, A]):
+    goals = problem.get_goal_states()
+    if goals is None: return None
+    goals = list(goals)
+    if not goals or problem.get_predecessors(goals[0]) is None: return None
+    return goals
+
+# Joins the forward path to the meeting state with the backward path from the meeting state to the goal
+# The states along the backward path are added to the search tree so that the tree contains the whole solution
+def _join_paths(tree: SearchTree, toward_goal: Dict[S, Tuple[A, S]], meeting_state: S) -> Solution:
+    state = meeting_state
+    while state in toward_goal:
+        action, next_state = toward_goal[state]
+        tree.add(next_state, state, action)
+        state = next_state
+    tree.goal = state
+    return tree.path(state)
+
+def BidirectionalBFS(problem: Problem[S, A], initial_state: S, tree: Optional[SearchTree] = None,
+                     stats: Optional[SearchStats] = None) -> Solution:
+    goals = _backward_search_goals(problem)
+    if goals is None:
+        return BreadthFirstSearch(problem, initial_state, tree, stats)
+
+    if tree is None: tree = SearchTree(initial_state)
+    # The layers are plain lists, so only the problem is instrumented and the peaks are measured after every layer
+    problem, _, _, _ = _instrument(stats, problem, None)
+    if problem.is_goal(initial_state):
+        tree.goal = initial_state
+        return []
+
+    # The number of actions from the initial state to every reached state (forward)
+    # and from every reached state to the nearest goal (backward)
+    forward_depths = dict({initial_state: 0})
+    backward_depths = {goal: 0 for goal in goals}
+    # For every state reached backward, this stores the action to apply and the next state toward the goal
+    toward_goal: Dict[S, Tuple[A, S]] = {}
+
+    # The frontiers hold the last layer reached in each direction
+    forward_layer = [initial_state]
+    backward_layer = list(goals)
+
+    while forward_layer and backward_layer:
+        # The best meeting state found in this layer and the length of the path through it
+        meeting_state, best_length = None, math.inf
+        # Expand a whole layer of the direction with the smaller frontier
+        if len(forward_layer) <= len(backward_layer):
+            next_layer = []
+            for node in forward_layer:
+                for action in problem.get_actions(node):
+                    child_node = problem.get_successor(node, action)
+                    if child_node in forward_depths:
+                        if stats is not None: stats.duplicates += 1
+                        continue
+                    forward_depths[child_node] = forward_depths[node] + 1
+                    tree.add(child_node, node, action)
+                    next_layer.append(child_node)
+                    # Check if the child was already reached by the backward search
+                    if child_node in backward_depths:
+                        length = forward_depths[child_node] + backward_depths[child_node]
+                        if length < best_length:
+                            meeting_state, best_length = child_node, length
+            forward_layer = next_layer
+        else:
+            next_layer = []
+            for node in backward_layer:
+                for parent_node, action in problem.get_predecessors(node):
+                    if parent_node in backward_depths:
+                        if stats is not None: stats.duplicates += 1
+                        continue
+                    backward_depths[parent_node] = backward_depths[node] + 1
+                    toward_goal[parent_node] = (action, node)
+                    next_layer.append(parent_node)
+                    # Check if the parent was already reached by the forward search
+                    if parent_node in forward_depths:
+                        length = forward_depths[parent_node] + backward_depths[parent_node]
+                        if length < best_length:
+                            meeting_state, best_length = parent_node, length
+            backward_layer = next_layer
+        if stats is not None:
+            stats.update_peaks(len(forward_layer) + len(backward_layer), len(forward_depths) + len(backward_depths))
+        # Since a whole layer was expanded, the best meeting state of the layer lies on a shortest path
+        if meeting_state is not None:
+            return _join_paths(tree, toward_goal, meeting_state)
+
+    # Return none if there is no found solution
+    return None
+
+def BidirectionalAStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction,
+                             tree: Optional[SearchTree] = None,
+                             reverse_heuristic: Optional[ReverseHeuristicFunction] = None,
+                             stats: Optional[SearchStats] = None) -> Solution:
+    goals = _backward_search_goals(problem)
+    if goals is None:
+        return AStarSearch(problem, initial_state, heuristic, tree, stats)
+
+    if tree is None: tree = SearchTree(initial_state)
+    # Without a reverse heuristic, the backward search is a uniform cost search
+    if reverse_heuristic is None: reverse_heuristic = lambda *_: 0
+
+    # The path cost of every reached state from the initial state (forward) and to the nearest goal (backward)
+    forward_costs = dict({initial_state: 0})
+    backward_costs = {goal: 0 for goal in goals}
+    # For every state reached backward, this stores the action to apply and the next state toward the goal
+    toward_goal: Dict[S, Tuple[A, S]] = {}
+
+    # Each direction uses a front-to-end heuristic: the forward search estimates the cost to the goal
+    # and the backward search estimates the cost from the initial state
+    forward_frontier, backward_frontier = PriorityFrontier(), PriorityFrontier()
+    forward_explored, backward_explored = set(), set()
+    problem, heuristic, forward_frontier, forward_explored = _instrument(stats, problem, heuristic, forward_frontier, forward_explored)
+    if stats is not None:
+        backward_explored = stats.track_explored(backward_explored)
+        backward_frontier = stats.track_frontier(backward_frontier, backward_explored)
+    forward_frontier.push(initial_state, heuristic(problem, initial_state))
+    for goal in goals:
+        backward_frontier.push(goal, reverse_heuristic(problem, goal, initial_state))
+
+    # The cost of the best path found so far and the state where the two searches met on it
+    best_cost, meeting_state = math.inf, None
+    if initial_state in backward_costs:
+        best_cost, meeting_state = 0, initial_state
+
+    while len(forward_frontier) and len(backward_frontier):
+        # Every path that is cheaper than the best path must pass through a state in each frontier,
+        # so if any frontier's lowest priority reaches the best cost, the best path is optimal
+        if best_cost <= max(forward_frontier.peek_priority(), backward_frontier.peek_priority()):
+            break
+        # Expand a node from the direction with the smaller frontier
+        if len(forward_frontier) <= len(backward_frontier):
+            node = forward_frontier.pop()
+            forward_explored.add(node)
+            for action in problem.get_actions(node):
+                child_node = problem.get_successor(node, action)
+                cost = math.inf if child_node in forward_explored else forward_costs[node] + problem.get_cost(node, action)
+                if cost >= forward_costs.get(child_node, math.inf):
+                    if stats is not None: stats.duplicates += 1
+                else:
+                    forward_costs[child_node] = cost
+                    forward_frontier.push(child_node, cost + heuristic(problem, child_node))
+                    tree.add(child_node, node, action)
+                    # Check if the child was already reached by the backward search
+                    if child_node in backward_costs and cost + backward_costs[child_node] < best_cost:
+                        best_cost, meeting_state = cost + backward_costs[child_node], child_node
+        else:
+            node = backward_frontier.pop()
+            backward_explored.add(node)
+            for parent_node, action in problem.get_predecessors(node):
+                cost = math.inf if parent_node in backward_explored else backward_costs[node] + problem.get_cost(parent_node, action)
+                if cost >= backward_costs.get(parent_node, math.inf):
+                    if stats is not None: stats.duplicates += 1
+                else:
+                    backward_costs[parent_node] = cost
+                    backward_frontier.push(parent_node, cost + reverse_heuristic(problem, parent_node, initial_state))
+                    toward_goal[parent_node] = (action, node)
+                    # Check if the parent was already reached by the forward search
+                    if parent_node in forward_costs and cost + forward_costs[parent_node] < best_cost:
+                        best_cost, meeting_state = cost + forward_costs[parent_node], parent_node
+
+    if meeting_state is None:
+        # Return none if there is no found solution
+        return None
+    return _join_paths(tree, toward_goal, meeting_state)
+
+def BidirectionalUniformCostSearch(problem: Problem[S, A], initial_state: S, tree: Optional[SearchTree] = None,
+                                   stats: Optional[SearchStats] = None) -> Solution:
+    # A bidirectional uniform cost search is a bidirectional A* search where both heuristics are zero
+    if _backward_search_goals(problem) is None:
+        return UniformCostSearch(problem, initial_state, tree, stats)
+    return BidirectionalAStarSearch(problem, initial_state, lambda *_: 0, tree, stats=stats)
+
+# The memory-bounded search functions have the same signature as AStarSearch (with an extra cap on the nodes held in memory)
+# If a stats object is given:
+#   "reopened" counts the expansions of nodes that were expanded before and had to be expanded again
+#   "peak_explored" is the maximum number of search nodes held in memory at the same time
+
+# Stores the solution path in the search tree and returns it
+def _store_path(tree: SearchTree, path: List[Tuple[S, A]], goal: S) -> Solution:
+    for (state, action), (next_state, _) in zip(path, path[1:] + [(goal, None)]):
+        tree.add(next_state, state, action)
+    tree.goal = goal
+    return [action for _, action in path]
+
+def IterativeDeepeningAStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction,
+                                  tree: Optional[SearchTree] = None,
+                                  stats: Optional[SearchStats] = None,
+                                  max_nodes: int = 100000) -> Solution:
+    if tree is None: tree = SearchTree(initial_state)
+    # The current path is a plain list, so only the problem and the heuristic are instrumented
+    problem, heuristic, _, _ = _instrument(stats, problem, heuristic)
+
+    # Each iteration is a depth first search that does not expand nodes whose f = g + h exceeds the bound
+    # The bound starts as the heuristic of the initial state and is raised to the lowest f that exceeded it
+    bound, previous_bound = heuristic(problem, initial_state), -math.inf
+    solution = None
+    while solution is None:
+        next_bound = math.inf
+        # The current path is a stack of frames [state, path cost, remaining actions, action taken from this state]
+        # Only the states on the current path are stored, so memory grows linearly with the depth
+        stack = [[initial_state, 0, None, None]]
+        on_path = {initial_state}
+        # A bounded transposition table that holds the lowest path cost with which each state was visited in this iteration
+        # Reaching a state again with a higher (or equal) path cost cannot lead to anything new within the bound
+        visited = {initial_state: 0}
+        while stack:
+            frame = stack[-1]
+            state, cost, remaining_actions, _ = frame
+            if remaining_actions is None:
+                f = cost + heuristic(problem, state)
+                if f > bound:
+                    # The node is cut off in this iteration, it decides the bound of the next iteration
+                    next_bound = min(next_bound, f)
+                    on_path.discard(state)
+                    stack.pop()
+                    continue
+                if problem.is_goal(state):
+                    solution = [(frame[0], frame[3]) for frame in stack[:-1]]
+                    break
+                # Nodes within the previous bound were already expanded in the previous iteration
+                if stats is not None and f <= previous_bound: stats.reopened += 1
+                frame[2] = remaining_actions = iter(problem.get_actions(state))
+            # Go to the next child of the current node (skipping the states on the current path to avoid cycles)
+            child_frame = None
+            for action in remaining_actions:
+                child_node = problem.get_successor(state, action)
+                child_cost = math.inf if child_node in on_path else cost + problem.get_cost(state, action)
+                if visited.get(child_node, math.inf) <= child_cost:
+                    if stats is not None: stats.duplicates += 1
+                    continue
+                if child_node in visited or len(visited) < max_nodes:
+                    visited[child_node] = child_cost
+                frame[3] = action
+                child_frame = [child_node, child_cost, None, None]
+                break
+            if child_frame is None:
+                on_path.discard(state)
+                stack.pop()
+            else:
+                on_path.add(child_frame[0])
+                stack.append(child_frame)
+                if stats is not None: stats.update_peaks(len(stack), len(stack) + len(visited))
+        if solution is None:
+            if next_bound == math.inf: break
+            bound, previous_bound = next_bound, bound
+
+    if solution is None:
+        # Return none if there is no found solution
+        return None
+    return _store_path(tree, solution, stack[-1][0])
+
+# A node of the search tree held in memory by SMA*
+class _SMANode:
+    __slots__ = ("state", "parent", "action", "cost", "depth", "f", "children", "forgotten", "expanded")
+
+    def __init__(self, state, parent, action, cost: float, f: float) -> None:
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+        self.depth = 0 if parent is None else parent.depth + 1
+        # The backed-up f value: a lower bound on the cost of any solution through this node
+        self.f = f
+        # The children held in memory (by state)
+        self.children: Dict = {}
+        # The backed-up f value of every child that was forgotten to free memory (by state)
+        self.forgotten: Dict = {}
+        self.expanded = False
+
+    # The lowest f among the forgotten children (infinity if none was forgotten)
+    def forgotten_f(self) -> float:
+        return min(self.forgotten.values(), default=math.inf)
+
+def SMAStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction,
+                  tree: Optional[SearchTree] = None,
+                  stats: Optional[SearchStats] = None,
+                  max_nodes: int = 100000) -> Solution:
+    if tree is None: tree = SearchTree(initial_state)
+    # The cap must leave room for a node and one of its children
+    max_nodes = max(max_nodes, 2)
+    # The open list holds the nodes that have successors to generate:
+    # the nodes that were never expanded (by their f) and the nodes with forgotten children (by their best forgotten f)
+    # Ties are broken in favor of the deepest node
+    open_list = PriorityFrontier()
+    # The open list is tracked as the frontier, the nodes held in memory are counted by the search itself
+    problem, heuristic, open_list, _ = _instrument(stats, problem, heuristic, open_list)
+
+    root = _SMANode(initial_state, None, None, 0, heuristic(problem, initial_state))
+    node_count = 1
+    # A dictionary (hash table) from each state to the node with the lowest path cost that holds it in memory
+    # A successor is not generated if its state is already held in memory with a lower (or equal) path cost
+    in_memory = {initial_state: root}
+    open_list.push(root, (root.f, 0))
+    # The leaves are the candidates for forgetting, the one with the highest f (then the shallowest) is forgotten first
+    leaves = PriorityFrontier()
+
+    # Recomputes the backed-up f of the node and its ancestors after the f of one of their children changed
+    def back_up(node: _SMANode) -> None:
+        while node is not None and node.expanded:
+            f = min([child.f for child in node.children.values()] + [node.forgotten_f()])
+            if f == node.f: break
+            node.f = f
+            if node in leaves: leaves.push(node, (-node.f, node.depth))
+            node = node.parent
+
+    # Adds a child to the node in memory
+    def add_child(node: _SMANode, state: S, action: A, f: float) -> None:
+        nonlocal node_count
+        cost = node.cost + problem.get_cost(node.state, action)
+        other = in_memory.get(state)
+        if other is not None and other.cost <= cost:
+            if stats is not None: stats.duplicates += 1
+            return
+        child = _SMANode(state, node, action, cost, max(cost + heuristic(problem, state), f))
+        node.children[state] = child
+        in_memory[state] = child
+        node_count += 1
+        open_list.push(child, (child.f, -child.depth))
+        leaves.push(child, (-child.f, child.depth))
+
+    solution = None
+    while len(open_list):
+        node, (f, _) = open_list.pop_with_priority()
+        if f == math.inf: break
+        if problem.is_goal(node.state):
+            solution = node
+            break
+        if not node.expanded:
+            node.expanded = True
+            # Generate all the successors (skipping the states on the path to the node to avoid cycles)
+            ancestors, ancestor = set(), node
+            while ancestor is not None:
+                ancestors.add(ancestor.state)
+                ancestor = ancestor.parent
+            # A node at the depth limit cannot hold any child in memory alongside its path, so it is a dead end
+            if node.depth + 1 < max_nodes:
+                for action in problem.get_actions(node.state):
+                    child_node = problem.get_successor(node.state, action)
+                    if child_node in ancestors or child_node in node.children:
+                        if stats is not None: stats.duplicates += 1
+                        continue
+                    add_child(node, child_node, action, node.f)
+        else:
+            if stats is not None: stats.reopened += 1
+            # Regenerate the most promising forgotten children, they keep the f values they had when they were forgotten
+            for action in problem.get_actions(node.state):
+                child_node = problem.get_successor(node.state, action)
+                if node.forgotten.get(child_node) == f:
+                    del node.forgotten[child_node]
+                    add_child(node, child_node, action, f)
+            if node.forgotten:
+                open_list.push(node, (node.forgotten_f(), -node.depth))
+        leaves.remove(node)
+        if not node.children and node is not root:
+            # A node without children in memory becomes a leaf again
+            leaves.push(node, (-node.f, node.depth))
+        # A node without children in memory (nor forgotten children) is a dead end, so its f is backed up to infinity
+        back_up(node)
+        if stats is not None: stats.update_peaks(explored_size=node_count)
+
+        # Forget the worst leaves until the memory cap is respected
+        while node_count > max_nodes and len(leaves):
+            worst = leaves.pop()
+            open_list.remove(worst)
+            parent = worst.parent
+            del parent.children[worst.state]
+            if in_memory.get(worst.state) is worst: del in_memory[worst.state]
+            node_count -= 1
+            # The parent remembers the f of the forgotten child to regenerate it when it becomes promising
+            parent.forgotten[worst.state] = worst.f
+            if worst.f < math.inf:
+                open_list.push(parent, (parent.forgotten_f(), -parent.depth))
+            if not parent.children and parent is not root:
+                leaves.push(parent, (-parent.f, parent.depth))
+            back_up(parent)
+
+    if solution is None:
+        # Return none if there is no found solution
+        return None
+    path, node = [], solution
+    while node.parent is not None:
+        path.append((node.parent.state, node.action))
+        node = node.parent
+    path.reverse()
+    return _store_path(tree, path, solution.state)
+
+# The anytime search function finds a first solution quickly and then keeps improving it until it is optimal or the deadline passes
+# It has the same signature as AStarSearch with these extra arguments:
+# - deadline: the time (as returned by time.perf_counter) after which the search stops improving and returns its best solution
+#             The search never stops before finding its first solution, since returning None would mean that there is no solution
+# - on_solution: a function that is called with every improved solution, its cost and its sub-optimality bound
+#             (the cost of the solution is at most "bound" times the optimal cost)
+# - initial_weight and weight_step: the heuristic weight of the first iteration and how much it is decreased after every iteration
+
+# The function which receives the improved solutions of the anytime search (the solution, its cost and its sub-optimality bound)
+SolutionCallback = Callable[[Solution, float, float], None]
+
+# Anytime Repairing A* (ARA*)
+# It runs a series of weighted A* searches (with the priority g + weight * h) where the weight is decreased after every search
+# Instead of starting over, each search reuses the work of the previous one:
+# - the open list is kept (and its priorities are updated to the new weight)
+# - the states whose cost improved after they were expanded are not expanded again in the same search (they are "inconsistent"),
+#   they are moved to the open list of the next search instead
+# With a consistent heuristic, the solution of the search with weight 1 is optimal
+def AnytimeRepairingAStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction,
+                                tree: Optional[SearchTree] = None,
+                                stats: Optional[SearchStats] = None,
+                                deadline: Optional[float] = None,
+                                on_solution: Optional[SolutionCallback] = None,
+                                initial_weight: float = 2.5,
+                                weight_step: float = 0.5) -> Solution:
+    # A priority queue that holds the states to be expanded with the path cost plus the weighted heuristic as their priority
+    frontier = PriorityFrontier()
+    # A set which holds the states expanded by the current search
+    explored_set = set({})
+    if tree is None: tree = SearchTree(initial_state)
+    problem, heuristic, frontier, explored_set = _instrument(stats, problem, heuristic, frontier, explored_set)
+
+    # The best known path cost of every generated state
+    path_costs = dict({initial_state: 0})
+    # The heuristic of every generated state (it is only evaluated once per state, since the priorities are recomputed for every weight)
+    heuristics = dict({initial_state: heuristic(problem, initial_state)})
+    # The states whose cost improved after they were expanded in the current search
+    inconsistent = set({})
+    # The goal and the cost of the best solution found so far
+    best_goal, best_cost = None, math.inf
+
+    weight = max(1.0, initial_weight)
+    frontier.push(initial_state, weight * heuristics[initial_state])
+    while True:
+        # Expand the states until no state in the open list can lead to a solution cheaper than the best one (with the current weight)
+        improved = False
+        while len(frontier) and frontier.peek_priority() < best_cost:
+            if best_goal is not None and deadline is not None and time.perf_counter() >= deadline:
+                return tree.path(best_goal)
+            node = frontier.pop()
+            node_cost = path_costs[node]
+            if problem.is_goal(node):
+                # The goal is not expanded, it is kept in the open list in case a cheaper path to it is found by the next searches
+                best_goal, best_cost, improved = node, node_cost, True
+                tree.goal = node
+                frontier.push(node, node_cost + weight * heuristics[node])
+                continue
+            explored_set.add(node)
+            for action in problem.get_actions(node):
+                action_cost = node_cost + problem.get_cost(node, action)
+                child_node = problem.get_successor(node, action)
+                if action_cost < path_costs.get(child_node, math.inf):
+                    path_costs[child_node] = action_cost
+                    tree.add(child_node, node, action)
+                    if child_node not in heuristics: heuristics[child_node] = heuristic(problem, child_node)
+                    if child_node in explored_set:
+                        inconsistent.add(child_node)
+                    else:
+                        frontier.push(child_node, action_cost + weight * heuristics[child_node])
+                elif stats is not None:
+                    stats.duplicates += 1
+
+        if best_goal is None:
+            # Return none if there is no found solution (the search with a high weight is complete as well)
+            return None
+        if improved and on_solution is not None:
+            # The optimal cost is at least the lowest unweighted priority of the states that were not expanded yet
+            lower_bound = min((path_costs[state] + heuristics[state] for state in itertools.chain(frontier, inconsistent)), default=best_cost)
+            bound = weight if lower_bound <= 0 else min(weight, best_cost / lower_bound)
+            on_solution(tree.path(best_goal), best_cost, bound)
+        if weight == 1.0:
+            return tree.path(best_goal)
+
+        # Start the next search with a lower weight, reusing the open list and the inconsistent states
+        weight = max(1.0, weight - weight_step)
+        for state in inconsistent:
+            frontier.push(state, 0)
+        inconsistent.clear()
+        explored_set.clear()
+        for state in list(frontier):
+            frontier.push(state, path_costs[state] + weight * heuristics[state])
@@ -0,0 +1,181 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, Tuple
+import json, time
+
+from problem import HeuristicFunction, Problem, S, A
+
+# This file contains the instrumentation of the search functions
+#
+# Every search function takes an optional SearchStats object. If it is given, the search wraps the problem, the heuristic,
+# the frontier and the explored set in the instrumented versions below, which count the search work and measure its time.
+# If it is not given (the default), nothing is wrapped, so the search runs at full speed.
+#
+# The wrapped problem forwards all the other attributes to the original problem,
+# so the heuristics can still read the problem data (and the tracked is_goal decorators still count the explored nodes).
+
+@dataclass
+class SearchStats:
+    goal_tests: int = 0         # The number of goal tests (the number of explored nodes reported by the assignment)
+    expanded: int = 0           # The number of nodes whose successors (or predecessors) were generated
+    generated: int = 0          # The number of generated successors (or predecessors)
+    duplicates: int = 0         # The number of generated states that were discarded since they were already reached with a lower (or equal) cost
+    reopened: int = 0           # The number of states that were added to the frontier (or expanded) again after being expanded
+    peak_frontier: int = 0      # The maximum number of states in the frontier at the same time
+    peak_explored: int = 0      # The maximum number of states in the explored set (or held in memory) at the same time
+    heuristic_calls: int = 0    # The number of heuristic evaluations
+    heuristic_time: float = 0   # The time spent in the heuristic (in seconds)
+    successor_time: float = 0   # The time spent generating the actions, successors and costs (in seconds)
+    frontier_time: float = 0    # The time spent in the frontier operations (in seconds)
+    elapsed: float = 0          # The total time of the search (in seconds), measured by the caller
+    # The current number of states in the tracked frontiers and explored sets of the running search (a search may track more than one of each)
+    # They are reset when the next search is instrumented, so a stats object shared by many searches only compares the peaks of single searches
+    frontier_size: int = 0
+    explored_size: int = 0
+
+    # Wraps the problem and the heuristic so that their calls are counted and timed
+    def instrument(self, problem: Problem[S, A], heuristic: Optional[HeuristicFunction] = None) -> Tuple[Problem[S, A], Optional[HeuristicFunction]]:
+        # A new search starts, so the frontiers and explored sets of the previous searches are not alive anymore
+        self.frontier_size = self.explored_size = 0
+        instrumented_problem = _InstrumentedProblem(problem, self)
+        if heuristic is None: return instrumented_problem, None
+        stats = self
+        # The heuristic receives the original problem, so its caches (if any) are keyed by the original problem
+        def instrumented_heuristic(_: Problem[S, A], state: S) -> float:
+            start = time.perf_counter()
+            value = heuristic(problem, state)
+            stats.heuristic_time += time.perf_counter() - start
+            stats.heuristic_calls += 1
+            return value
+        return instrumented_problem, instrumented_heuristic
+
+    # Wraps a frontier so that its operations are timed and its size is tracked
+    # If the explored set is given, pushing a state that was already explored is counted as reopening it
+    def track_frontier(self, frontier, explored: Optional[Set] = None) -> '_InstrumentedFrontier':
+        return _InstrumentedFrontier(frontier, self, explored)
+
+    # Returns a set that tracks its size (it is used as the explored set)
+    def track_explored(self, explored: Iterable = ()) -> '_TrackedSet':
+        return _TrackedSet(self, explored)
+
+    # Updates the peaks with sizes that are measured by the search itself (for searches that do not use a frontier object or an explored set)
+    def update_peaks(self, frontier_size: int = 0, explored_size: int = 0) -> None:
+        if frontier_size > self.peak_frontier: self.peak_frontier = frontier_size
+        if explored_size > self.peak_explored: self.peak_explored = explored_size
+
+    # Adds the counters of another stats object to this one (for example, to sum the stats of many searches)
+    def merge(self, other: 'SearchStats') -> None:
+        for name, value in asdict(other).items():
+            if name.startswith("peak_"):
+                setattr(self, name, max(getattr(self, name), value))
+            elif name not in ("frontier_size", "explored_size"):
+                setattr(self, name, getattr(self, name) + value)
+
+    # Returns the stats as a dictionary (without the current sizes, which are only used while searching)
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        del data["frontier_size"], data["explored_size"]
+        return data
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+# A wrapper around a problem which counts and times the calls to its functions
+class _InstrumentedProblem:
+    def __init__(self, problem: Problem[S, A], stats: SearchStats) -> None:
+        self._problem = problem
+        self._stats = stats
+
+    # Any other attribute (such as the problem data used by the heuristics) is read from the wrapped problem
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._problem, name)
+
+    def is_goal(self, state: S) -> bool:
+        self._stats.goal_tests += 1
+        return self._problem.is_goal(state)
+
+    def get_actions(self, state: S) -> Iterable[A]:
+        start = time.perf_counter()
+        actions = self._problem.get_actions(state)
+        self._stats.successor_time += time.perf_counter() - start
+        self._stats.expanded += 1
+        return actions
+
+    def get_successor(self, state: S, action: A) -> S:
+        start = time.perf_counter()
+        successor = self._problem.get_successor(state, action)
+        self._stats.successor_time += time.perf_counter() - start
+        self._stats.generated += 1
+        return successor
+
+    def get_cost(self, state: S, action: A) -> float:
+        start = time.perf_counter()
+        cost = self._problem.get_cost(state, action)
+        self._stats.successor_time += time.perf_counter() - start
+        return cost
+
+    def get_predecessors(self, state: S):
+        start = time.perf_counter()
+        predecessors = self._problem.get_predecessors(state)
+        if predecessors is not None:
+            predecessors = list(predecessors)
+            self._stats.expanded += 1
+            self._stats.generated += len(predecessors)
+        self._stats.successor_time += time.perf_counter() - start
+        return predecessors
+
+# A wrapper around a frontier (PriorityFrontier, QueueFrontier or StackFrontier) which times its operations and tracks its size
+class _InstrumentedFrontier:
+    def __init__(self, frontier, stats: SearchStats, explored: Optional[Set] = None) -> None:
+        self._frontier = frontier
+        self._stats = stats
+        self._explored = explored
+        stats.frontier_size += len(frontier)
+        stats.update_peaks(frontier_size=stats.frontier_size)
+
+    # Calls an operation of the frontier while measuring its time and the change in the frontier size
+    def _call(self, operation, *args):
+        stats, frontier = self._stats, self._frontier
+        start = time.perf_counter()
+        size = len(frontier)
+        result = operation(*args)
+        stats.frontier_size += len(frontier) - size
+        stats.frontier_time += time.perf_counter() - start
+        if stats.frontier_size > stats.peak_frontier: stats.peak_frontier = stats.frontier_size
+        return result
+
+    def __len__(self) -> int:
+        return len(self._frontier)
+
+    def __contains__(self, state) -> bool:
+        return self._call(self._frontier.__contains__, state)
+
+    def __iter__(self) -> Iterator:
+        return iter(self._frontier)
+
+    def push(self, state, *args) -> None:
+        if self._explored is not None and state in self._explored: self._stats.reopened += 1
+        self._call(self._frontier.push, state, *args)
+
+    def __getattr__(self, name: str) -> Any:
+        # The other operations (pop, pop_with_priority, priority, remove, peek_priority) are timed as well
+        operation = getattr(self._frontier, name)
+        return lambda *args: self._call(operation, *args)
+
+# A set which tracks its size in the stats (it is used as the explored set)
+class _TrackedSet(set):
+    def __init__(self, stats: SearchStats, items: Iterable = ()) -> None:
+        super().__init__(items)
+        self._stats = stats
+        stats.explored_size += len(self)
+        stats.update_peaks(explored_size=stats.explored_size)
+
+    def add(self, item) -> None:
+        if item in self: return
+        super().add(item)
+        stats = self._stats
+        stats.explored_size += 1
+        if stats.explored_size > stats.peak_explored: stats.peak_explored = stats.explored_size
+
+    def clear(self) -> None:
+        self._stats.explored_size -= len(self)
+        super().clear()
@@ -0,0 +1,44 @@
+from typing import Dict, Generic, List, Optional, Tuple
+
+from problem import S, A
+
+# SearchTree stores the tree generated by a search algorithm as back-pointers
+# For every generated state (except the root), it stores the parent state and the action that leads from the parent to the state
+# This costs O(1) memory per generated state, and the path to any state is only rebuilt when it is requested
+class SearchTree(Generic[S, A]):
+    def __init__(self, root: S) -> None:
+        self.root = root
+        # The goal state found by the search (or None if it was not found yet)
+        self.goal: Optional[S] = None
+        # A dictionary (hash table) from each state to its parent state and the action from the parent to the state
+        self._parents: Dict[S, Tuple[S, A]] = {}
+
+    def __len__(self) -> int:
+        return len(self._parents) + 1
+
+    def __contains__(self, state: S) -> bool:
+        return state == self.root or state in self._parents
+
+    # Stores (or replaces) the back-pointer of the given state
+    def add(self, state: S, parent: S, action: A) -> None:
+        self._parents[state] = (parent, action)
+
+    # Returns the parent state and the action that leads to the given state (or None if the state is the root)
+    def parent(self, state: S) -> Optional[Tuple[S, A]]:
+        return self._parents.get(state)
+
+    # Returns a list of pairs (state, action) along the path from the root to the given state
+    # where each action is applied to the state it is paired with
+    def trajectory(self, state: S) -> List[Tuple[S, A]]:
+        trajectory = []
+        parents = self._parents
+        while state != self.root:
+            parent, action = parents[state]
+            trajectory.append((parent, action))
+            state = parent
+        trajectory.reverse()
+        return trajectory
+
+    # Returns the list of actions along the path from the root to the given state
+    def path(self, state: S) -> List[A]:
+        return [action for _, action in self.trajectory(state)]
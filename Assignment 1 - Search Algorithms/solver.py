@@ -0,0 +1,163 @@
+from dataclasses import dataclass
+from enum import Enum
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import time
+
+from problem import HeuristicFunction, Problem
+from search_stats import SearchStats
+from heuristic_cache import DEFAULT_CAPACITY, CachedHeuristic
+
+# This file contains the pieces shared by the scripts that solve levels without playing them step by step
+# (such as the portfolio runner): loading a level of any problem type, selecting a search algorithm and a heuristic by name,
+# and running a search while collecting its stats (see search_stats.py)
+
+# The problem types that can be loaded
+PROBLEM_TYPES = ["dungeon", "parking", "graph", "compact_graph"]
+
+# The search algorithms that can be selected by name, and whether each of them needs a heuristic
+SEARCH_ALGORITHMS: Dict[str, Tuple[str, bool]] = {
+    "bfs": ("BreadthFirstSearch", False),
+    "dfs": ("DepthFirstSearch", False),
+    "ucs": ("UniformCostSearch", False),
+    "astar": ("AStarSearch", True),
+    "gbfs": ("BestFirstSearch", True),
+    "idastar": ("IterativeDeepeningAStarSearch", True),
+    "smastar": ("SMAStarSearch", True),
+    "arastar": ("AnytimeRepairingAStarSearch", True),
+    "bibfs": ("BidirectionalBFS", False),
+    "biucs": ("BidirectionalUniformCostSearch", False),
+    "biastar": ("BidirectionalAStarSearch", True),
+}
+
+# The heuristics that can be selected for each problem type (the first one of each type is the default)
+HEURISTICS: Dict[str, List[str]] = {
+    "dungeon": ["strong", "weak", "zero"],
+    "parking": ["pattern", "zero"],
+    "graph": ["euclidean", "alt", "zero"],
+    "compact_graph": ["euclidean", "alt", "zero"],
+}
+
+# Returns the type of the level in the given file
+# Graphs are stored in json files, large graphs in edge list files, dungeons contain a player '@' and the other text levels are parking lots
+# (the large graphs in json files must be loaded with the "compact_graph" type explicitly)
+def detect_problem_type(path: str) -> str:
+    if path.endswith(".json"): return "graph"
+    from compact_graph import EDGE_LIST_EXTENSION
+    if path.endswith(EDGE_LIST_EXTENSION): return "compact_graph"
+    with open(path, 'r') as f:
+        return "dungeon" if '@' in f.read() else "parking"
+
+# Reads a level from a file and returns its type and the problem
+def load_problem(path: str, problem_type: Optional[str] = None) -> Tuple[str, Problem]:
+    if problem_type is None: problem_type = detect_problem_type(path)
+    if problem_type == "dungeon":
+        from dungeon import DungeonProblem
+        return problem_type, DungeonProblem.from_file(path)
+    if problem_type == "parking":
+        from parking import ParkingProblem
+        return problem_type, ParkingProblem.from_file(path)
+    if problem_type == "graph":
+        from graph import GraphRoutingProblem
+        return problem_type, GraphRoutingProblem.from_file(path)
+    if problem_type == "compact_graph":
+        from compact_graph import CompactGraphRoutingProblem
+        return problem_type, CompactGraphRoutingProblem.from_file(path)
+    raise ValueError(f"Unknown problem type '{problem_type}'")
+
+# Returns the heuristic with the given name for a problem type (or the default heuristic of the type if the name is None)
+# The slow heuristics are cached per problem with the given capacity and eviction policy (see heuristic_cache.py)
+def get_heuristic(problem_type: str, name: Optional[str] = None,
+                  cache_capacity: int = DEFAULT_CAPACITY, cache_policy: str = "lru") -> HeuristicFunction:
+    if name is None: name = HEURISTICS[problem_type][0]
+    if name not in HEURISTICS[problem_type]:
+        raise ValueError(f"Unknown heuristic '{name}' for the {problem_type} problem")
+    if name == "zero":
+        return lambda *_: 0
+    if problem_type == "dungeon":
+        from dungeon_heuristic import strong_heuristic, weak_heuristic
+        heuristic = strong_heuristic if name == "strong" else weak_heuristic
+        # We cache the heuristic calls since the dungeon heuristics are not fast
+        return CachedHeuristic(heuristic, cache_capacity, cache_policy)
+    if problem_type == "parking":
+        from parking_heuristic import parking_heuristic
+        return parking_heuristic
+    if name == "alt":
+        # The landmark tables are computed once per graph (and cached on disk, see graph_landmarks.py)
+        from graph_landmarks import alt_heuristic
+        return alt_heuristic
+    if problem_type == "compact_graph":
+        from compact_graph import compact_graph_heuristic
+        return compact_graph_heuristic
+    from graph import graphrouting_heuristic
+    return graphrouting_heuristic
+
+# Returns the reverse heuristic of the graph and dungeon problems that matches the heuristic with the given name
+# (it is used by the backward half of the bidirectional A* search). It returns None if there is no reverse heuristic
+def get_reverse_heuristic(problem_type: str, name: Optional[str] = None) -> Optional[Callable[[Problem, Any, Any], float]]:
+    if name is None: name = HEURISTICS[problem_type][0]
+    if name == "alt":
+        from graph_landmarks import alt_reverse_heuristic
+        return alt_reverse_heuristic
+    if problem_type == "dungeon":
+        from dungeon_heuristic import reverse_heuristic
+        return reverse_heuristic
+    if problem_type == "graph":
+        from graph import graphrouting_reverse_heuristic
+        return graphrouting_reverse_heuristic
+    if problem_type == "compact_graph":
+        from compact_graph import compact_graph_reverse_heuristic
+        return compact_graph_reverse_heuristic
+    return None
+
+# Returns the search function with the given name
+# The search function takes the problem and the initial state (the heuristic is already bound for the informed searches)
+def get_search_function(algorithm: str, problem_type: str, heuristic: Optional[str] = None,
+                        cache_capacity: int = DEFAULT_CAPACITY, cache_policy: str = "lru") -> Callable[[Problem, Any], Any]:
+    if algorithm not in SEARCH_ALGORITHMS:
+        raise ValueError(f"Unknown search algorithm '{algorithm}'")
+    import search
+    function_name, informed = SEARCH_ALGORITHMS[algorithm]
+    search_fn = getattr(search, function_name)
+    if not informed: return search_fn
+    if algorithm == "biastar":
+        reverse_heuristic = get_reverse_heuristic(problem_type, heuristic)
+        if reverse_heuristic is not None: search_fn = partial(search_fn, reverse_heuristic=reverse_heuristic)
+    return partial(search_fn, heuristic=get_heuristic(problem_type, heuristic, cache_capacity, cache_policy))
+
+# The outcome of running a search on a problem
+@dataclass
+class SearchOutcome:
+    path: Optional[List[Any]]   # The actions from the initial state to the goal (None if no solution was found)
+    cost: Optional[float]       # The total cost of the path
+    stats: SearchStats          # The stats of the search (including its elapsed time)
+
+# Returns the cost of applying the given actions from the initial state of the problem
+def path_cost(problem: Problem, path: List[Any]) -> float:
+    state, cost = problem.get_initial_state(), 0
+    for action in path:
+        cost += problem.get_cost(state, action)
+        state = problem.get_successor(state, action)
+    return cost
+
+# Runs a search function on a problem from its initial state
+def run_search(problem: Problem, search_fn: Callable[[Problem, Any], Any]) -> SearchOutcome:
+    stats = SearchStats()
+    start = time.perf_counter()
+    path = search_fn(problem, problem.get_initial_state(), stats=stats)
+    stats.elapsed = time.perf_counter() - start
+    cost = None if path is None else path_cost(problem, path)
+    return SearchOutcome(path, cost, stats)
+
+# Converts an action into a json compatible value for the output of the scripts
+# (directions are written as letters, graph nodes as their names and parking actions as [car, direction])
+# If the problem formats its own actions (such as the node ids of the compact graphs), the problem is used
+def format_action(action: Any, problem: Optional[Problem] = None) -> Any:
+    if problem is not None and hasattr(problem, "format_action"): return problem.format_action(action)
+    if isinstance(action, tuple): return [format_action(item) for item in action]
+    if isinstance(action, Enum) or not isinstance(action, (int, float, str)): return str(action)
+    return action
+
+# Returns the json compatible version of a path
+def format_path(path: Optional[List[Any]], problem: Optional[Problem] = None) -> Optional[List[Any]]:
+    return None if path is None else [format_action(action, problem) for action in path]
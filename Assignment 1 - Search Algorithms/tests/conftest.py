@@ -0,0 +1,5 @@
+import os, sys
+
+# The tests import the modules of the assignment, so its directory is added to the path
+# (this lets pytest run the tests from any directory, "python -m unittest discover tests" adds it by running from the assignment directory)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
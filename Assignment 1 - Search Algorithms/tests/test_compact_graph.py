@@ -0,0 +1,116 @@
+import math, os, tempfile, unittest
+
+from compact_graph import CompactGraph, CompactGraphRoutingProblem, compact_graph_heuristic
+from graph import GraphRoutingProblem, graphrouting_heuristic
+from search import AStarSearch, UniformCostSearch
+from testing_utils import level_path, path_cost
+
+GRAPHS = ["graph1.json", "graph2.json", "graph3.json", "graph4.json", "graph5.json", "graph6.json"]
+
+# A small edge list with comments, an explicit edge cost, parallel edges and an edge to a node that is never defined
+EDGE_LIST = """
+c a comment line
+# another comment
+v A 0 0
+v B 3 4
+v C 3 0
+a A B
+a A C 2.5
+a A C 7
+a B C
+a C Z
+s A
+g B
+"""
+
+class CompactGraphTests(unittest.TestCase):
+    # Writes the text to a temporary file with the given extension and reads it as a compact graph problem
+    def read_text(self, text: str, extension: str) -> CompactGraphRoutingProblem:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "graph" + extension)
+            with open(path, 'w') as f:
+                f.write(text)
+            return CompactGraphRoutingProblem.from_file(path)
+
+    # The compact graph has the same nodes, edges (in the same order) and costs as the graph routing problem
+    def test_json_graphs_match_the_routing_problem(self):
+        for name in GRAPHS:
+            with self.subTest(graph=name):
+                problem = GraphRoutingProblem.from_file(level_path("graphs", name))
+                compact = CompactGraphRoutingProblem.from_file(level_path("graphs", name))
+                graph = compact.graph
+                self.assertEqual(sorted(graph.names), sorted(node.name for node in problem.adjacency))
+                self.assertEqual(graph.names[compact.start], problem.start.name)
+                self.assertEqual(graph.names[compact.goal], problem.goal.name)
+                for node, adjacent in problem.adjacency.items():
+                    node_id = graph.node_id(node.name)
+                    self.assertEqual([graph.names[neighbor] for neighbor in compact.get_actions(node_id)], [neighbor.name for neighbor in adjacent])
+                    for neighbor in adjacent:
+                        self.assertAlmostEqual(compact.get_cost(node_id, graph.node_id(neighbor.name)), problem.get_cost(node, neighbor))
+                self.assertTrue(graph.distance_is_admissible)
+
+    def test_search_costs_match_the_routing_problem(self):
+        for name in GRAPHS:
+            with self.subTest(graph=name):
+                problem = GraphRoutingProblem.from_file(level_path("graphs", name))
+                compact = CompactGraphRoutingProblem.from_file(level_path("graphs", name))
+                expected = path_cost(problem, problem.start, AStarSearch(problem, problem.start, graphrouting_heuristic))
+                for solution in [AStarSearch(compact, compact.start, compact_graph_heuristic), UniformCostSearch(compact, compact.start)]:
+                    cost = path_cost(compact, compact.start, solution)
+                    if expected is None:
+                        self.assertIsNone(cost)
+                    else:
+                        self.assertAlmostEqual(cost, expected)
+
+    def test_edge_list(self):
+        problem = self.read_text(EDGE_LIST, ".edges")
+        graph = problem.graph
+        a, b, c = graph.node_id("A"), graph.node_id("B"), graph.node_id("C")
+        # The edge to the undefined node is dropped
+        self.assertEqual(graph.names, ["A", "B", "C"])
+        self.assertEqual(graph.edge_count, 4)
+        self.assertEqual((problem.start, problem.goal), (a, b))
+        self.assertEqual(list(graph.neighbors(a)), [b, c, c])
+        # The missing costs are the distances, and the first of the parallel edges is used
+        self.assertEqual(problem.get_cost(a, b), 5)
+        self.assertEqual(problem.get_cost(a, c), 2.5)
+        self.assertEqual(graph.edge_cost(a, c), 2.5)
+        self.assertEqual(problem.get_cost(b, c), 4)
+        self.assertIsNone(graph.edge_cost(c, a))
+        with self.assertRaises(ValueError):
+            problem.get_cost(c, a)
+        # The edge from A to C is cheaper than the distance between the nodes, so the distance is not a lower bound
+        self.assertFalse(graph.distance_is_admissible)
+        self.assertEqual(compact_graph_heuristic(problem, a), 0)
+
+    def test_reverse_graph(self):
+        graph = self.read_text(EDGE_LIST, ".edges").graph
+        reverse = graph.reverse()
+        a, b, c = graph.node_id("A"), graph.node_id("B"), graph.node_id("C")
+        self.assertEqual(sorted(reverse.neighbors(c)), [a, a, b])
+        self.assertEqual(list(reverse.neighbors(a)), [])
+        self.assertEqual(reverse.edge_cost(b, a), 5)
+        self.assertIs(reverse.reverse(), graph)
+
+    def test_predecessors(self):
+        problem = self.read_text(EDGE_LIST, ".edges")
+        graph = problem.graph
+        a, b, c = graph.node_id("A"), graph.node_id("B"), graph.node_id("C")
+        self.assertEqual(list(problem.get_goal_states()), [b])
+        self.assertEqual(sorted(problem.get_predecessors(c)), [(a, c), (a, c), (b, c)])
+
+    def test_invalid_edge_list_line(self):
+        with self.assertRaises(ValueError):
+            self.read_text("v A 0 0\nx A\n", ".edges")
+
+    def test_from_routing_problem(self):
+        problem = GraphRoutingProblem.from_file(level_path("graphs", "graph2.json"))
+        graph = CompactGraph.from_routing_problem(problem)
+        self.assertEqual(len(graph), len(problem.adjacency))
+        self.assertEqual(graph.edge_count, sum(len(adjacent) for adjacent in problem.adjacency.values()))
+        for node, adjacent in problem.adjacency.items():
+            for neighbor in adjacent:
+                self.assertTrue(math.isclose(graph.edge_cost(graph.node_id(node.name), graph.node_id(neighbor.name)), problem.get_cost(node, neighbor)))
+
+if __name__ == "__main__":
+    unittest.main()
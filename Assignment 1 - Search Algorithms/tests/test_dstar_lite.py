@@ -0,0 +1,79 @@
+import math, unittest
+
+from dstar_lite import DStarLite
+from dungeon import DungeonProblem, DungeonState
+from dungeon_heuristic import weak_heuristic
+from mathutils import Point
+from search import AStarSearch
+from testing_utils import level_path, path_cost
+
+# A dungeon with a short path along the top row and a long path around the bottom
+CORRIDOR_DUNGEON = """
+#######
+#@...E#
+#.###.#
+#.....#
+#######
+"""
+
+class DStarLiteTests(unittest.TestCase):
+    # Checks that the planner returns an optimal action and the same cost as a fresh A* search from the state
+    def assert_matches_astar(self, problem: DungeonProblem, planner: DStarLite, state: DungeonState) -> None:
+        action = planner.next_action(state)
+        expected = AStarSearch(problem, state, weak_heuristic)
+        if expected is None:
+            self.assertIsNone(action)
+            self.assertEqual(planner.g.get(state, math.inf), math.inf)
+            return
+        cost = planner.g[state]
+        self.assertEqual(cost, path_cost(problem, state, expected))
+        if expected:
+            successor = problem.get_successor(state, action)
+            self.assertEqual(problem.get_cost(state, action) + planner.g[successor], cost)
+
+    # Blocks (or opens) a cell and tells the planner which states changed
+    def toggle(self, problem: DungeonProblem, planner: DStarLite, cell: Point, blocked: bool) -> None:
+        changed = set(problem.set_blocked(cell, blocked))
+        planner.update_states(lambda state: state.player in changed)
+
+    def test_block_and_reopen_every_cell(self):
+        for path in [level_path("dungeons", "dungeon1.txt")]:
+            layout_problem = DungeonProblem.from_file(path)
+            start = layout_problem.get_initial_state()
+            cells = sorted(layout_problem.layout.walkable - {start.player}, key=lambda point: (point.y, point.x))
+            for cell in cells:
+                with self.subTest(dungeon=path, cell=cell):
+                    problem = DungeonProblem.from_file(path)
+                    state = problem.get_initial_state()
+                    planner = DStarLite(problem, state)
+                    self.assert_matches_astar(problem, planner, state)
+                    self.toggle(problem, planner, cell, True)
+                    self.assert_matches_astar(problem, planner, state)
+                    self.toggle(problem, planner, cell, False)
+                    self.assert_matches_astar(problem, planner, state)
+
+    # A cell that was blocked before the first search is never reached by it, so opening it must still find the shortcut
+    def test_reopen_cell_that_was_never_reached(self):
+        problem = DungeonProblem.from_text(CORRIDOR_DUNGEON)
+        problem.set_blocked(Point(3, 1))
+        state = problem.get_initial_state()
+        planner = DStarLite(problem, state)
+        self.assert_matches_astar(problem, planner, state)
+        self.assertEqual(planner.g[state], 8)
+        self.toggle(problem, planner, Point(3, 1), False)
+        self.assert_matches_astar(problem, planner, state)
+        self.assertEqual(planner.g[state], 4)
+
+    # The planner keeps its search when the agent moves, and it repairs it when a cell on the path is blocked
+    def test_block_the_path_after_moving(self):
+        problem = DungeonProblem.from_text(CORRIDOR_DUNGEON)
+        state = problem.get_initial_state()
+        planner = DStarLite(problem, state)
+        state = problem.get_successor(state, planner.next_action(state))
+        self.assertEqual(state.player, Point(2, 1))
+        self.toggle(problem, planner, Point(3, 1), True)
+        self.assert_matches_astar(problem, planner, state)
+        self.assertEqual(planner.g[state], 9)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from frontier import PriorityFrontier, QueueFrontier, StackFrontier
+
+class PriorityFrontierTests(unittest.TestCase):
+    def test_pops_in_priority_order(self):
+        frontier = PriorityFrontier()
+        for state, priority in [("c", 3), ("a", 1), ("d", 4), ("b", 2)]:
+            frontier.push(state, priority)
+        self.assertEqual(len(frontier), 4)
+        self.assertEqual([frontier.pop() for _ in range(4)], ["a", "b", "c", "d"])
+        self.assertEqual(len(frontier), 0)
+
+    def test_ties_are_popped_first_in_first_out(self):
+        frontier = PriorityFrontier()
+        for state in ["x", "y", "z", "w"]:
+            frontier.push(state, 5)
+        frontier.push("early", 1)
+        self.assertEqual([frontier.pop() for _ in range(5)], ["early", "x", "y", "z", "w"])
+
+    # An updated state is ordered as if it was pushed at the time of the update
+    def test_updated_state_is_ordered_as_pushed_now(self):
+        frontier = PriorityFrontier()
+        frontier.push("a", 2)
+        frontier.push("b", 2)
+        frontier.push("a", 2)
+        self.assertEqual(frontier.priority("a"), 2)
+        self.assertEqual([frontier.pop() for _ in range(2)], ["b", "a"])
+
+    def test_update_and_remove(self):
+        frontier = PriorityFrontier()
+        frontier.push("a", 5)
+        frontier.push("b", 3)
+        frontier.push("c", 4)
+        frontier.push("a", 1)
+        frontier.remove("b")
+        frontier.remove("missing")
+        self.assertNotIn("b", frontier)
+        self.assertEqual(set(frontier), {"a", "c"})
+        self.assertEqual(frontier.priority("b", -1), -1)
+        self.assertEqual(frontier.peek_priority(), 1)
+        self.assertEqual(frontier.pop_with_priority(), ("a", 1))
+        self.assertEqual(frontier.pop_with_priority(), ("c", 4))
+        with self.assertRaises(IndexError):
+            frontier.pop()
+        with self.assertRaises(IndexError):
+            frontier.peek_priority()
+
+class QueueFrontierTests(unittest.TestCase):
+    def test_queue_is_first_in_first_out_without_duplicates(self):
+        frontier = QueueFrontier([1, 2])
+        frontier.push(3)
+        frontier.push(1)
+        self.assertEqual(len(frontier), 3)
+        self.assertIn(3, frontier)
+        self.assertEqual([frontier.pop() for _ in range(3)], [1, 2, 3])
+        self.assertNotIn(1, frontier)
+
+    def test_stack_is_last_in_first_out_without_duplicates(self):
+        frontier = StackFrontier([1, 2])
+        frontier.push(3)
+        frontier.push(2)
+        self.assertEqual(list(frontier), [1, 2, 3])
+        self.assertEqual([frontier.pop() for _ in range(3)], [3, 2, 1])
+        # A popped state can be pushed again
+        frontier.push(2)
+        self.assertEqual(frontier.pop(), 2)
+
+if __name__ == "__main__":
+    unittest.main()
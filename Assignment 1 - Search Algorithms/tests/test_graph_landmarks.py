@@ -0,0 +1,89 @@
+import math, os, tempfile, unittest
+
+from compact_graph import CompactGraph, CompactGraphRoutingProblem
+from graph import GraphRoutingProblem
+from graph_landmarks import (LandmarkTables, alt_heuristic, alt_reverse_heuristic, compact_graph_of, get_landmarks,
+                             shortest_distances)
+from search import AStarSearch, BidirectionalAStarSearch, UniformCostSearch
+from testing_utils import level_path, path_cost
+
+GRAPHS = ["graph1.json", "graph2.json", "graph3.json", "graph4.json", "graph5.json", "graph6.json"]
+
+# Reads a graph problem and computes its landmarks without the disk cache (so the tests do not write files)
+def load_graph(name: str, compact: bool):
+    path = level_path("graphs", name)
+    problem = CompactGraphRoutingProblem.from_file(path) if compact else GraphRoutingProblem.from_file(path)
+    get_landmarks(problem, use_disk_cache=False)
+    return problem
+
+class LandmarkTablesTests(unittest.TestCase):
+    # The tables hold the exact distances from and to every landmark, so their bounds never exceed the shortest distances
+    def test_lower_bounds(self):
+        for name in GRAPHS:
+            with self.subTest(graph=name):
+                graph = compact_graph_of(load_graph(name, compact=True))
+                tables = LandmarkTables.compute(graph, 4)
+                reverse = graph.reverse()
+                for landmark, from_table, to_table in zip(tables.landmarks, tables.from_tables, tables.to_tables):
+                    self.assertEqual(list(from_table), list(shortest_distances(graph, landmark)))
+                    self.assertEqual(list(to_table), list(shortest_distances(reverse, landmark)))
+                for source in range(len(graph)):
+                    distances = shortest_distances(graph, source)
+                    for target in range(len(graph)):
+                        self.assertLessEqual(tables.lower_bound(source, target), distances[target] + 1e-9)
+
+    # The ALT heuristics are admissible, so A* and the bidirectional A* still find the optimal cost
+    def test_alt_heuristics_find_the_optimal_cost(self):
+        for name in GRAPHS:
+            for compact in [False, True]:
+                with self.subTest(graph=name, compact=compact):
+                    problem = load_graph(name, compact)
+                    state = problem.get_initial_state()
+                    expected = path_cost(problem, state, UniformCostSearch(problem, state))
+                    for solution in [AStarSearch(problem, state, alt_heuristic),
+                                     BidirectionalAStarSearch(problem, state, alt_heuristic, reverse_heuristic=alt_reverse_heuristic)]:
+                        cost = path_cost(problem, state, solution)
+                        if expected is None:
+                            self.assertIsNone(cost)
+                        else:
+                            self.assertAlmostEqual(cost, expected)
+                    self.assertEqual(alt_heuristic(problem, problem.goal), 0)
+
+    def test_save_and_load(self):
+        for name in GRAPHS:
+            with self.subTest(graph=name), tempfile.TemporaryDirectory() as directory:
+                graph = compact_graph_of(load_graph(name, compact=True))
+                tables = LandmarkTables.compute(graph, 3)
+                path = os.path.join(directory, "graph.alt")
+                tables.save(path)
+                loaded = LandmarkTables.load(path, graph)
+                self.assertIsNotNone(loaded)
+                self.assertEqual(loaded.landmarks, tables.landmarks)
+                self.assertEqual([list(table) for table in loaded.from_tables], [list(table) for table in tables.from_tables])
+                self.assertEqual([list(table) for table in loaded.to_tables], [list(table) for table in tables.to_tables])
+                for source in range(len(graph)):
+                    for target in range(len(graph)):
+                        bound, loaded_bound = tables.lower_bound(source, target), loaded.lower_bound(source, target)
+                        self.assertTrue(bound == loaded_bound or (math.isnan(bound) and math.isnan(loaded_bound)))
+
+    # The tables of a graph with another number of nodes, truncated files and files of other formats are rejected
+    def test_load_rejects_invalid_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            graph = compact_graph_of(load_graph("graph2.json", compact=True))
+            other = CompactGraph.from_file(level_path("graphs", "graph1.json"))[0]
+            self.assertNotEqual(len(graph), len(other))
+            path = os.path.join(directory, "graph.alt")
+            LandmarkTables.compute(graph).save(path)
+            self.assertIsNone(LandmarkTables.load(path, other))
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(path, 'wb') as f:
+                f.write(data[:-8])
+            self.assertIsNone(LandmarkTables.load(path, graph))
+            with open(path, 'wb') as f:
+                f.write(b"NOTATABL" + data[8:])
+            self.assertIsNone(LandmarkTables.load(path, graph))
+            self.assertIsNone(LandmarkTables.load(os.path.join(directory, "missing.alt"), graph))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from dungeon import DungeonProblem
+from dungeon_heuristic import weak_heuristic
+from heuristic_cache import CachedHeuristic, ClockHeuristicCache, LRUHeuristicCache
+from search import AStarSearch
+from testing_utils import level_path, path_cost
+
+class HeuristicCacheTests(unittest.TestCase):
+    def test_lru_evicts_the_least_recently_used_entry(self):
+        cache = LRUHeuristicCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIsNone(cache.peek("b"))
+        self.assertEqual((cache.get("a"), cache.get("c"), cache.get("b", -1)), (1, 3, -1))
+        self.assertEqual((len(cache), cache.hits, cache.misses, cache.evictions), (2, 3, 1, 1))
+        self.assertEqual(cache.hit_rate, 0.75)
+
+    # The clock hand skips (and clears) the referenced entries and evicts the first entry that was not referenced
+    def test_clock_gives_referenced_entries_a_second_chance(self):
+        cache = ClockHeuristicCache(3)
+        for key in "abc":
+            cache.put(key, key.upper())
+        cache.get("a")
+        cache.put("d", "D")
+        self.assertEqual(cache.peek("a"), "A")
+        self.assertIsNone(cache.peek("b"))
+        # The hand cleared the bit of "a" while it passed it, so "a" is the next entry to be evicted unless it is read again
+        cache.put("e", "E")
+        self.assertIsNone(cache.peek("c"))
+        cache.put("f", "F")
+        self.assertIsNone(cache.peek("a"))
+        self.assertEqual(sorted(cache.peek(key) for key in "def"), ["D", "E", "F"])
+        self.assertEqual((len(cache), cache.evictions), (3, 3))
+
+    def test_put_updates_an_existing_entry(self):
+        for cache in [LRUHeuristicCache(2), ClockHeuristicCache(2)]:
+            with self.subTest(policy=cache.policy):
+                cache.put("a", 1)
+                cache.put("a", 2)
+                self.assertEqual(len(cache), 1)
+                self.assertEqual(cache.get("a"), 2)
+                self.assertEqual(cache.evictions, 0)
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            LRUHeuristicCache(0)
+        with self.assertRaises(ValueError):
+            CachedHeuristic(weak_heuristic, policy="random")
+
+    # Every problem gets its own cache, and the cached values are the values of the heuristic
+    def test_cached_heuristic(self):
+        calls = []
+        def heuristic(problem, state):
+            calls.append(state)
+            return weak_heuristic(problem, state)
+        for policy in ["lru", "clock"]:
+            with self.subTest(policy=policy):
+                calls.clear()
+                cached = CachedHeuristic(heuristic, capacity=8, policy=policy)
+                problem = DungeonProblem.from_file(level_path("dungeons", "dungeon2.txt"))
+                other = DungeonProblem.from_file(level_path("dungeons", "dungeon2.txt"))
+                state = problem.get_initial_state()
+                self.assertEqual(cached(problem, state), weak_heuristic(problem, state))
+                self.assertEqual(cached(problem, state), weak_heuristic(problem, state))
+                self.assertEqual(len(calls), 1)
+                cached(other, other.get_initial_state())
+                self.assertEqual(len(calls), 2)
+                self.assertIsNot(cached.cache_of(problem), cached.cache_of(other))
+                self.assertEqual(cached.cache_of(problem).to_dict()["hits"], 1)
+                # A small cache evicts entries, but the search still finds the optimal cost
+                solution = AStarSearch(problem, state, cached)
+                expected = AStarSearch(problem, state, weak_heuristic)
+                self.assertEqual(path_cost(problem, state, solution), path_cost(problem, state, expected))
+                self.assertLessEqual(len(cached.cache_of(problem)), 8)
+
+    def test_cache_key(self):
+        cached = CachedHeuristic(weak_heuristic, key=lambda problem, state: state.player)
+        problem = DungeonProblem.from_file(level_path("dungeons", "dungeon1.txt"))
+        state = problem.get_initial_state()
+        cached(problem, state)
+        self.assertEqual(cached.cache_of(problem).peek(state.player), weak_heuristic(problem, state))
+
+if __name__ == "__main__":
+    unittest.main()
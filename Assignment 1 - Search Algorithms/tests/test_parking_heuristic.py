@@ -0,0 +1,71 @@
+import os, tempfile, unittest
+
+from parking import ParkingProblem
+from parking_heuristic import ParkingPatternDatabase, get_pattern_database, parking_heuristic
+from search import UniformCostSearch
+from testing_utils import level_path, path_cost
+
+PARKS = ["park1.txt", "park2.txt", "park3.txt", "park4.txt", "park5.txt"]
+
+class ParkingPatternDatabaseTests(unittest.TestCase):
+    def test_costs_of_a_single_car(self):
+        problem = ParkingProblem.from_file(level_path("parks", "park1.txt"))
+        database = ParkingPatternDatabase.compute(problem)
+        # In "#A.0#", the car is 2 moves away from its slot
+        self.assertEqual(database.cost(0, problem.get_initial_state()[0]), 2)
+        self.assertEqual([database.cost(0, cell) for cell in range(len(problem.cells))], [2, 1, 0])
+
+    # Entering the slot of another car costs 101, and a car that cannot reach its slot gets an infinite cost
+    def test_costs_through_the_slots_of_other_cars(self):
+        problem = ParkingProblem.from_text("#######\n#A.1.0#\n#######\n#B#####\n#######")
+        database = ParkingPatternDatabase.compute(problem)
+        self.assertEqual(database.cost(0, problem.get_initial_state()[0]), 104)
+        self.assertEqual(database.cost(1, problem.get_initial_state()[1]), float('inf'))
+
+    # The heuristic is admissible (it never exceeds the optimal cost) and it is zero at the goals
+    def test_heuristic_is_admissible(self):
+        for name in PARKS:
+            with self.subTest(park=name):
+                problem = ParkingProblem.from_file(level_path("parks", name))
+                get_pattern_database(problem, use_disk_cache=False)
+                state = problem.get_initial_state()
+                solution = UniformCostSearch(problem, state)
+                # Some parks cannot be solved (the cars in "park3.txt" cannot pass each other)
+                if solution is None: continue
+                self.assertLessEqual(parking_heuristic(problem, state), path_cost(problem, state, solution))
+                for action in solution:
+                    state = problem.get_successor(state, action)
+                self.assertEqual(parking_heuristic(problem, state), 0)
+
+    def test_save_and_load(self):
+        for name in PARKS:
+            with self.subTest(park=name), tempfile.TemporaryDirectory() as directory:
+                problem = ParkingProblem.from_file(level_path("parks", name))
+                database = ParkingPatternDatabase.compute(problem)
+                path = os.path.join(directory, "park.pdb")
+                database.save(path)
+                loaded = ParkingPatternDatabase.load(path, problem)
+                self.assertIsNotNone(loaded)
+                self.assertEqual([list(table) for table in loaded.tables], [list(table) for table in database.tables])
+                self.assertEqual(loaded.cost(0, problem.get_initial_state()[0]), database.cost(0, problem.get_initial_state()[0]))
+
+    # The files of other levels, truncated files and files of other formats are rejected
+    def test_load_rejects_invalid_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            problem = ParkingProblem.from_file(level_path("parks", "park2.txt"))
+            other = ParkingProblem.from_file(level_path("parks", "park5.txt"))
+            path = os.path.join(directory, "park.pdb")
+            ParkingPatternDatabase.compute(problem).save(path)
+            self.assertIsNone(ParkingPatternDatabase.load(path, other))
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(path, 'wb') as f:
+                f.write(data[:-4])
+            self.assertIsNone(ParkingPatternDatabase.load(path, problem))
+            with open(path, 'wb') as f:
+                f.write(b"NOTAPDB!" + data[8:])
+            self.assertIsNone(ParkingPatternDatabase.load(path, problem))
+            self.assertIsNone(ParkingPatternDatabase.load(os.path.join(directory, "missing.pdb"), problem))
+
+if __name__ == "__main__":
+    unittest.main()
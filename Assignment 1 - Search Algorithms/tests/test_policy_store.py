@@ -0,0 +1,86 @@
+import os, tempfile, unittest
+
+from mathutils import Direction
+from policy_store import PersistentPolicy
+
+class PersistentPolicyTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "policy.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    # The states are integers and the actions are directions
+    def open_policy(self) -> PersistentPolicy:
+        return PersistentPolicy(self.path, lambda state: state, int, Direction)
+
+    def test_save_and_load(self):
+        policy = self.open_policy()
+        self.assertEqual((len(policy), policy.stored), (0, 0))
+        policy[5] = Direction.UP
+        policy[1 << 40] = Direction.LEFT
+        policy[0] = None
+        policy.flush()
+        policy.close()
+
+        loaded = self.open_policy()
+        self.assertEqual(loaded.stored, 3)
+        self.assertEqual(loaded[5], Direction.UP)
+        self.assertEqual(loaded[1 << 40], Direction.LEFT)
+        self.assertIn(0, loaded)
+        self.assertIsNone(loaded[0])
+        self.assertNotIn(6, loaded)
+        self.assertNotIn(1 << 80, loaded)
+        self.assertEqual(loaded.get(6, Direction.DOWN), Direction.DOWN)
+        with self.assertRaises(KeyError):
+            loaded[6]
+        self.assertEqual(loaded.hits, 3)
+        loaded.close()
+
+    # Flushing merges the new actions with the stored ones (the new action of a stored state replaces it)
+    def test_flush_merges_the_stored_actions(self):
+        policy = self.open_policy()
+        policy[1] = Direction.UP
+        policy[2] = Direction.DOWN
+        policy.flush()
+        policy[2] = Direction.RIGHT
+        policy[300] = Direction.LEFT
+        policy.flush()
+        self.assertEqual(policy.stored, 3)
+        policy.close()
+        loaded = self.open_policy()
+        self.assertEqual([loaded[state] for state in [1, 2, 300]], [Direction.UP, Direction.RIGHT, Direction.LEFT])
+        loaded.close()
+
+    # After the policy is cleared, the stored actions are ignored and the file is not written again
+    def test_clear_ignores_the_stored_actions(self):
+        policy = self.open_policy()
+        policy[1] = Direction.UP
+        policy.flush()
+        policy.clear()
+        self.assertNotIn(1, policy)
+        self.assertEqual(len(policy), 0)
+        policy[2] = Direction.DOWN
+        policy.flush()
+        policy.close()
+        loaded = self.open_policy()
+        self.assertEqual(loaded.stored, 1)
+        self.assertNotIn(2, loaded)
+        loaded.close()
+
+    def test_invalid_files_are_ignored(self):
+        with open(self.path, 'wb') as f:
+            f.write(b"NOTAPOLICYFILE" * 4)
+        policy = self.open_policy()
+        self.assertEqual(policy.stored, 0)
+        self.assertNotIn(1, policy)
+        # A new file replaces the invalid one
+        policy[1] = Direction.UP
+        policy.flush()
+        self.assertEqual(policy[1], Direction.UP)
+        self.assertEqual(policy.stored, 1)
+        policy.close()
+
+if __name__ == "__main__":
+    unittest.main()
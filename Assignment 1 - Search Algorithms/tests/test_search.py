@@ -0,0 +1,110 @@
+import unittest
+
+from dungeon import DungeonProblem
+from dungeon_heuristic import reverse_heuristic, strong_heuristic, weak_heuristic
+from graph import GraphRoutingProblem, graphrouting_heuristic, graphrouting_reverse_heuristic
+from maze_distance import get_maze_distances
+from parking import ParkingProblem
+from parking_heuristic import get_pattern_database, parking_heuristic
+from search import (AStarSearch, AnytimeRepairingAStarSearch, BidirectionalAStarSearch, BidirectionalBFS,
+                    BidirectionalUniformCostSearch, BreadthFirstSearch, IterativeDeepeningAStarSearch, SMAStarSearch)
+from search_tree import SearchTree
+from testing_utils import level_path, path_cost
+
+# Every search below must find a solution with the optimal cost, which is computed by A* with the same heuristic
+DUNGEONS = ["dungeon1.txt", "dungeon2.txt", "dungeon3.txt"]
+GRAPHS = ["graph1.json", "graph2.json", "graph3.json", "graph4.json", "graph5.json", "graph6.json"]
+PARKS = ["park1.txt", "park2.txt", "park3.txt", "park4.txt", "park5.txt"]
+
+# Reads a dungeon and computes its maze distances without the disk cache (so the tests do not write files)
+def load_dungeon(name: str) -> DungeonProblem:
+    problem = DungeonProblem.from_file(level_path("dungeons", name))
+    get_maze_distances(problem, use_disk_cache=False)
+    return problem
+
+# Reads a parking problem and computes its pattern databases without the disk cache
+def load_park(name: str) -> ParkingProblem:
+    problem = ParkingProblem.from_file(level_path("parks", name))
+    get_pattern_database(problem, use_disk_cache=False)
+    return problem
+
+class OptimalSearchTests(unittest.TestCase):
+    # Checks that the search finds a solution with the same cost as the A* solution (or no solution if A* finds none)
+    def assert_optimal(self, problem, search, heuristic, **kwargs):
+        state = problem.get_initial_state()
+        expected = path_cost(problem, state, AStarSearch(problem, state, heuristic))
+        tree = SearchTree(state)
+        solution = search(problem, state, heuristic, tree, **kwargs)
+        self.assertEqual(path_cost(problem, state, solution), expected)
+        if solution is not None:
+            # The search tree contains the whole solution
+            self.assertEqual(tree.path(tree.goal), solution)
+
+    # The dungeons, the graphs and the parking problems with their heuristics and reverse heuristics
+    def cases(self):
+        for name in DUNGEONS:
+            yield name, load_dungeon(name), strong_heuristic, reverse_heuristic
+        # The weak heuristic is only used on a small dungeon, since IDA* would take minutes on the others
+        yield "dungeon2.txt", load_dungeon("dungeon2.txt"), weak_heuristic, None
+        for name in GRAPHS:
+            yield name, GraphRoutingProblem.from_file(level_path("graphs", name)), graphrouting_heuristic, graphrouting_reverse_heuristic
+        for name in PARKS:
+            yield name, load_park(name), parking_heuristic, None
+
+    def test_bidirectional_astar(self):
+        for name, problem, heuristic, reverse in self.cases():
+            with self.subTest(level=name, heuristic=heuristic.__name__):
+                self.assert_optimal(problem, BidirectionalAStarSearch, heuristic, reverse_heuristic=reverse)
+
+    def test_bidirectional_uniform_cost(self):
+        for name, problem, heuristic, _ in self.cases():
+            with self.subTest(level=name):
+                self.assert_optimal(problem, lambda problem, state, _, tree: BidirectionalUniformCostSearch(problem, state, tree), heuristic)
+
+    # All the moves of the dungeons and the parking problems cost 1 (except the parking moves into the slots of other cars),
+    # so the bidirectional breadth first search is compared with the breadth first search on the dungeons
+    def test_bidirectional_bfs(self):
+        for name in DUNGEONS:
+            with self.subTest(level=name):
+                problem = load_dungeon(name)
+                state = problem.get_initial_state()
+                expected = BreadthFirstSearch(problem, state)
+                self.assertEqual(len(BidirectionalBFS(problem, state)), len(expected))
+
+    def test_iterative_deepening_astar(self):
+        for name, problem, heuristic, _ in self.cases():
+            with self.subTest(level=name, heuristic=heuristic.__name__):
+                self.assert_optimal(problem, IterativeDeepeningAStarSearch, heuristic)
+
+    def test_simplified_memory_bounded_astar(self):
+        for name, problem, heuristic, _ in self.cases():
+            with self.subTest(level=name, heuristic=heuristic.__name__):
+                self.assert_optimal(problem, SMAStarSearch, heuristic)
+
+    # With a small cap, SMA* forgets and regenerates nodes, but the solution stays optimal as long as it fits in the memory
+    def test_simplified_memory_bounded_astar_with_small_memory(self):
+        problem = load_dungeon("dungeon2.txt")
+        self.assert_optimal(problem, SMAStarSearch, strong_heuristic, max_nodes=64)
+
+    def test_anytime_repairing_astar(self):
+        for name, problem, heuristic, _ in self.cases():
+            with self.subTest(level=name, heuristic=heuristic.__name__):
+                self.assert_optimal(problem, AnytimeRepairingAStarSearch, heuristic)
+
+    # Every reported solution is at most "bound" times the optimal cost, and the last one is optimal
+    def test_anytime_repairing_astar_reports_bounded_solutions(self):
+        problem = load_dungeon("dungeon3.txt")
+        state = problem.get_initial_state()
+        optimal = path_cost(problem, state, AStarSearch(problem, state, strong_heuristic))
+        reports = []
+        solution = AnytimeRepairingAStarSearch(problem, state, strong_heuristic,
+                                               on_solution=lambda solution, cost, bound: reports.append((solution, cost, bound)))
+        self.assertEqual(path_cost(problem, state, solution), optimal)
+        self.assertTrue(reports)
+        for reported, cost, bound in reports:
+            self.assertEqual(path_cost(problem, state, reported), cost)
+            self.assertLessEqual(cost, bound * optimal + 1e-9)
+        self.assertEqual(reports[-1][1], optimal)
+
+if __name__ == "__main__":
+    unittest.main()
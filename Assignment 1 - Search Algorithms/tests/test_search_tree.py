@@ -0,0 +1,37 @@
+import unittest
+
+from search_tree import SearchTree
+
+class SearchTreeTests(unittest.TestCase):
+    def setUp(self):
+        # root -a-> A -b-> B -c-> C and root -d-> D
+        self.tree = SearchTree("root")
+        self.tree.add("A", "root", "a")
+        self.tree.add("B", "A", "b")
+        self.tree.add("C", "B", "c")
+        self.tree.add("D", "root", "d")
+
+    def test_paths(self):
+        self.assertEqual(self.tree.path("C"), ["a", "b", "c"])
+        self.assertEqual(self.tree.trajectory("C"), [("root", "a"), ("A", "b"), ("B", "c")])
+        self.assertEqual(self.tree.path("D"), ["d"])
+        self.assertEqual(self.tree.path("root"), [])
+
+    def test_membership_and_parents(self):
+        tree = self.tree
+        self.assertEqual(len(tree), 5)
+        self.assertIn("root", tree)
+        self.assertIn("C", tree)
+        self.assertNotIn("E", tree)
+        self.assertIsNone(tree.parent("root"))
+        self.assertEqual(tree.parent("B"), ("A", "b"))
+        self.assertIsNone(tree.goal)
+
+    # Adding a state again replaces its back-pointer (for example, when a cheaper path to it is found)
+    def test_replaced_parent(self):
+        self.tree.add("C", "D", "e")
+        self.assertEqual(len(self.tree), 5)
+        self.assertEqual(self.tree.path("C"), ["d", "e"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import os
+from typing import Optional
+
+from problem import Problem, S, Solution
+
+# The helpers shared by the unit tests of the assignment modules (they are not graded by the autograder)
+# Run the tests from the directory of the assignment with "python -m pytest tests" or "python -m unittest discover tests"
+
+# The directory of the assignment (the levels are read from its "dungeons", "graphs" and "parks" directories)
+ASSIGNMENT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Returns the path of a level file in a directory of the assignment
+def level_path(directory: str, name: str) -> str:
+    return os.path.join(ASSIGNMENT_DIRECTORY, directory, name)
+
+# Returns the cost of a solution from the given state (or None if there is no solution)
+# It also checks that the solution ends in a goal state
+def path_cost(problem: Problem, state: S, path: Solution) -> Optional[float]:
+    if path is None: return None
+    cost = 0
+    for action in path:
+        cost += problem.get_cost(state, action)
+        state = problem.get_successor(state, action)
+    assert problem.is_goal(state), "The solution does not end in a goal state"
+    return cost
@@ -0,0 +1,79 @@
+from functools import lru_cache
+from typing import FrozenSet
+import math
+
+from dungeon import DungeonProblem, DungeonState
+from maze_distance import get_maze_distances
+from mathutils import Point
+
+# This file contains a heuristic for the dungeon problem which estimates the cost of the tour
+# that starts from the player, collects all the remaining coins then ends at the exit
+# (the same bound with another end point is used by the reverse heuristic of the dungeon, see dungeon_heuristic.py)
+#
+# Any such tour must walk from the player to some first coin, then from that coin through all the other coins to the exit.
+# - The first part costs at least the maze distance to the nearest coin.
+# - The second part is a path that connects the remaining coins and the exit, so it costs at least
+#   the minimum spanning tree (MST) over them.
+# The sum of both parts is consistent: a step changes the distance to the nearest coin by at most 1,
+# and collecting a coin reduces the MST by at most the distance from that coin to the nearest remaining one.
+#
+# When only a few coins remain, the exact cost of the tour is computed instead (by the Held-Karp dynamic programming
+# over the coin subsets). Since the maze distances are exact, this is the true remaining cost.
+#
+# The results only depend on the remaining coins, so they are memoised per problem in bounded LRU caches.
+
+# The maximum number of remaining coins for which the exact tour cost is computed
+HELD_KARP_MAX_COINS = 10
+# The maximum number of coin subsets whose results are kept in each cache
+CACHE_SIZE = 2**16
+
+# Returns the memoised functions of the problem (they are created once and stored in the problem cache)
+# The tour may end at any point (the exit for the tour heuristic), so the end point is a part of the memoised arguments
+def _tour_functions(problem: DungeonProblem):
+    cache = problem.cache()
+    functions = cache.get("tour_heuristic")
+    if functions is not None: return functions
+    distance = get_maze_distances(problem).distance
+
+    # The cost of the MST over the coins and the end point (computed using Prim's algorithm)
+    @lru_cache(CACHE_SIZE)
+    def spanning_tree_cost(coins: FrozenSet[Point], end: Point) -> float:
+        cost = 0
+        # The distance from every point outside the tree to the nearest point inside the tree (the tree starts with the end point)
+        outside = {coin: distance(end, coin) for coin in coins}
+        while outside:
+            nearest = min(outside, key=outside.get)
+            cost += outside.pop(nearest)
+            for coin in outside:
+                outside[coin] = min(outside[coin], distance(nearest, coin))
+        return cost
+
+    # The cost of the shortest path that starts at the given coin, collects all the other coins then ends at the end point
+    @lru_cache(CACHE_SIZE)
+    def path_cost(start: Point, coins: FrozenSet[Point], end: Point) -> float:
+        if not coins: return distance(start, end)
+        return min(distance(start, coin) + path_cost(coin, coins - {coin}, end) for coin in coins)
+
+    functions = cache["tour_heuristic"] = (spanning_tree_cost, path_cost)
+    return functions
+
+# Estimates the cost of the tour that starts from the start point, collects all the given coins then ends at the end point
+def tour_cost_bound(problem: DungeonProblem, start: Point, coins: FrozenSet[Point], end: Point) -> float:
+    distance = get_maze_distances(problem).distance
+    # Go to the end point, if there are no coins
+    if not coins:
+        return distance(start, end)
+    spanning_tree_cost, path_cost = _tour_functions(problem)
+    if len(coins) <= HELD_KARP_MAX_COINS:
+        # The exact cost of the best tour
+        return min(distance(start, coin) + path_cost(coin, coins - {coin}, end) for coin in coins)
+    # The distance to the nearest coin plus the MST over the coins and the end point
+    return min(distance(start, coin) for coin in coins) + spanning_tree_cost(coins, end)
+
+def tour_heuristic(problem: DungeonProblem, state: DungeonState) -> float:
+    return tour_cost_bound(problem, state.player, state.remaining_coins, problem.layout.exit)
+
+# Returns the hit and miss statistics of the memoised functions of the problem
+def tour_cache_info(problem: DungeonProblem):
+    spanning_tree_cost, path_cost = _tour_functions(problem)
+    return {"spanning_tree": spanning_tree_cost.cache_info(), "path": path_cost.cache_info()}
@@ -4,22 +4,33 @@ import time
 import json
 import argparse
 import os
+import sys
 from typing import Any, Callable, Dict, List, Tuple, Union
 from queue import Queue
 
 from helpers.globals import *
 from helpers.utils import *
+import helpers.utils
+
+# The modules shared by the autograders of all the assignments are in the "grading" directory next to the assignments
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "grading"))
+from test_workers import run_tests_in_parallel, supports_parallel_tests
+from test_plans import load_expression, load_test_plan
 
 root = "testcases"
 
-def get_test_cases(path: str) -> List[Dict[str, Any]]:
-    test_cases = []
+# Returns the names of the test case files in the given directory (in the order in which they are run)
+def get_test_filenames(path: str) -> List[str]:
+    filenames = []
     for filename in os.listdir(path):
         if filename.startswith("__"): continue
         filepath = os.path.join(path, filename)
         if os.path.isfile(filepath) and os.path.splitext(filepath)[1] == ".json":
-            test_cases.append(json.load(open(filepath, 'r')))
-    return test_cases
+            filenames.append(filename)
+    return filenames
+
+def get_test_cases(path: str) -> List[Dict[str, Any]]:
+    return [json.load(open(os.path.join(path, filename), 'r')) for filename in get_test_filenames(path)]
 
 def read_problems() -> Tuple[str, List[Dict[Any, str]]]:
     data = json.load(open(os.path.join(root, "problems.json")))
@@ -82,6 +93,23 @@ def approximate_comparator(output, expected):
         message = f"Expected {expected} but got {output}"
     return Result(success, grade, message)
 
+# Evaluates the function, the arguments and the comparator of a test case
+# If the compiled test case is given (see grading/test_plans.py), its values are loaded instead of evaluating the expressions again
+def prepare_test(problem: 'Problem', test_case: Dict[str, Any], compiled: Union[Dict[str, Any], None] = None) -> Tuple[Callable, Arguments, Callable, Arguments]:
+    source, evaluate = (test_case, eval) if compiled is None else (compiled, lambda value: load_expression(value, globals()))
+    fn = problem.default_fn
+    if "function" in source: fn = evaluate(source["function"])
+    input_args = source.get("input_args", [])
+    input_kwargs = source.get("input_kwargs", {})
+    fn_args = Arguments(
+        [evaluate(arg) for arg in input_args], {key:evaluate(value) for key, value in input_kwargs.items()})
+    cmp = problem.default_cmp
+    if "comparator" in source: cmp = evaluate(source["comparator"])
+    cmp_args = Arguments(
+        [evaluate(arg) for arg in source.get("comparison_args", [])],
+        {key:evaluate(value) for key, value in source.get("comparison_kwargs", {}).items()})
+    return fn, fn_args, cmp, cmp_args
+
 class Problem:
     def __init__(self, **kwargs) -> None:
         self.name = kwargs.get("name", "Unnamed Problem")
@@ -95,30 +123,40 @@ class Problem:
         self.grade = 0
         self.maximum_grade = 0
     
-    def run(self, is_debug: bool = False):
+    # Runs the test cases one after another (or in "jobs" worker processes if jobs > 1)
+    # If plan_cache is true, the test cases are loaded from the compiled test plan (see grading/test_plans.py)
+    def run(self, is_debug: bool = False, jobs: int = 1, plan_cache: bool = False):
         print(f"Problem: {self.name}")
-        test_cases = get_test_cases(os.path.join(root, self.testcases_path))
+        if plan_cache:
+            path = os.path.join(root, self.testcases_path)
+            # The star import only copied the solution path before it was set, so it is read through the module
+            test_cases, compiled = load_test_plan(path, get_test_filenames(path), globals(), helpers.utils.solution_path)
+        else:
+            test_cases = get_test_cases(os.path.join(root, self.testcases_path))
+            compiled = [None] * len(test_cases)
         self.grade = 0
         self.maximum_grade = 0
+        timeouts = [(None if is_debug else test_case.get("timeout", self.default_timeout)) for test_case in test_cases]
+        parallel_results = None
+        if jobs > 1:
+            parallel_results = run_tests_in_parallel(
+                lambda index: run_test(*prepare_test(self, test_cases[index], compiled[index]), timeouts[index]),
+                lambda message: Result(False, 0, message), timeouts, jobs)
         for test_index, test_case in enumerate(test_cases):
             description = test_case.get("description", f"Test Case {test_index+1}")
             timeout = test_case.get("timeout", self.default_timeout)
             print(f"{test_index+1}: {description} :: time-limit = {timeout}sec")
-            fn = self.default_fn
-            if "function" in test_case: fn = eval(test_case["function"])
             input_args = test_case.get("input_args", [])
             input_kwargs = test_case.get("input_kwargs", {})
-            fn_args = Arguments(
-                [eval(arg) for arg in input_args], {key:eval(value) for key, value in input_kwargs.items()})
-            cmp = self.default_cmp
-            if "comparator" in test_case: cmp = eval(test_case["comparator"])
-            cmp_args = Arguments(
-                [eval(arg) for arg in test_case.get("comparison_args", [])],
-                {key:eval(value) for key, value in test_case.get("comparison_kwargs", {}).items()})
             weight = test_case.get("weight", 1)
             maximum_grade = self.weight * weight * test_case.get("maximum_grade", 1)
             self.maximum_grade += maximum_grade
-            result = run_test(fn, fn_args, cmp, cmp_args, (None if is_debug else timeout))
+            if parallel_results is None:
+                result = run_test(*prepare_test(self, test_case, compiled[test_index]), timeouts[test_index])
+            else:
+                # The output printed by the test case in the worker is printed where the test case would have printed it
+                output, result = next(parallel_results)
+                print(output, end="")
             if result is None:
                 print("Function is not implemented yet")
                 continue
@@ -162,8 +200,12 @@ def main(args: argparse.Namespace):
                 problems = [problem for index, problem in enumerate(problems) if index in selected]
         except:
             pass
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if jobs > 1 and not supports_parallel_tests():
+        print("The test cases cannot run in worker processes on this platform, so they run one after another\n")
+        jobs = 1
     for problem in problems:
-        problem.run(args.debug)
+        problem.run(args.debug, jobs, args.plan_cache)
         print()
         total_grade += problem.grade
         maximum_grade += problem.maximum_grade
@@ -175,5 +217,7 @@ if __name__ == "__main__":
     parser.add_argument("--question", "-q", default="all", help="Choose the question(s) to include in the grading (or prefix with ~ to exclude)")
     parser.add_argument("--debug", "-d", action="store_true", help="Disables timeout to enable debugging via the autograder")
     parser.add_argument("--solution", "-s", default="")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="the number of test cases to run in parallel worker processes (0 for the number of CPUs)")
+    parser.add_argument("--plan-cache", "-pc", action="store_true", help="store the evaluated test cases in .cache and load them in the later runs (see grading/test_plans.py)")
     args = parser.parse_args()
     main(args)
\ No newline at end of file
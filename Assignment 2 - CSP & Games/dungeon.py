@@ -3,7 +3,7 @@ from copy import deepcopy
 from typing import Iterable, List, Optional, Set, Tuple
 from enum import Enum
 
-from mathutils import Direction, Point
+from mathutils import Direction, GridTopology, Point
 from game import Game
 from helpers.utils import track_call_count
 from helpers.mt19937 import RandomGenerator
@@ -104,8 +104,9 @@ class DungeonState:
 
 # This is the implementation of the dungeon game
 class DungeonGame(Game[DungeonState, Direction]):
-    # The problem will contain the dungeon layout and the inital state
+    # The problem will contain the dungeon layout, its topology (the numbered walkable cells) and the inital state
     layout: DungeonLayout
+    topology: GridTopology
     initial_state: DungeonState
 
     def get_initial_state(self) -> DungeonState:
@@ -136,28 +137,35 @@ class DungeonGame(Game[DungeonState, Direction]):
         return state.turn
 
     def get_actions(self, state: DungeonState) -> Iterable[Direction]:
+        topology = self.topology
         if state.turn == 0:
             # Find an return actions to be done by the player
-            position_position = state.player.position
-            positions = ((direction, position_position + direction.to_vector()) for direction in Direction)
+            player_cell = topology.cell_index[state.player.position]
             # prevent the player from getting into a wall
-            return [direction for direction, position in positions if position in state.layout.walkable]
+            return [direction for direction, neighbors in zip(Direction, topology.neighbors) if neighbors[player_cell] >= 0]
         else:
             # Find an return actions to be done by a monster
             index = state.turn - 1
             if not state.monsters[index].alive: return []
-            monster_locations = {monster.position for i, monster in enumerate(state.monsters) if i != index and monster.alive} 
-            monster_position = state.monsters[index].position
-            positions = ((direction, monster_position + direction.to_vector()) for direction in Direction)
+            monster_cells = {topology.cell_index[monster.position] for i, monster in enumerate(state.monsters) if i != index and monster.alive}
+            monster_cell = topology.cell_index[state.monsters[index].position]
             # prevent the monster from getting into a wall or another monster
-            return [direction for direction, position in positions if position in state.layout.walkable and position not in monster_locations]
+            return [direction for direction, neighbors in zip(Direction, topology.neighbors)
+                if neighbors[monster_cell] >= 0 and neighbors[monster_cell] not in monster_cells]
+
+    # Returns the position reached by moving from the given position in the given direction
+    # The topology stores one Point per cell, so no new Point is created unless the move leaves the walkable area
+    def __move(self, position: Point, direction: Direction) -> Point:
+        topology = self.topology
+        neighbor = topology.neighbors[direction][topology.cell_index[position]]
+        return position + direction.to_vector() if neighbor < 0 else topology.cells[neighbor]
 
     def get_successor(self, state: DungeonState, action: Direction) -> DungeonState:
         state = deepcopy(state)
         current_turn = state.turn
         if current_turn == 0:
             # This action is done by the player
-            new_position = state.player.position + action.to_vector()
+            new_position = self.__move(state.player.position, action)
             state.player.position = new_position
             if new_position in state.coins:
                 # If we walk over a coin, we take it
@@ -186,7 +194,7 @@ class DungeonGame(Game[DungeonState, Direction]):
         else:
             # This action is done by a monster
             monster = state.monsters[current_turn - 1]
-            new_position = monster.position + action.to_vector()
+            new_position = self.__move(monster.position, action)
             monster.position = new_position
             if new_position == state.player.position:
                 if state.player.inventory.daggers != 0:
@@ -230,6 +238,7 @@ class DungeonGame(Game[DungeonState, Direction]):
                         exit = Point(x, y)
         problem = DungeonGame()
         problem.layout = DungeonLayout(width, height, walkable, exit)
+        problem.topology = GridTopology(walkable)
         player = Player(player, True, Player.Inventory(0, 0, 0))
         problem.initial_state = DungeonState(0, 0, problem.layout, player, coins, daggers, keys, monsters)
         return problem
@@ -286,18 +295,21 @@ def compute_path(game: DungeonGame, p1: Point, p2: Point) -> List[Point]:
     cache = game.cache()
     if p1 not in cache:
         from collections import deque
-        path_map = {p1: [p1]}
-        queue = deque([p1])
+        # The breadth first search runs over the cell ids of the game topology
+        topology = game.topology
+        source = topology.cell_index[p1]
+        path_map = {source: [p1]}
+        queue = deque([source])
         while queue:
             parent = queue.popleft()
             path = path_map[parent]
-            for direction in Direction:
-                child = parent + direction.to_vector()
-                if child in path_map or child not in game.layout.walkable:
+            for neighbors in topology.neighbors:
+                child = neighbors[parent]
+                if child < 0 or child in path_map:
                     continue
-                path_map[child] = path + [child]
+                path_map[child] = path + [topology.cells[child]]
                 queue.append(child)
-        cache[p1] = path_map
+        cache[p1] = {topology.cells[cell]: path for cell, path in path_map.items()}
     return cache[p1].get(p2, None)
 
 # Finds the shortest path from a point to a path in the dungeon
@@ -1,7 +1,7 @@
 from typing import Dict, List, Optional, Set, Tuple
 from mdp import MarkovDecisionProcess
 from environment import Environment
-from mathutils import Point, Direction
+from mathutils import Point, Direction, GridTopology
 from helpers.mt19937 import RandomGenerator
 import json
 
@@ -13,6 +13,7 @@ class GridMDP(MarkovDecisionProcess[Point, Direction]):
     terminals: Set[Point] # A set of positions where the episode would end when the player reaches it
     rewards: Dict[Point, float] # The reward of each position
     noise: float # The action noise, aka the probability of steering left or right of the intended direction
+    topology: GridTopology # The walkable positions numbered row by row with the neighbors of each of them
 
     def __init__(self, 
             size: Tuple[int, int], 
@@ -26,6 +27,7 @@ class GridMDP(MarkovDecisionProcess[Point, Direction]):
         self.terminals = terminals
         self.rewards = rewards
         self.noise = noise
+        self.topology = GridTopology(walkable)
 
     # Returns all possible states (where there is no walls)
     def get_states(self) -> List[Point]:
@@ -53,9 +55,12 @@ class GridMDP(MarkovDecisionProcess[Point, Direction]):
             (action.rotate(3), 0.5 * self.noise)
         ]
         states = {}
+        topology = self.topology
+        cell = topology.cell_index[state]
         for direction, prob in noisy_actions:
-            next_state = state + direction.to_vector()
-            if next_state not in self.walkable: next_state = state
+            # If the player would walk into a wall, it stays in place
+            next_cell = topology.neighbors[direction][cell]
+            next_state = state if next_cell < 0 else topology.cells[next_cell]
             if next_state in states: states[next_state] += prob
             else: states[next_state] = prob
         return states
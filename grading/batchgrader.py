@@ -0,0 +1,117 @@
+import os, subprocess, argparse, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import Queue
+from typing import Callable, Optional, Set
+
+try:
+    import resource
+except ImportError:
+    resource = None # The resource limits are only supported on POSIX systems
+
+# This script grades the submissions of many students (one directory per student) with the autograder of an assignment
+# It runs the "autograder.py" of the current directory, so it is started from the directory of the assignment, for example:
+#   python ../grading/batchgrader.py <submissions directory> <output file>
+
+# Returns the function that runs in the grader process before it starts the autograder (or None if there is nothing to set up)
+# It pins the process to the given CPU and applies the memory limit (in megabytes) and the CPU time limit (in seconds)
+def make_preexec(cpu: Optional[int], memory_limit: Optional[int], cpu_limit: Optional[int]) -> Optional[Callable[[], None]]:
+    if cpu is None and memory_limit is None and cpu_limit is None: return None
+    def preexec():
+        if cpu is not None:
+            os.sched_setaffinity(0, {cpu})
+        if memory_limit is not None:
+            size = memory_limit * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (size, size))
+        if cpu_limit is not None:
+            # The process receives SIGXCPU at the soft limit and it is killed at the hard limit
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit + 1))
+    return preexec
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("out")
+    parser.add_argument("--repeat", "-r", type=int, default=4)
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="the number of graders that run at the same time (0 for the number of CPUs)")
+    parser.add_argument("--pin", "-p", action="store_true", help="pin every grader to its own CPU so that the timed tests of the other graders do not slow it down")
+    parser.add_argument("--memory-limit", "-m", type=int, default=None, help="the maximum memory (address space) of every grader in megabytes")
+    parser.add_argument("--cpu-limit", "-c", type=int, default=None, help="the maximum CPU time of every grader in seconds")
+    args = parser.parse_args()
+
+    path: str = args.path
+    out: str = args.out
+    repeat: int = args.repeat
+
+    if not os.path.isfile("autograder.py"):
+        parser.error("the batch grader must run from the directory of an assignment (which contains autograder.py)")
+    if (args.memory_limit is not None or args.cpu_limit is not None) and resource is None:
+        parser.error("the memory and CPU limits are not supported on this platform")
+    if args.pin and not hasattr(os, "sched_setaffinity"):
+        parser.error("CPU pinning is not supported on this platform")
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    jobs = args.jobs if args.jobs > 0 else len(cpus)
+    if args.pin and jobs > len(cpus):
+        print(f"Warning: {jobs} graders will share {len(cpus)} CPUs")
+
+    dirnames = sorted(dirname for dirname in os.listdir(path) if os.path.isdir(os.path.join(path, dirname)))
+    results = {dirname:[None] * repeat for dirname in dirnames}
+    remaining = {dirname:repeat for dirname in dirnames}
+
+    environ = os.environ.copy()
+    environ['PYTHONIOENCODING'] = 'utf-8'
+
+    # Every running grader takes a slot, and the slot selects its CPU when the graders are pinned
+    free_slots: Queue = Queue()
+    for slot in range(jobs):
+        free_slots.put(slot)
+    # The grader processes that are still running (they are stopped if the batch is interrupted)
+    running: Set[subprocess.Popen] = set()
+    running_lock = threading.Lock()
+    stopped = threading.Event()
+
+    # Runs the autograder on the submission of a student in a grader process and blocks until the process exits
+    def grade(r: int, index: int, dirname: str) -> int:
+        slot = free_slots.get()
+        try:
+            dirpath = os.path.join(path, dirname)
+            print(f"Run #{r}/{repeat}: Grading Student {index+1}/{len(dirnames)} - {dirname}")
+            preexec = make_preexec(cpus[slot % len(cpus)] if args.pin else None, args.memory_limit, args.cpu_limit)
+            process = subprocess.Popen(["python", "autograder.py", "-s", dirpath], stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL, encoding="utf-8", env=environ, preexec_fn=preexec)
+            with running_lock:
+                running.add(process)
+                if stopped.is_set(): process.kill()
+            result = process.wait()
+            with running_lock:
+                running.discard(process)
+            return result
+        finally:
+            free_slots.put(slot)
+
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        # The runs are ordered by student, so the rows of the students are written soon after their runs finish
+        futures = {
+            executor.submit(grade, r, index, dirname): (r, index, dirname)
+            for index, dirname in enumerate(dirnames) for r in range(1, repeat+1)
+        }
+        next_row = 0 # The index of the student whose row is written next
+        with open(out, 'w') as f:
+            for future in as_completed(futures):
+                r, index, dirname = futures[future]
+                result = future.result()
+                results[dirname][r-1] = result
+                print(f"Run #{r}/{repeat}: Student {index+1}/{len(dirnames)} - {dirname} - Result:", result)
+                remaining[dirname] -= 1
+                # The rows are written in the order of the student directories (a row waits for the rows of the earlier students)
+                while next_row < len(dirnames) and remaining[dirnames[next_row]] == 0:
+                    dirname = dirnames[next_row]
+                    f.write(f"{dirname}, {', '.join(str(v) for v in results[dirname])}\n")
+                    f.flush()
+                    next_row += 1
+    finally:
+        # If the batch is interrupted, the waiting runs are cancelled and the graders that are still running are stopped
+        stopped.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        with running_lock:
+            for process in running:
+                process.kill()
@@ -0,0 +1,138 @@
+import ast, io, json, os, pickle, sys, types
+from typing import Any, Dict, List, Tuple, Union
+
+# The test plan cache of the autograders (it is only used with the "--plan-cache" option)
+# A test plan holds the pickled values of the expressions of the test cases of a problem, so the levels and puzzles they read
+# are not parsed again on every run. The plan is compiled again if a file it depends on changes (the test case files,
+# the files named in the expressions and the sources of the pickled classes and functions).
+# An expression is kept as text and evaluated on every run if its value cannot be pickled or if it depends on the graded solution.
+
+# The version of the test plan format (the stored plans are compiled again when it changes)
+TEST_PLAN_VERSION = 3
+
+# The directory in which the test plans are stored (relative to the assignment directory)
+TEST_PLAN_DIRECTORY = ".cache"
+
+# Returns the modification time and the size of a file (or None if it does not exist)
+def file_signature(path: str) -> Union[Tuple[int, int], None]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+# A pickler that records the modules of the functions and the classes it stores (including the classes of the pickled objects)
+class ModuleRecordingPickler(pickle.Pickler):
+    def __init__(self, file, modules: set) -> None:
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.modules = modules
+
+    # This is called for every stored object, and returning None stores the object as usual
+    def persistent_id(self, obj):
+        if isinstance(obj, (type, types.FunctionType, types.BuiltinFunctionType)):
+            self.modules.add(getattr(obj, "__module__", None))
+        else:
+            self.modules.add(type(obj).__module__)
+        return None
+
+# Returns True if the source of the module is inside the given directory
+def _is_module_in(module: Union[str, None], directory: str) -> bool:
+    source = getattr(sys.modules.get(module), "__file__", None)
+    return source is not None and os.path.abspath(source).startswith(os.path.join(os.path.abspath(directory), ""))
+
+# This class compiles the test cases of a problem
+# - namespace: the globals in which the expressions are evaluated (the globals of the autograder)
+# - solution_path: the directory of the graded solution ("" if the solution is in the assignment directory)
+class TestPlanCompiler:
+    def __init__(self, namespace: Dict[str, Any], solution_path: str) -> None:
+        self.namespace = namespace
+        self.solution_path = solution_path
+        self.modules = set()    # The modules of the pickled values
+        self.files = set()      # The files named in the expressions
+
+    # Evaluates an expression and returns its pickled value (or the expression itself if it is not stored as a value)
+    def compile_expression(self, expression: str) -> Union[bytes, str]:
+        calls_solution = False
+        for node in ast.walk(ast.parse(expression, mode="eval")):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and os.path.isfile(node.value):
+                self.files.add(node.value)
+            if isinstance(node, ast.Name) and node.id == "load_function":
+                calls_solution = True
+        if calls_solution: return expression
+        value = eval(expression, self.namespace)
+        buffer, recorded = io.BytesIO(), set()
+        try:
+            ModuleRecordingPickler(buffer, recorded).dump(value)
+            pickle.loads(buffer.getvalue()) # Some values can be pickled but not loaded back
+        except Exception:
+            return expression
+        if self.solution_path and any(_is_module_in(module, self.solution_path) for module in recorded): return expression
+        self.modules.update(recorded)
+        return buffer.getvalue()
+
+    # Compiles the expressions of a test case (the compiled test case has the same keys as the test case)
+    # Returns None if an expression fails, so that the test case is evaluated when it runs and the error is reported as usual
+    def compile_test_case(self, test_case: Dict[str, Any]) -> Union[Dict[str, Any], None]:
+        compiled = {}
+        try:
+            for key in ("function", "comparator"):
+                if key in test_case: compiled[key] = self.compile_expression(test_case[key])
+            for key in ("input_args", "comparison_args"):
+                compiled[key] = [self.compile_expression(arg) for arg in test_case.get(key, [])]
+            for key in ("input_kwargs", "comparison_kwargs"):
+                compiled[key] = {name: self.compile_expression(value) for name, value in test_case.get(key, {}).items()}
+        except Exception:
+            return None
+        return compiled
+
+    # Returns the files that the compiled test cases depend on (the sources of the pickled modules in the assignment directory)
+    def dependencies(self) -> List[str]:
+        files = set(self.files)
+        for module in self.modules:
+            if _is_module_in(module, "."): files.add(os.path.relpath(sys.modules[module].__file__))
+        return sorted(files)
+
+# Returns the value of a compiled expression
+def load_expression(compiled: Union[bytes, str], namespace: Dict[str, Any]) -> Any:
+    return pickle.loads(compiled) if isinstance(compiled, bytes) else eval(compiled, namespace)
+
+# Returns the test cases in the given files of a problem directory alongside their compiled forms
+# (None for the test cases that are evaluated when they run)
+# The plan is loaded from the disk if none of the files it depends on changed, otherwise it is compiled and stored again
+def load_test_plan(path: str, filenames: List[str], namespace: Dict[str, Any],
+                   solution_path: str) -> Tuple[List[Dict[str, Any]], List[Union[Dict[str, Any], None]]]:
+    test_files = [(filename, file_signature(os.path.join(path, filename))) for filename in filenames]
+    version = (TEST_PLAN_VERSION, sys.hexversion)
+    plan_path = os.path.join(TEST_PLAN_DIRECTORY, f"test_plan_{path.replace(os.sep, '_')}.pickle")
+    try:
+        with open(plan_path, 'rb') as f:
+            plan = pickle.load(f)
+        if plan["version"] == version and plan["test_files"] == test_files and \
+            all(file_signature(dependency) == signature for dependency, signature in plan["dependencies"]):
+            return plan["test_cases"], plan["compiled"]
+    except Exception:
+        pass # The plan does not exist yet (or it cannot be read), so it is compiled again
+    test_cases = []
+    for filename in filenames:
+        with open(os.path.join(path, filename), 'r') as f:
+            test_cases.append(json.load(f))
+    compiler = TestPlanCompiler(namespace, solution_path)
+    compiled = [compiler.compile_test_case(test_case) for test_case in test_cases]
+    plan = {
+        "version": version,
+        "test_files": test_files,
+        "dependencies": [(dependency, file_signature(dependency)) for dependency in compiler.dependencies()],
+        "test_cases": test_cases,
+        "compiled": compiled,
+    }
+    # The plan is only a cache, so the grading continues if it cannot be stored
+    # (it is renamed into place after it is written, so the other runs never read a partial plan)
+    temporary_path = f"{plan_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(TEST_PLAN_DIRECTORY, exist_ok=True)
+        with open(temporary_path, 'wb') as f:
+            pickle.dump(plan, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, plan_path)
+    except OSError:
+        pass
+    return test_cases, compiled
@@ -0,0 +1,79 @@
+import io, multiprocessing, sys, time, traceback
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, Iterator, List, Tuple, TypeVar, Union
+
+# This file runs the test cases of the autograders in worker processes (see the "--jobs" option of the autograders)
+# It is shared by the autograders of all the assignments, so it does not depend on the helpers of any assignment
+
+# R is the type of the result of a test case
+R = TypeVar("R")
+
+# The extra time (in seconds) given to a worker process after the time limit of its test case before it is killed
+# (the test itself is stopped by run_test inside the worker; this only catches workers that stop responding)
+WORKER_GRACE_PERIOD = 5
+
+# The workers are forked, so they inherit the loaded modules and the solution path, and the function that runs a test case
+# does not need to be picklable. It is None if the platform cannot fork (then the test cases run one after another)
+_fork_context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+
+# Returns True if the test cases can run in worker processes on this platform
+def supports_parallel_tests() -> bool:
+    return _fork_context is not None
+
+# This function runs in the worker process. It runs one test case while capturing its console output
+# and sends the output and the result back through the connection
+def run_test_worker(connection, run: Callable[[int], R], failure: Callable[[str], R], index: int):
+    output = io.StringIO()
+    sys.stdout = output
+    try:
+        result = run(index)
+    except:
+        result = failure(traceback.format_exc())
+    finally:
+        sys.stdout = sys.__stdout__
+    connection.send((output.getvalue(), result))
+    connection.close()
+
+# Runs the test cases in worker processes (at most "jobs" at the same time) with the given time limits (None for no limit)
+# and yields the console output and the result of every test case in the original order as soon as it is available
+# - run: runs the test case with the given index and returns its result
+# - failure: returns the result of a failed test case with the given message
+def run_tests_in_parallel(run: Callable[[int], R], failure: Callable[[str], R], timeouts: List[Union[float, None]],
+                          jobs: int) -> Iterator[Tuple[str, R]]:
+    pending = list(range(len(timeouts)))
+    finished: Dict[int, Tuple[str, R]] = {}
+    # The running test cases: the parent end of the connection of each worker alongside its test index, process and deadline
+    running: Dict[Any, tuple] = {}
+
+    def launch(index: int):
+        timeout = timeouts[index]
+        receiver, sender = _fork_context.Pipe(duplex=False)
+        process = _fork_context.Process(target=run_test_worker, args=(sender, run, failure, index), daemon=True)
+        process.start()
+        sender.close() # The parent only reads from the connection
+        deadline = float('inf') if timeout is None else time.time() + timeout + WORKER_GRACE_PERIOD
+        running[receiver] = (index, process, deadline)
+
+    for next_index in range(len(timeouts)):
+        while next_index not in finished:
+            while pending and len(running) < jobs:
+                launch(pending.pop(0))
+            deadline = min(deadline for _, _, deadline in running.values())
+            for connection in wait(list(running.keys()), None if deadline == float('inf') else max(0, deadline - time.time())):
+                index, process, _ = running.pop(connection)
+                try:
+                    finished[index] = connection.recv()
+                except EOFError:
+                    # The process died without sending a result
+                    finished[index] = ("", failure("Run Failed"))
+                process.join()
+                connection.close()
+            # The workers that passed their deadline are killed
+            for connection, (index, process, deadline) in list(running.items()):
+                if time.time() >= deadline:
+                    del running[connection]
+                    process.kill()
+                    process.join()
+                    connection.close()
+                    finished[index] = ("", failure("Timeout"))
+        yield finished.pop(next_index)